@@ -0,0 +1,506 @@
+"""
+로컬 API 서버
+다운로드 엔진 하나(작업 대기열, 동시 작업 슬롯, 연결 예산, 후처리 단계)를
+HTTP/JSON으로 열어 GUI/확장프로그램/스크립트가 함께 쓰도록 함
+
+사용:
+    python api_server.py -o ~/Videos --port 8765
+
+엔드포인트:
+    GET    /status            엔진 상태 (동시 작업 한도/실행 수, 후처리 대기, 상태별 작업 수)
+    GET    /jobs              작업 목록 (?status=... 로 거르기)
+    GET    /jobs/{id}         작업 하나
+    POST   /jobs              작업 추가 - {"url", "type", "quality"}, 그 목록, 또는 {"jobs": [...]}
+    POST   /playlists         플레이리스트 항목을 모두 작업으로 추가 - {"url", "type", "quality"}
+    DELETE /jobs/{id}         작업 취소
+    GET    /events            진행 이벤트 스트림 (server-sent events, ?job=... 로 거르기)
+    GET    /metrics           작업 단계별 시간/바이트/재시도/오류 지표
+                              (Prometheus 텍스트 형식, ?format=json 이면 JSON)
+    GET    /profiling         프로파일링 스위치 상태
+    POST   /profiling         프로파일링 켜기 - {"job": 번호} 또는 {"url"}이면 그 작업의 다음 실행,
+                              {"seconds"}면 그 시간 동안 시작하는 모든 작업
+    DELETE /profiling         프로파일링 끄기
+
+이벤트는 cli.py가 출력하는 JSON Lines와 같은 내용이며 SSE id로 순번을 붙여
+다시 연결할 때 Last-Event-ID 이후의 최근 이벤트를 이어서 보낸다.
+
+외부 의존성 없이 asyncio로 동작하고 기본으로 127.0.0.1에만 열린다.
+웹 페이지가 로컬 서버로 요청을 보내지 못하도록 Origin이 있는 요청은 확장프로그램만 받는다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from metrics import REGISTRY
+from profiling import DEFAULT_PROFILE_WINDOW, PROFILE_DIR_NAME, ProfileSwitch
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 요청 본문 최대 크기 (바이트)
+MAX_BODY_SIZE = 1024 * 1024
+# 요청 헤더를 기다리는 최대 시간 (초)
+REQUEST_TIMEOUT = 10.0
+# 다시 연결한 구독자에게 이어서 보낼 최근 이벤트 수
+EVENT_BACKLOG = 1000
+# 구독자별 대기 이벤트 한도 - 넘치면 가장 오래된 이벤트부터 버림
+SUBSCRIBER_QUEUE_SIZE = 1000
+# 이벤트가 없을 때 연결 유지용 주석을 보내는 간격 (초)
+KEEPALIVE_INTERVAL = 15.0
+
+# Origin 헤더가 있는 요청 중 받을 출처
+ALLOWED_ORIGIN_PREFIXES = ('chrome-extension://',)
+
+REASONS = {
+    200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 403: 'Forbidden',
+    404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+    413: 'Payload Too Large', 502: 'Bad Gateway',
+}
+
+
+class ApiError(Exception):
+    """HTTP 오류 응답"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class EventHub:
+    """
+    이벤트 구독자 관리
+
+    JobRunner는 작업 스레드에서 이벤트를 알리므로 publish()는 어느 스레드에서나 부를 수 있고,
+    실제 전달은 이벤트 루프에서 구독자별 큐로 나눠 넣는다.
+    작업별 마지막 진행률을 기억해 작업 조회 응답에 함께 싣는다.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.progress: Dict[int, Dict[str, Any]] = {}
+        self._subscribers: Set['asyncio.Queue[Tuple[int, Dict[str, Any]]]'] = set()
+        self._backlog: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=EVENT_BACKLOG)
+        self._next_id = 1
+
+    def publish(self, event: Dict[str, Any]):
+        """이벤트 알림 (스레드 안전)"""
+        self.loop.call_soon_threadsafe(self._broadcast, event)
+
+    def _broadcast(self, event: Dict[str, Any]):
+        job_id = event.get('job')
+        if event['event'] == 'progress':
+            self.progress[job_id] = {key: value for key, value in event.items()
+                                     if key not in ('event', 'job')}
+        elif event['event'] == 'result':
+            self.progress.pop(job_id, None)
+
+        item = (self._next_id, event)
+        self._next_id += 1
+        self._backlog.append(item)
+        for subscriber in self._subscribers:
+            if subscriber.full():
+                subscriber.get_nowait()
+            subscriber.put_nowait(item)
+
+    def subscribe(self, last_id: int = None) -> 'asyncio.Queue[Tuple[int, Dict[str, Any]]]':
+        """구독 시작 (last_id를 주면 그 뒤의 최근 이벤트부터)"""
+        subscriber = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if last_id is not None:
+            for item in self._backlog:
+                if item[0] > last_id and not subscriber.full():
+                    subscriber.put_nowait(item)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: 'asyncio.Queue'):
+        self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+class Request:
+    """읽어 들인 HTTP 요청"""
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        parts = urlsplit(target)
+        self.path = parts.path.rstrip('/') or '/'
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        if not self.body:
+            raise ApiError(400, "요청 본문이 비어 있습니다")
+        try:
+            return json.loads(self.body.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ApiError(400, f"JSON을 읽을 수 없습니다: {e}")
+
+
+class ApiServer:
+    """
+    JobRunner를 감싼 HTTP/JSON API 서버
+
+    엔진은 별도 스레드에서 JobRunner.run(serve=True)로 계속 돌고,
+    요청 처리와 이벤트 스트림은 asyncio 이벤트 루프 하나에서 처리한다.
+    """
+
+    def __init__(self, runner_options: Dict[str, Any], host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT, profile_dir: str = PROFILE_DIR_NAME):
+        """
+        초기화
+
+        Args:
+            runner_options: JobRunner 인자 (output_path, history, min_jobs, max_jobs, stream_audio,
+                trace)
+            host: 바인드 주소
+            port: 포트 (0이면 빈 포트)
+            profile_dir: 작업 프로파일 저장 폴더
+        """
+        self.runner_options = runner_options
+        self.profiler = ProfileSwitch(os.path.abspath(profile_dir),
+                                      log=lambda line: self.hub.publish({'event': 'profile',
+                                                                         'message': line}))
+        self.host = host
+        self.port = port
+        self.runner = None
+        self.hub: Optional[EventHub] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._engine: Optional[threading.Thread] = None
+
+    async def start(self):
+        """엔진과 서버 시작"""
+        # yt-dlp 로딩이 오래 걸리므로 서버를 띄울 때 불러옴
+        from runner import JobRunner
+
+        self.hub = EventHub(asyncio.get_running_loop())
+        self.runner = JobRunner(on_event=self.hub.publish, profiler=self.profiler,
+                                **self.runner_options)
+        self._engine = threading.Thread(target=self.runner.run, kwargs={'serve': True},
+                                        name='job-runner', daemon=True)
+        self._engine.start()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """서버를 닫고 작업을 모두 취소한 뒤 엔진 종료를 기다림"""
+        if self._server is not None:
+            self._server.close()
+        if self.runner is not None:
+            self.runner.close()
+            await asyncio.get_running_loop().run_in_executor(None, self._engine.join)
+
+    # ---- HTTP ----
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                request = await asyncio.wait_for(self._read_request(reader), REQUEST_TIMEOUT)
+                if request is None:
+                    return
+                self._check_origin(request)
+                if request.method == 'GET' and request.path == '/events':
+                    await self._stream_events(request, writer)
+                    return
+                status, payload = await self._route(request)
+            except ApiError as e:
+                status, payload = e.status, {'error': e.message}
+            except asyncio.TimeoutError:
+                return
+            await self._respond(writer, status, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise ApiError(400, "잘못된 요청")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise ApiError(400, "잘못된 Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise ApiError(413, "요청 본문이 너무 큽니다")
+        body = await reader.readexactly(length) if length else b''
+        return Request(method.upper(), target, headers, body)
+
+    @staticmethod
+    def _check_origin(request: Request):
+        origin = request.headers.get('origin')
+        if origin and not origin.startswith(ALLOWED_ORIGIN_PREFIXES):
+            raise ApiError(403, "허용되지 않은 출처입니다")
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Any):
+        if isinstance(payload, str):
+            # Prometheus 텍스트 형식
+            body = payload.encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _route(self, request: Request) -> Tuple[int, Any]:
+        parts = request.path.strip('/').split('/')
+        if parts == ['status']:
+            self._allow(request, 'GET')
+            return 200, self._status()
+        if parts == ['metrics']:
+            self._allow(request, 'GET')
+            if request.query.get('format') == 'json':
+                return 200, REGISTRY.snapshot()
+            return 200, REGISTRY.render()
+        if parts == ['jobs']:
+            self._allow(request, 'GET', 'POST')
+            if request.method == 'GET':
+                return 200, self._list_jobs(request.query.get('status'))
+            return 201, self._submit_jobs(request.json())
+        if parts == ['profiling']:
+            self._allow(request, 'GET', 'POST', 'DELETE')
+            if request.method == 'POST':
+                self._enable_profiling(request.json())
+            elif request.method == 'DELETE':
+                self.profiler.disable()
+            return 200, self.profiler.state()
+        if parts == ['playlists']:
+            self._allow(request, 'POST')
+            return 201, await self._submit_playlist(request.json())
+        if len(parts) == 2 and parts[0] == 'jobs':
+            self._allow(request, 'GET', 'DELETE')
+            job = self._job(parts[1])
+            if request.method == 'GET':
+                return 200, self._describe(job)
+            if not self.runner.cancel_job(job.id):
+                raise ApiError(409, "이미 끝난 작업입니다")
+            return 200, self._describe(job)
+        raise ApiError(404, "없는 경로입니다")
+
+    @staticmethod
+    def _allow(request: Request, *methods: str):
+        if request.method not in methods:
+            raise ApiError(405, f"{request.method}는 지원하지 않습니다")
+
+    # ---- 작업 ----
+
+    def _job(self, value: str):
+        try:
+            job = self.runner.get(int(value))
+        except ValueError:
+            job = None
+        if job is None:
+            raise ApiError(404, "없는 작업입니다")
+        return job
+
+    def _describe(self, job) -> Dict[str, Any]:
+        description = job.result()
+        progress = self.hub.progress.get(job.id)
+        if progress and not job.finished:
+            description['progress'] = progress
+        return description
+
+    def _list_jobs(self, status: str = None) -> List[Dict[str, Any]]:
+        return [self._describe(job) for job in list(self.runner.jobs)
+                if status is None or job.status.key == status]
+
+    def _status(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in list(self.runner.jobs):
+            counts[job.status.key] = counts.get(job.status.key, 0) + 1
+        return {
+            'concurrent_jobs': self.runner.slots.limit,
+            'active_jobs': self.runner.slots.active,
+            'postprocess_pending': self.runner.postprocessor.pending,
+            'jobs': counts,
+            'subscribers': self.hub.subscriber_count,
+        }
+
+    @staticmethod
+    def _job_requests(data: Any) -> List[Dict[str, Any]]:
+        """요청 본문에서 작업 목록 (하나, 목록, {"jobs": [...]})"""
+        if isinstance(data, dict) and 'jobs' in data:
+            data = data['jobs']
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list) or not data:
+            raise ApiError(400, "작업이 없습니다")
+        for item in data:
+            if not isinstance(item, dict) or not isinstance(item.get('url'), str):
+                raise ApiError(400, "작업마다 url이 필요합니다")
+        return data
+
+    def _submit_jobs(self, data: Any) -> List[Dict[str, Any]]:
+        jobs = [self.runner.submit(item['url'], item.get('type') or 'video', item.get('quality'))
+                for item in self._job_requests(data)]
+        return [self._describe(job) for job in jobs]
+
+    async def _submit_playlist(self, data: Any) -> Dict[str, Any]:
+        if not isinstance(data, dict) or not isinstance(data.get('url'), str):
+            raise ApiError(400, "플레이리스트 url이 필요합니다")
+        loop = asyncio.get_running_loop()
+        entries = await loop.run_in_executor(
+            None, self.runner.downloader.get_playlist_entries, data['url'].strip())
+        if entries is None:
+            raise ApiError(502, "플레이리스트를 가져올 수 없습니다")
+        download_type = data.get('type') or 'video'
+        jobs = [self.runner.submit(entry['url'], download_type, data.get('quality'))
+                for entry in entries]
+        return {'url': data['url'], 'count': len(jobs),
+                'jobs': [self._describe(job) for job in jobs]}
+
+    def _enable_profiling(self, data: Any):
+        if not isinstance(data, dict):
+            raise ApiError(400, "프로파일링 설정이 필요합니다")
+        if 'job' in data:
+            self.profiler.profile_job(self._job(str(data['job'])).url)
+        elif isinstance(data.get('url'), str):
+            self.profiler.profile_job(data['url'])
+        else:
+            try:
+                seconds = float(data.get('seconds') or DEFAULT_PROFILE_WINDOW)
+            except (TypeError, ValueError):
+                raise ApiError(400, "seconds는 숫자여야 합니다")
+            self.profiler.enable_for(seconds)
+
+    # ---- 이벤트 스트림 ----
+
+    async def _stream_events(self, request: Request, writer: asyncio.StreamWriter):
+        job_filter = None
+        if 'job' in request.query:
+            job_filter = self._job(request.query['job']).id
+        last_id = request.headers.get('last-event-id')
+        subscriber = self.hub.subscribe(int(last_id) if last_id and last_id.isdigit() else None)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\n"
+                         b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                         b"Cache-Control: no-cache\r\n"
+                         b"Connection: keep-alive\r\n\r\n")
+            await writer.drain()
+            while True:
+                try:
+                    event_id, event = await asyncio.wait_for(subscriber.get(), KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                    await writer.drain()
+                    continue
+                if job_filter is not None and event.get('job') != job_filter:
+                    continue
+                data = json.dumps(event, ensure_ascii=False)
+                writer.write(f"id: {event_id}\nevent: {event['event']}\ndata: {data}\n\n"
+                             .encode('utf-8'))
+                await writer.drain()
+        finally:
+            self.hub.unsubscribe(subscriber)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='api_server.py', description="다운로드 엔진 로컬 API 서버 (HTTP/JSON, SSE 진행 이벤트)")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f"바인드 주소 (기본: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"포트 (기본: {DEFAULT_PORT})")
+    parser.add_argument('-o', '--output', help="저장 폴더 (기본: ~/Videos)")
+    parser.add_argument('-j', '--jobs', type=int,
+                        help="동시 작업 수 고정 (지정하지 않으면 자동 조절)")
+    parser.add_argument('--min-jobs', type=int, help="자동 조절 최소 동시 작업 수")
+    parser.add_argument('--max-jobs', type=int, help="자동 조절 최대 동시 작업 수")
+    parser.add_argument('--no-history', action='store_true',
+                        help="완료 기록을 보지 않고 쓰지도 않음 (이미 받은 영상도 다시 받음)")
+    parser.add_argument('--no-stream', action='store_true',
+                        help="MP3/WAV를 받으면서 변환하지 않고 받은 뒤 변환")
+    parser.add_argument('--profile-dir', default=PROFILE_DIR_NAME,
+                        help=f"작업 프로파일 저장 폴더 (기본: ./{PROFILE_DIR_NAME})")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="작업 수명 주기 이벤트를 FILE에 JSON Lines로 기록 (replay.py로 재생)")
+    return parser
+
+
+async def _serve(server: ApiServer):
+    await server.start()
+    print(f"API 서버 시작: http://{server.host}:{server.port}", file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    from job_tuner import MAX_CONCURRENT_JOBS, MIN_CONCURRENT_JOBS
+
+    if args.jobs:
+        min_jobs = max_jobs = args.jobs
+    else:
+        min_jobs = args.min_jobs or MIN_CONCURRENT_JOBS
+        max_jobs = args.max_jobs or max(MAX_CONCURRENT_JOBS, min_jobs)
+
+    history = None
+    if not args.no_history:
+        from download_history import DownloadHistory
+        history = DownloadHistory()
+
+    from job_trace import open_trace
+    trace = open_trace(args.trace, 'api', log=lambda line: print(line, file=sys.stderr))
+
+    server = ApiServer({
+        'output_path': os.path.expanduser(args.output) if args.output else None,
+        'history': history,
+        'min_jobs': min_jobs,
+        'max_jobs': max_jobs,
+        'stream_audio': not args.no_stream,
+        'trace': trace,
+    }, args.host, args.port, args.profile_dir)
+    try:
+        asyncio.run(_serve(server))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"api_server.py: 서버를 시작할 수 없습니다: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if history is not None:
+            history.close()
+        if trace is not None:
+            trace.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
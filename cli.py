@@ -0,0 +1,178 @@
+"""
+명령줄 일괄 다운로드
+GUI(PyQt6) 없이 URL 목록을 동시에 받고 진행 상황과 결과를 JSON Lines로 출력
+
+사용:
+    python cli.py URL [URL ...]
+    python cli.py -i urls.txt -t audio -q "MP3 (320kbps)" -o ~/Music
+    cat urls.txt | python cli.py -i - -j 4
+
+입력 파일은 한 줄에 하나씩
+    URL
+    URL<탭>video|audio<탭>화질/포맷      (줄마다 타입/화질 지정)
+    {"url": ..., "type": ..., "quality": ...}
+형식을 받으며 빈 줄과 '#'으로 시작하는 줄은 건너뛴다.
+
+종료 코드:
+    0  모든 작업 성공 (이미 받은 작업 포함)
+    1  실패한 작업 있음
+    2  사용법 오류 또는 받을 작업 없음
+    130  중단됨 (Ctrl+C)
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# (url, 타입, 화질) - 타입/화질이 None이면 명령줄 기본값
+JobLine = Tuple[str, Optional[str], Optional[str]]
+
+
+def parse_line(line: str) -> Optional[JobLine]:
+    """입력 한 줄 해석 (건너뛸 줄이면 None)"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        data = json.loads(line)
+        return data['url'], data.get('type'), data.get('quality')
+    fields = [field.strip() for field in line.split('\t')]
+    return fields[0], (fields[1] or None) if len(fields) > 1 else None, \
+        (fields[2] or None) if len(fields) > 2 else None
+
+
+def read_jobs(urls: List[str], inputs: List[str], stdin: TextIO = None) -> Iterator[JobLine]:
+    """명령줄 URL과 입력 파일('-'는 표준 입력)의 작업"""
+    for url in urls:
+        yield url, None, None
+    for path in inputs:
+        if path == '-':
+            lines = stdin or sys.stdin
+        else:
+            lines = open(path, encoding='utf-8')
+        try:
+            for line in lines:
+                job = parse_line(line)
+                if job:
+                    yield job
+        finally:
+            if path != '-':
+                lines.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='cli.py', description="YouTube 일괄 다운로드 (JSON Lines 진행/결과 출력)")
+    parser.add_argument('urls', nargs='*', metavar='URL', help="받을 URL")
+    parser.add_argument('-i', '--input', action='append', default=[], metavar='FILE',
+                        help="URL 목록 파일 ('-'는 표준 입력, 여러 번 지정 가능)")
+    parser.add_argument('-t', '--type', choices=('video', 'audio'), default='video',
+                        help="기본 다운로드 타입 (기본: video)")
+    parser.add_argument('-q', '--quality',
+                        help="기본 화질/오디오 포맷 (예: '1080p', 'MP3 (320kbps)')")
+    parser.add_argument('-o', '--output', help="저장 폴더 (기본: ~/Videos)")
+    parser.add_argument('-j', '--jobs', type=int,
+                        help="동시 작업 수 고정 (지정하지 않으면 자동 조절)")
+    parser.add_argument('--min-jobs', type=int, help="자동 조절 최소 동시 작업 수")
+    parser.add_argument('--max-jobs', type=int, help="자동 조절 최대 동시 작업 수")
+    parser.add_argument('--no-history', action='store_true',
+                        help="완료 기록을 보지 않고 쓰지도 않음 (이미 받은 영상도 다시 받음)")
+    parser.add_argument('--no-stream', action='store_true',
+                        help="MP3/WAV를 받으면서 변환하지 않고 받은 뒤 변환")
+    parser.add_argument('--quiet', action='store_true',
+                        help="진행률 이벤트 없이 결과와 요약만 출력")
+    parser.add_argument('--profile', metavar='DIR', nargs='?', const='profiles',
+                        help="작업마다 CPU 프로파일과 메모리 할당 스냅샷을 DIR에 저장 (기본: ./profiles)")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="작업 수명 주기 이벤트를 FILE에 JSON Lines로 기록 (replay.py로 재생)")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.urls and not args.input:
+        parser.print_usage(sys.stderr)
+        print("cli.py: URL 또는 -i 입력이 필요합니다", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        lines = list(read_jobs(args.urls, args.input))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"cli.py: 입력을 읽을 수 없습니다: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not lines:
+        print("cli.py: 받을 작업이 없습니다", file=sys.stderr)
+        return EXIT_USAGE
+
+    # 입력을 확인한 뒤에 엔진을 불러옴 (yt-dlp 로딩이 시작 시간의 대부분)
+    from job_tuner import MAX_CONCURRENT_JOBS, MIN_CONCURRENT_JOBS
+    from runner import DONE, FAILED, SKIPPED, JobRunner
+
+    if args.jobs:
+        min_jobs = max_jobs = args.jobs
+    else:
+        min_jobs = args.min_jobs or MIN_CONCURRENT_JOBS
+        max_jobs = args.max_jobs or max(MAX_CONCURRENT_JOBS, min_jobs)
+
+    history = None
+    if not args.no_history:
+        from download_history import DownloadHistory
+        history = DownloadHistory()
+
+    def write(event: dict):
+        if args.quiet and event['event'] not in ('result', 'summary'):
+            return
+        sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    profiler = None
+    if args.profile:
+        from profiling import ProfileSwitch
+        profiler = ProfileSwitch(os.path.abspath(args.profile),
+                                 log=lambda line: write({'event': 'profile', 'message': line}))
+        profiler.enable_for(float('inf'))
+
+    from job_trace import open_trace
+    trace = open_trace(args.trace, 'cli',
+                       log=lambda line: write({'event': 'trace', 'message': line}))
+
+    output = os.path.expanduser(args.output) if args.output else None
+    runner = JobRunner(output, history, min_jobs, max_jobs, on_event=write,
+                       stream_audio=not args.no_stream, profiler=profiler, trace=trace)
+    for url, download_type, quality in lines:
+        download_type = download_type or args.type
+        runner.submit(url, download_type, quality or (args.quality if download_type == args.type else None))
+
+    interrupted = False
+    try:
+        jobs = runner.run()
+    except KeyboardInterrupt:
+        interrupted = True
+        runner.cancel()
+        jobs = runner.jobs
+    finally:
+        if history is not None:
+            history.close()
+        if trace is not None:
+            trace.close()
+
+    counts = {status: sum(1 for job in jobs if job.status == status)
+              for status in (DONE, SKIPPED, FAILED)}
+    write({'event': 'summary', 'jobs': len(jobs),
+           **{status.key: count for status, count in counts.items()},
+           'interrupted': interrupted})
+    if interrupted:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILED if counts[FAILED] or len(jobs) != counts[DONE] + counts[SKIPPED] \
+        else EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+다운로드 기록 모듈
+완료된 다운로드를 (영상 ID, 포맷 프로필) 키로 기록하여 같은 영상을 다시 받지 않도록 함
+GUI, Native Host, 엔진이 같은 파일을 공유
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from media_id import canonical_key
+
+# 기록 파일 경로 (GUI와 Native Host가 공유하도록 사용자 홈에 저장)
+HISTORY_FILE = os.path.join(os.path.expanduser('~'), 'son_downloader_history.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    video_id TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    output_path TEXT,
+    size INTEGER DEFAULT 0,
+    completed_at REAL,
+    PRIMARY KEY (video_id, profile)
+) WITHOUT ROWID
+"""
+
+# 처음 스키마 이후 추가된 컬럼 (기존 기록 파일에 ALTER TABLE로 추가)
+_ADDED_COLUMNS = {
+    'title': 'TEXT',
+    'channel': 'TEXT',
+    'sha256': 'TEXT',
+    'expected_bytes': 'INTEGER DEFAULT 0',
+    'received_bytes': 'INTEGER DEFAULT 0',
+    'fragment_gaps': 'INTEGER DEFAULT 0',
+    'mtime': 'REAL',
+    'merge_seconds': 'REAL',
+    'merge_bytes': 'INTEGER DEFAULT 0',
+}
+
+# entries()가 반환하는 컬럼
+_ENTRY_COLUMNS = (
+    'video_id', 'profile', 'output_path', 'size', 'completed_at', 'title', 'channel',
+    'sha256', 'expected_bytes', 'received_bytes', 'fragment_gaps', 'mtime',
+    'merge_seconds', 'merge_bytes',
+)
+
+
+def history_profile(download_type: str, quality: str) -> str:
+    """다운로드 타입과 화질/포맷으로 프로필 키 생성 (예: 'video:1080p')"""
+    return f"{download_type}:{quality}"
+
+
+class DownloadHistory:
+    """
+    완료된 다운로드 기록
+
+    키 집합을 메모리에 올려 조회는 O(1) 집합 검사로 처리하고,
+    다른 프로세스가 기록을 추가하면 PRAGMA data_version 변화로 감지해
+    새로 추가된 키만 다시 읽는다.
+    """
+
+    def __init__(self, path: str = HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(_SCHEMA)
+        existing = {row[1] for row in self._conn.execute('PRAGMA table_info(history)')}
+        for column, column_type in _ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE history ADD COLUMN {column} {column_type}")
+        self._conn.commit()
+        self._keys = None
+        self._loaded_until = 0.0
+        self._data_version = None
+
+    def close(self):
+        """기록 파일 닫기"""
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _refresh_keys(self):
+        """메모리 키 집합을 최신 상태로 유지 (잠금 안에서 호출)"""
+        version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        if self._keys is not None and version == self._data_version:
+            return
+        if self._keys is None:
+            self._keys = set()
+        rows = self._conn.execute(
+            "SELECT video_id, profile, completed_at FROM history WHERE completed_at >= ?",
+            (self._loaded_until,),
+        )
+        for video_id, profile, completed_at in rows:
+            self._keys.add((video_id, profile))
+            if completed_at and completed_at > self._loaded_until:
+                self._loaded_until = completed_at
+        self._data_version = version
+
+    def lookup(self, url: str, profile: str) -> Optional[Dict[str, Any]]:
+        """
+        이미 받은 다운로드 찾기
+
+        Args:
+            url: 영상 URL (정규화된 ID로 변환하여 조회)
+            profile: history_profile()로 만든 포맷 프로필
+
+        Returns:
+            기록 딕셔너리 (output_path, size, completed_at) - 파일이 사라졌으면 None
+        """
+        key = (canonical_key(url), profile)
+        with self._lock:
+            try:
+                self._refresh_keys()
+                if key not in self._keys:
+                    return None
+                row = self._conn.execute(
+                    "SELECT output_path, size, completed_at FROM history "
+                    "WHERE video_id = ? AND profile = ?",
+                    key,
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+
+        if row is None:
+            return None
+        output_path, size, completed_at = row
+        if not output_path or not os.path.exists(output_path):
+            return None
+        return {'output_path': output_path, 'size': size, 'completed_at': completed_at}
+
+    def entries(self, since: float = 0.0) -> Iterator[Dict[str, Any]]:
+        """since 이후 완료된 기록을 완료 순서대로 반환 (라이브러리 목록/검색 색인용)"""
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(_ENTRY_COLUMNS)} "
+                    "FROM history WHERE completed_at > ? ORDER BY completed_at",
+                    (since,),
+                ).fetchall()
+            except sqlite3.Error:
+                rows = []
+        for row in rows:
+            yield dict(zip(_ENTRY_COLUMNS, row))
+
+    def record(self, url: str, profile: str, output_path: str, size: int = None,
+               title: str = '', channel: str = '', integrity: Dict[str, Any] = None,
+               merge: Dict[str, Any] = None):
+        """
+        완료된 다운로드 기록
+
+        Args:
+            integrity: IntegrityTracker.record() 결과 (sha256, expected_bytes,
+                received_bytes, fragment_gaps) - 라이브러리 검사에 사용
+            merge: 병합 비용 (seconds, bytes) - 병합 없이 받은 영상은 0, 해당 없으면 None
+        """
+        try:
+            stat = os.stat(output_path)
+        except OSError:
+            stat = None
+        if size is None:
+            size = stat.st_size if stat else 0
+        integrity = integrity or {}
+        merge = merge or {}
+        key = (canonical_key(url), profile)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO history ({', '.join(_ENTRY_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_ENTRY_COLUMNS))})",
+                    key + (output_path, size, time.time(), title, channel,
+                           integrity.get('sha256'), integrity.get('expected_bytes', 0),
+                           integrity.get('received_bytes', 0), integrity.get('fragment_gaps', 0),
+                           stat.st_mtime if stat else None,
+                           merge.get('seconds'), merge.get('bytes', 0)),
+                )
+                self._conn.commit()
+                if self._keys is not None:
+                    self._keys.add(key)
+            except sqlite3.Error:
+                pass
+
+    def forget(self, video_id: str, profile: str):
+        """기록 삭제 (손상된 파일을 다시 받을 수 있도록)"""
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "DELETE FROM history WHERE video_id = ? AND profile = ?", (video_id, profile)
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+            if self._keys is not None:
+                self._keys.discard((video_id, profile))
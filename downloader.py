@@ -2,13 +2,144 @@
 YouTube 다운로드 핵심 기능 모듈
 yt-dlp를 사용하여 비디오/오디오 다운로드
 """
+import copy
+import functools
 import os
-import re
+import time
 import yt_dlp
 import urllib.request
 import json
 from typing import Callable, Optional, Dict, Any, List
 
+from download_history import DownloadHistory, history_profile
+from format_index import FormatIndex
+from fragment_tuner import DEFAULT_BUDGET, DEFAULT_TUNER, FragmentSession
+from integrity import INCOMPLETE_DOWNLOAD_MESSAGE, IntegrityTracker
+from job_record import format_filesize
+from media_id import MEDIA_PLAYLIST, parse_media
+from metrics import (
+    PHASE_EXTRACT, PHASE_MERGE, PHASE_OEMBED, PHASE_PLAYER_JS, PHASE_TRANSCODE, PHASE_TRANSFER,
+    JobMetrics, job_status, observe_phase
+)
+from postprocess import PostProcessStage
+from profiling import ProfileSwitch
+from retry import retry_sleep_functions
+from storage import SpaceReservations, preallocate
+
+# 여유 공간이 부족해 시작하지 않은 작업의 완료 메시지 접두어 (호출 측은 실패 대신 보류로 처리)
+INSUFFICIENT_SPACE_MESSAGE = "저장 공간 부족"
+
+# 받으면서 변환할 때 한 번에 읽는 크기
+STREAM_READ_SIZE = 64 * 1024
+# 인코더로 흘려받을 수 있는 프로토콜 (조각 스트림은 파일로 받은 뒤 변환)
+STREAMABLE_PROTOCOLS = ('http', 'https')
+
+
+def _profiled(method: Callable) -> Callable:
+    """다운로드 메서드를 프로파일링 구간으로 감쌈 (profiler가 없거나 대상이 아니면 그대로 실행)"""
+    @functools.wraps(method)
+    def wrapper(self, url, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, url, *args, **kwargs)
+        with self.profiler.session(url):
+            return method(self, url, *args, **kwargs)
+    return wrapper
+
+
+class TunedYoutubeDL(yt_dlp.YoutubeDL):
+    """
+    포맷마다 조각 동시 요청 수를 조절하는 YoutubeDL
+
+    포맷 하나를 받을 때마다 (dl) 공유 연결 예산에서 연결을 받아
+    조각 다운로드(DASH/HLS)면 조절기가 정한 수를 concurrent_fragment_downloads로 쓰고,
+    끝나면 받은 크기와 시간, 요청 제한 여부를 조절기에 보고한다.
+
+    metrics(JobMetrics)가 있으면 첫 포맷 다운로드가 시작될 때 추출 단계를 닫고
+    포맷 다운로드를 전송 단계로, 'Downloading player' 메시지부터 다음 메시지까지를
+    플레이어 JS 단계로 기록하며 재시도와 오류도 센다.
+    """
+
+    def __init__(self, *args, fragment_tuner=None, connections=None, job_tuner=None,
+                 metrics: JobMetrics = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fragment_tuner = fragment_tuner or DEFAULT_TUNER
+        self.connections = connections or DEFAULT_BUDGET
+        self.job_tuner = job_tuner  # 재시도를 동시 작업 수 조절기에 보고
+        self.metrics = metrics
+        self._fragment_session = None
+
+    def dl(self, name, info, subtitle=False, test=False):
+        if subtitle or test:
+            return super().dl(name, info, subtitle, test)
+        if self.metrics:
+            self.metrics.stop(PHASE_EXTRACT)
+        with FragmentSession(info, self.fragment_tuner, self.connections) as session:
+            self.params['concurrent_fragment_downloads'] = session.connections
+            self._fragment_session = session
+            if self.metrics:
+                self.metrics.start(PHASE_TRANSFER)
+            try:
+                return super().dl(name, info, subtitle, test)
+            finally:
+                if self.metrics:
+                    self.metrics.stop(PHASE_TRANSFER)
+                self._fragment_session = None
+                try:
+                    session.size = os.path.getsize(name)
+                except OSError:
+                    session.size = 0
+
+    # 재시도 메시지는 다운로더 → to_screen, 오류는 report_warning/report_error로 전달됨
+
+    def _observe(self, message):
+        if self._fragment_session:
+            self._fragment_session.observe(message)
+        retrying = isinstance(message, str) and 'Retrying' in message
+        if self.job_tuner and retrying:
+            self.job_tuner.record_retry()
+        if self.metrics:
+            self.metrics.stop(PHASE_PLAYER_JS)
+            if retrying:
+                self.metrics.retry()
+            elif isinstance(message, str) and 'Downloading player' in message:
+                self.metrics.start(PHASE_PLAYER_JS)
+
+    def to_screen(self, message, *args, **kwargs):
+        self._observe(message)
+        return super().to_screen(message, *args, **kwargs)
+
+    def report_warning(self, message, *args, **kwargs):
+        self._observe(message)
+        return super().report_warning(message, *args, **kwargs)
+
+    def report_error(self, message, *args, **kwargs):
+        self._observe(message)
+        if self.metrics:
+            self.metrics.error(PHASE_TRANSFER if self._fragment_session else PHASE_EXTRACT)
+        return super().report_error(message, *args, **kwargs)
+
+
+class StagedYoutubeDL(TunedYoutubeDL):
+    """
+    영상+오디오 병합을 실행하지 않고 기록만 하는 YoutubeDL
+
+    병합이 필요한 다운로드가 끝나면 deferred_merges에 (파일 목록, 결과 경로, 스트림 정보)를
+    남기고 바로 반환하므로, 호출 측이 병합을 PostProcessStage로 넘길 수 있다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deferred_merges = []
+
+    def post_process(self, filename, info, files_to_move=None):
+        files = info.get('__files_to_merge')
+        if not files:
+            return super().post_process(filename, info, files_to_move)
+        streams = [(f.get('vcodec'), f.get('acodec')) for f in info.get('requested_formats') or []]
+        self.deferred_merges.append((list(files), filename, streams))
+        info['filepath'] = filename
+        return info
+
 
 class YouTubeDownloader:
     """YouTube 다운로드 클래스"""
@@ -25,25 +156,62 @@ class YouTubeDownloader:
     }
 
     # 오디오 포맷 옵션
+    # postprocessor: yt-dlp 내장 후처리 코덱, codec: 후처리 단계의 목표 코덱
+    # (원본이 이미 목표 코덱이면 재인코딩 없이 복사하거나 그대로 사용)
     AUDIO_FORMATS = {
-        'MP3 (320kbps)': {'format': 'bestaudio/best', 'postprocessor': 'mp3', 'quality': '320'},
-        'MP3 (256kbps)': {'format': 'bestaudio/best', 'postprocessor': 'mp3', 'quality': '256'},
-        'MP3 (192kbps)': {'format': 'bestaudio/best', 'postprocessor': 'mp3', 'quality': '192'},
-        'MP3 (128kbps)': {'format': 'bestaudio/best', 'postprocessor': 'mp3', 'quality': '128'},
-        'M4A (최고 품질)': {'format': 'bestaudio[ext=m4a]/bestaudio/best', 'postprocessor': None, 'quality': None},
-        'WAV': {'format': 'bestaudio/best', 'postprocessor': 'wav', 'quality': None},
+        'MP3 (320kbps)': {'format': 'bestaudio/best', 'postprocessor': 'mp3', 'codec': 'mp3', 'quality': '320'},
+        'MP3 (256kbps)': {'format': 'bestaudio/best', 'postprocessor': 'mp3', 'codec': 'mp3', 'quality': '256'},
+        'MP3 (192kbps)': {'format': 'bestaudio/best', 'postprocessor': 'mp3', 'codec': 'mp3', 'quality': '192'},
+        'MP3 (128kbps)': {'format': 'bestaudio/best', 'postprocessor': 'mp3', 'codec': 'mp3', 'quality': '128'},
+        'M4A (최고 품질)': {'format': 'bestaudio[ext=m4a]/bestaudio/best', 'postprocessor': None, 'codec': 'm4a', 'quality': None},
+        'WAV': {'format': 'bestaudio/best', 'postprocessor': 'wav', 'codec': 'wav', 'quality': None},
+    }
+
+    # 여러 포맷 동시 출력 - 한 번 받아 한 번 디코딩해서 모든 포맷을 만듦
+    AUDIO_BUNDLES = {
+        'MP3 (320kbps + 128kbps)': ['MP3 (320kbps)', 'MP3 (128kbps)'],
+        'MP3 (320kbps) + M4A': ['MP3 (320kbps)', 'M4A (최고 품질)'],
+        'M4A + WAV': ['M4A (최고 품질)', 'WAV'],
     }
 
-    def __init__(self, output_path: str = None):
+    # WAV 변환 결과 크기 추정용 (44.1kHz 16bit 스테레오)
+    WAV_BYTES_PER_SECOND = 44100 * 2 * 2
+
+    def __init__(self, output_path: str = None, history: DownloadHistory = None,
+                 postprocessor: PostProcessStage = None, space: SpaceReservations = None,
+                 tuner=None):
         """
         초기화
 
         Args:
             output_path: 다운로드 저장 경로
+            history: 완료 기록 (지정시 완료된 다운로드를 기록하고 중복 다운로드 건너뜀)
+            postprocessor: 후처리 단계 (지정시 변환/병합을 넘기고 바로 반환 -
+                완료 콜백은 후처리가 끝난 뒤 후처리 작업자 스레드에서 호출됨)
+            space: 저장 공간 예약 장부 (여러 다운로더가 같은 디스크를 쓰면 공유)
+            tuner: 동시 작업 수 조절기 (JobConcurrencyTuner - 받은 바이트와 재시도를 보고)
         """
         self.output_path = output_path or os.path.join(os.path.expanduser('~'), 'Videos')
+        self.history = history
+        self.postprocessor = postprocessor
+        self.space = space or SpaceReservations()
+        self.tuner = tuner
+        self.stream_audio = True  # MP3/WAV는 받으면서 변환 (불가능하면 받은 뒤 변환)
         self.current_download = None
+        self.metrics: Optional[JobMetrics] = None  # 마지막 작업의 단계별 지표
+        self.profiler: Optional[ProfileSwitch] = None  # 작업 프로파일링 스위치
+        self.trace = None  # 작업 기록 (JobTrace - 호출 측이 작업별 다운로더에 지정)
         self._cancelled = False
+        self._preallocated = set()
+        self._received = {}
+
+    def for_job(self) -> 'YouTubeDownloader':
+        """같은 기록/후처리/공간 예약/조절기를 쓰는 작업별 다운로더 (동시 작업마다 취소 상태를 따로 둠)"""
+        downloader = YouTubeDownloader(self.output_path, self.history, self.postprocessor,
+                                       self.space, self.tuner)
+        downloader.stream_audio = self.stream_audio
+        downloader.profiler = self.profiler
+        return downloader
 
     def set_output_path(self, path: str):
         """저장 경로 설정"""
@@ -53,25 +221,154 @@ class YouTubeDownloader:
         """현재 다운로드 취소"""
         self._cancelled = True
 
+    def _use_postprocess_stage(self) -> bool:
+        """후처리 단계로 넘길 수 있는지 (ffmpeg가 없으면 yt-dlp 내장 후처리 사용)"""
+        return bool(self.postprocessor and self.postprocessor.available)
+
+    @staticmethod
+    def _downloaded_filepath(info: Optional[Dict[str, Any]]) -> Optional[str]:
+        """yt-dlp 결과에서 최종 파일 경로"""
+        if not info:
+            return None
+        downloads = info.get('requested_downloads') or []
+        return downloads[-1].get('filepath') if downloads else info.get('filepath')
+
+    def _record_history(self, url: str, profile: str, info: Optional[Dict[str, Any]],
+                        filepath: str = None, tracker: IntegrityTracker = None,
+                        merge: Dict[str, Any] = None):
+        """완료된 다운로드의 최종 파일 경로와 무결성 정보(해시, 크기, 누락 조각), 병합 비용을 기록"""
+        if not self.history or not info:
+            return
+        filepath = filepath or self._downloaded_filepath(info)
+        if filepath and os.path.exists(filepath):
+            self.history.record(
+                url, profile, filepath,
+                title=info.get('title', ''),
+                channel=info.get('channel') or info.get('uploader') or '',
+                integrity=tracker.record(filepath) if tracker else None,
+                merge=merge,
+            )
+
+    @staticmethod
+    def _check_integrity(tracker: IntegrityTracker, complete_callback: Optional[Callable]) -> bool:
+        """
+        받은 파일 검사 - 누락 조각이나 크기 부족이 있으면 파일을 지우고
+        INCOMPLETE_DOWNLOAD_MESSAGE로 완료 콜백 호출 (호출 측이 다시 대기열에 넣음)
+        """
+        problem = tracker.problem()
+        if problem is None:
+            return True
+        tracker.discard()
+        if complete_callback:
+            complete_callback(False, f"{INCOMPLETE_DOWNLOAD_MESSAGE}: {problem}")
+        return False
+
+    def estimate_peak_bytes(self, format_index: Optional[FormatIndex], download_type: str,
+                            quality: str) -> int:
+        """
+        작업이 디스크를 가장 많이 쓰는 순간의 예상 크기
+
+        병합은 원본들과 결과가, 오디오 변환은 원본과 모든 결과가 함께 있는 순간이 최대다.
+        포맷 색인이 없거나 크기를 알 수 없으면 0.
+        """
+        if format_index is None:
+            return 0
+        if download_type == 'video':
+            resolved = format_index.resolve(
+                self.QUALITY_OPTIONS.get(quality, self.QUALITY_OPTIONS['최고 화질']))
+            if not resolved:
+                return 0
+            format_ids, size = resolved
+            return size * 2 if '+' in format_ids else size
+
+        names = self.AUDIO_BUNDLES.get(quality) or [
+            quality if quality in self.AUDIO_FORMATS else 'MP3 (320kbps)']
+        format_infos = [self.AUDIO_FORMATS[name] for name in names]
+        resolved = format_index.resolve(self._audio_format_string(format_infos))
+        if not resolved:
+            return 0
+        source_size = resolved[1]
+        total = source_size
+        for info in format_infos:
+            if info['codec'] == 'wav':
+                total += format_index.duration * self.WAV_BYTES_PER_SECOND
+            elif info['quality']:
+                total += format_index.duration * int(info['quality']) * 1000 // 8
+            else:
+                total += source_size
+        return int(total)
+
+    def _reserve_space(self, format_index: Optional[FormatIndex], download_type: str,
+                       quality: str, complete_callback: Optional[Callable]) -> Optional[Callable]:
+        """
+        시작 전 저장 공간 예약
+
+        Returns:
+            완료시 예약을 반납하는 complete_callback (공간이 부족하면 None -
+            이때 complete_callback은 INSUFFICIENT_SPACE_MESSAGE로 이미 호출됨)
+        """
+        needed = self.estimate_peak_bytes(format_index, download_type, quality)
+        # 같은 URL의 작업이 겹쳐도 (영상+오디오, 재시도) 예약이 섞이지 않도록 작업마다 새 키
+        key = object()
+        reserved, available = self.space.try_reserve(key, self.output_path, needed)
+        if not reserved:
+            if complete_callback:
+                complete_callback(False, f"{INSUFFICIENT_SPACE_MESSAGE} (필요 {format_filesize(needed)}, "
+                                         f"사용 가능 {format_filesize(available)})")
+            return None
+
+        def done(success: bool, message: str):
+            self.space.release(key)
+            if complete_callback:
+                complete_callback(success, message)
+        return done
+
+    def _preallocate(self, d: Dict[str, Any]):
+        """전체 크기를 아는 단일 파일 다운로드는 첫 진행률에서 출력 파일을 사전 할당"""
+        path = d.get('tmpfilename')
+        if path and d.get('total_bytes') and path not in self._preallocated:
+            self._preallocated.add(path)
+            preallocate(path, d['total_bytes'])
+
+    def _report_received(self, d: Dict[str, Any]):
+        """진행률에서 새로 받은 바이트를 조절기와 작업 지표에 보고"""
+        path = d.get('tmpfilename') or d.get('filename')
+        received = d.get('downloaded_bytes') or 0
+        previous = self._received.get(path, 0)
+        self._received[path] = received
+        if self.tuner is not None:
+            self.tuner.record_bytes(received - previous)
+        if self.metrics is not None:
+            self.metrics.record_bytes(received - previous)
+
+    def _start_metrics(self, download_type: str,
+                       complete_callback: Optional[Callable]) -> Optional[Callable]:
+        """
+        작업 지표 시작
+
+        Returns:
+            완료시 지표를 마무리하는 complete_callback
+        """
+        # 묶음을 하나씩 받는 하위 다운로드는 바깥 시도의 기록에 포함
+        trace = self.trace if self.trace is not None and not self.trace.running else None
+        metrics = self.metrics = JobMetrics(download_type, trace)
+
+        def done(success: bool, message: str):
+            metrics.finish(job_status(success, message), message)
+            if complete_callback:
+                complete_callback(success, message)
+        return done
+
     def get_video_info_fast(self, url: str) -> Optional[Dict[str, Any]]:
         """
         oEmbed API를 사용한 빠른 정보 가져오기 (1초 이내)
         """
         try:
             # URL에서 video ID 추출
-            video_id = None
-            patterns = [
-                r'(?:v=|/v/|youtu\.be/|/embed/)([a-zA-Z0-9_-]{11})',
-                r'shorts/([a-zA-Z0-9_-]{11})',
-            ]
-            for pattern in patterns:
-                match = re.search(pattern, url)
-                if match:
-                    video_id = match.group(1)
-                    break
-
-            if not video_id:
+            media = parse_media(url)
+            if media is None or media.kind == MEDIA_PLAYLIST:
                 return None
+            video_id = media.id
 
             # oEmbed API 호출 (매우 빠름)
             oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
@@ -92,18 +389,29 @@ class YouTubeDownloader:
         except Exception as e:
             return None
 
-    def get_video_info(self, url: str) -> Optional[Dict[str, Any]]:
+    def get_video_info(self, url: str, full: bool = False) -> Optional[Dict[str, Any]]:
         """
         비디오 정보 가져오기 (빠른 방법 우선 시도)
 
         Args:
             url: YouTube URL
+            full: 전체 추출 - 결과의 'format_index'를 다운로드에 넘기면 다시 추출하지 않음
+                (실패하면 빠른 방법으로 대체)
 
         Returns:
             비디오 정보 딕셔너리
         """
+        if full:
+            format_index = self.get_format_index(url)
+            if format_index is not None:
+                info = self._summarize_info(format_index.info, url)
+                info['format_index'] = format_index
+                return info
+
         # 먼저 빠른 oEmbed 방식 시도
+        started = time.monotonic()
         fast_info = self.get_video_info_fast(url)
+        observe_phase(PHASE_OEMBED, time.monotonic() - started, failed=fast_info is None)
         if fast_info:
             return fast_info
 
@@ -125,46 +433,121 @@ class YouTubeDownloader:
                 if info is None:
                     return None
 
-                return {
-                    'type': 'video',
-                    'title': info.get('title', '제목 없음'),
-                    'duration': info.get('duration', 0),
-                    'thumbnail': info.get('thumbnail', ''),
-                    'channel': info.get('channel', info.get('uploader', '알 수 없음')),
-                    'view_count': info.get('view_count', 0),
-                    'upload_date': info.get('upload_date', ''),
-                    'url': url,
-                }
+                return self._summarize_info(info, url)
 
         except Exception as e:
             print(f"정보 가져오기 오류: {e}")
             return None
 
-    def _parse_formats(self, formats: List[Dict]) -> Dict[str, List[str]]:
-        """사용 가능한 포맷 파싱"""
-        video_qualities = set()
-        audio_formats = set()
+    @staticmethod
+    def _summarize_info(info: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """yt-dlp 추출 결과를 GUI용 정보 딕셔너리로 변환"""
+        return {
+            'type': 'video',
+            'title': info.get('title', '제목 없음'),
+            'duration': info.get('duration', 0),
+            'thumbnail': info.get('thumbnail') or (info.get('thumbnails') or [{}])[-1].get('url', ''),
+            'channel': info.get('channel', info.get('uploader', '알 수 없음')),
+            'view_count': info.get('view_count', 0),
+            'upload_date': info.get('upload_date', ''),
+            'url': url,
+        }
 
-        for f in formats:
-            height = f.get('height')
-            if height:
-                video_qualities.add(f"{height}p")
+    def get_playlist_entries(self, url: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        플레이리스트 항목 목록 (평면 추출 - 항목마다 추출하지 않고 URL과 제목만)
 
-            acodec = f.get('acodec')
-            if acodec and acodec != 'none':
-                audio_formats.add(f.get('ext', 'unknown'))
+        Returns:
+            [{'url': ..., 'title': ...}, ...] (플레이리스트가 아니거나 실패시 None)
+        """
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'extract_flat': 'in_playlist',
+            'socket_timeout': 10,
+        }
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            print(f"플레이리스트 정보 가져오기 오류: {e}")
+            return None
+        if not info or info.get('_type') != 'playlist':
+            return None
 
-        return {
-            'video': sorted(list(video_qualities), key=lambda x: int(x[:-1]), reverse=True),
-            'audio': list(audio_formats),
+        entries = []
+        for entry in info.get('entries') or []:
+            video_url = entry and (entry.get('url') or entry.get('webpage_url'))
+            if video_url:
+                entries.append({'url': video_url, 'title': entry.get('title')})
+        return entries
+
+    def get_format_index(self, url: str) -> Optional[FormatIndex]:
+        """
+        영상 하나를 전체 추출하여 포맷 색인 생성
+
+        결과를 download_video/download_audio의 format_index로 넘기면
+        화질 선택을 로컬에서 해석하고 추출을 다시 하지 않는다.
+
+        Returns:
+            포맷 색인 (실패시 None)
+        """
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+            'extractor_retries': 3,
         }
+        # 작업 전 추출 - 단계 시간만 기록
+        metrics = JobMetrics()
+        try:
+            with TunedYoutubeDL(ydl_opts, metrics=metrics) as ydl, metrics.phase(PHASE_EXTRACT):
+                # 네트워크 추출은 한 번 - 포맷 정렬은 복사본으로 로컬에서 처리
+                source_info = ydl.extract_info(url, download=False, process=False)
+                if not source_info or source_info.get('_type', 'video') != 'video':
+                    return None
+                info = ydl.process_ie_result(copy.deepcopy(source_info), download=False)
+        except Exception as e:
+            print(f"포맷 정보 가져오기 오류: {e}")
+            return None
+        if not info:
+            return None
+        index = FormatIndex(info, source_info)
+        return index if index else None
+
+    def _extract(self, ydl: yt_dlp.YoutubeDL, url: str, format_index: Optional[FormatIndex],
+                 download: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        다운로드 실행 - 포맷 색인이 있고 스트림 URL이 유효하면 그 추출 결과를 재사용
+
+        추출 단계는 여기서 시작해 첫 포맷 다운로드가 시작될 때 (TunedYoutubeDL.dl) 끝난다.
+        """
+        with self.metrics.phase(PHASE_EXTRACT):
+            if format_index is None or format_index.is_expired():
+                return ydl.extract_info(url, download=download)
+            return ydl.process_ie_result(copy.deepcopy(format_index.info), download=download)
+
+    @staticmethod
+    def _resolve_format(format_string: str, format_index: Optional[FormatIndex]) -> str:
+        """
+        포맷 색인으로 선택 문자열을 실제 포맷 ID로 바꿈 (해석할 수 없으면 그대로)
+
+        같은 화질의 합본 포맷이나 한 컨테이너에 그대로 담기는 코덱 조합을 우선한다.
+        """
+        if format_index is None or format_index.is_expired():
+            return format_string
+        resolved = format_index.resolve_merge_free(format_string)
+        return resolved[0] if resolved else format_string
 
+    @_profiled
     def download_video(
         self,
         url: str,
         quality: str = '최고 화질',
         progress_callback: Callable[[Dict], None] = None,
         complete_callback: Callable[[bool, str], None] = None,
+        format_index: FormatIndex = None,
     ) -> bool:
         """
         비디오 다운로드
@@ -172,29 +555,41 @@ class YouTubeDownloader:
         Args:
             url: YouTube URL
             quality: 화질 옵션 키
-            progress_callback: 진행률 콜백 (percent, speed, eta, filename)
+            progress_callback: 진행률 콜백 (downloaded, total 바이트, speed 초당 바이트, eta 초)
             complete_callback: 완료 콜백 (success, message)
+            format_index: get_format_index() 결과 (지정시 다시 추출하지 않음)
 
         Returns:
             성공 여부
         """
         self._cancelled = False
-        format_string = self.QUALITY_OPTIONS.get(quality, self.QUALITY_OPTIONS['최고 화질'])
+        self._preallocated = set()
+        self._received = {}
+        complete_callback = self._start_metrics('video', complete_callback)
+        complete_callback = self._reserve_space(format_index, 'video', quality, complete_callback)
+        if complete_callback is None:
+            return False
+        format_string = self._resolve_format(
+            self.QUALITY_OPTIONS.get(quality, self.QUALITY_OPTIONS['최고 화질']), format_index)
+        tracker = IntegrityTracker()
 
         def progress_hook(d):
             if self._cancelled:
                 raise Exception("다운로드 취소됨")
 
+            if d['status'] == 'downloading':
+                self._preallocate(d)
+                self._report_received(d)
+            tracker.hook(d)
+
             if progress_callback:
                 if d['status'] == 'downloading':
                     progress_callback({
                         'status': 'downloading',
-                        'percent': d.get('_percent_str', '0%').strip(),
-                        'speed': d.get('_speed_str', 'N/A').strip(),
-                        'eta': d.get('_eta_str', 'N/A').strip(),
-                        'filename': os.path.basename(d.get('filename', '')),
-                        'downloaded': d.get('downloaded_bytes', 0),
-                        'total': d.get('total_bytes', d.get('total_bytes_estimate', 0)),
+                        'downloaded': d.get('downloaded_bytes') or 0,
+                        'total': d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+                        'speed': d.get('speed') or 0.0,
+                        'eta': d.get('eta') or 0,
                     })
                 elif d['status'] == 'finished':
                     progress_callback({
@@ -211,14 +606,38 @@ class YouTubeDownloader:
             'noplaylist': True,  # 단일 영상만 다운로드
             'retries': 10,
             'fragment_retries': 10,
-            'skip_unavailable_fragments': True,  # 없는 fragment 건너뛰기
-            'ignoreerrors': True,
+            'retry_sleep_functions': retry_sleep_functions(),  # 재시도 사이 지수 백오프
+            'skip_unavailable_fragments': True,  # 없는 fragment 건너뛰기 (누락 수는 tracker가 기록)
             'extractor_retries': 3,
+            'logger': tracker,
         }
 
+        staged = self._use_postprocess_stage()
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+            with (StagedYoutubeDL if staged else TunedYoutubeDL)(ydl_opts, job_tuner=self.tuner,
+                                                                 metrics=self.metrics) as ydl:
+                info = self._extract(ydl, url, format_index)
+
+            # 예외 대신 None이 반환되는 경우 - 실패 원인 분류를 위해 마지막 오류 메시지 사용
+            if info is None:
+                raise Exception(tracker.last_error or "다운로드 실패")
+            if not self._check_integrity(tracker, complete_callback):
+                return False
+
+            profile = history_profile('video', quality)
+            if staged and ydl.deferred_merges:
+                files, target, streams = ydl.deferred_merges[0]
+                merge_stats = {}
+                self._hand_off(
+                    lambda done: self.postprocessor.merge(files, target, streams, done, merge_stats),
+                    url, [(profile, target)], info, progress_callback, complete_callback,
+                    tracker, merge_stats,
+                )
+                return True
+
+            # 합본 포맷을 받아 병합이 없었음 (yt-dlp 내장 병합은 측정하지 않음)
+            merge = {'seconds': 0.0, 'bytes': 0} if not info.get('requested_formats') else None
+            self._record_history(url, profile, info, tracker=tracker, merge=merge)
 
             if complete_callback:
                 complete_callback(True, "다운로드 완료")
@@ -230,12 +649,14 @@ class YouTubeDownloader:
                 complete_callback(False, error_msg)
             return False
 
+    @_profiled
     def download_audio(
         self,
         url: str,
         audio_format: str = 'MP3 (320kbps)',
         progress_callback: Callable[[Dict], None] = None,
         complete_callback: Callable[[bool, str], None] = None,
+        format_index: FormatIndex = None,
     ) -> bool:
         """
         오디오만 다운로드
@@ -245,27 +666,48 @@ class YouTubeDownloader:
             audio_format: 오디오 포맷 옵션 키
             progress_callback: 진행률 콜백
             complete_callback: 완료 콜백
+            format_index: get_format_index() 결과 (지정시 다시 추출하지 않음)
 
         Returns:
             성공 여부
         """
         self._cancelled = False
-        format_info = self.AUDIO_FORMATS.get(audio_format, self.AUDIO_FORMATS['MP3 (320kbps)'])
+        bundle = self.AUDIO_BUNDLES.get(audio_format)
+        if bundle and not self._use_postprocess_stage():
+            return self._download_audio_each(url, audio_format, bundle, progress_callback,
+                                             complete_callback, format_index)
+        if bundle:
+            format_infos = [(name, self.AUDIO_FORMATS[name]) for name in bundle]
+        else:
+            format_infos = [(audio_format, self.AUDIO_FORMATS.get(
+                audio_format, self.AUDIO_FORMATS['MP3 (320kbps)']))]
+        format_info = format_infos[0][1]
+        self._preallocated = set()
+        self._received = {}
+        complete_callback = self._start_metrics('audio', complete_callback)
+        complete_callback = self._reserve_space(format_index, 'audio', audio_format,
+                                                complete_callback)
+        if complete_callback is None:
+            return False
+        tracker = IntegrityTracker()
 
         def progress_hook(d):
             if self._cancelled:
                 raise Exception("다운로드 취소됨")
 
+            if d['status'] == 'downloading':
+                self._preallocate(d)
+                self._report_received(d)
+            tracker.hook(d)
+
             if progress_callback:
                 if d['status'] == 'downloading':
                     progress_callback({
                         'status': 'downloading',
-                        'percent': d.get('_percent_str', '0%').strip(),
-                        'speed': d.get('_speed_str', 'N/A').strip(),
-                        'eta': d.get('_eta_str', 'N/A').strip(),
-                        'filename': os.path.basename(d.get('filename', '')),
-                        'downloaded': d.get('downloaded_bytes', 0),
-                        'total': d.get('total_bytes', d.get('total_bytes_estimate', 0)),
+                        'downloaded': d.get('downloaded_bytes') or 0,
+                        'total': d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+                        'speed': d.get('speed') or 0.0,
+                        'eta': d.get('eta') or 0,
                     })
                 elif d['status'] == 'finished':
                     progress_callback({
@@ -274,16 +716,20 @@ class YouTubeDownloader:
                     })
 
         ydl_opts = {
-            'format': format_info['format'],
+            'format': self._resolve_format(
+                self._audio_format_string([info for _, info in format_infos]), format_index),
             'outtmpl': os.path.join(self.output_path, '%(title)s.%(ext)s'),
             'progress_hooks': [progress_hook],
             'quiet': True,
             'no_warnings': True,
             'noplaylist': True,  # 단일 영상만 다운로드
+            'retry_sleep_functions': retry_sleep_functions(),  # 재시도 사이 지수 백오프
+            'logger': tracker,
         }
 
-        # 후처리기 설정 (MP3, WAV 변환)
-        if format_info['postprocessor']:
+        # 후처리기 설정 (MP3, WAV 변환) - 후처리 단계가 있으면 다운로드 후 넘김
+        staged = self._use_postprocess_stage()
+        if format_info['postprocessor'] and not staged:
             ydl_opts['postprocessors'] = [{
                 'key': 'FFmpegExtractAudio',
                 'preferredcodec': format_info['postprocessor'],
@@ -292,8 +738,49 @@ class YouTubeDownloader:
                 ydl_opts['postprocessors'][0]['preferredquality'] = format_info['quality']
 
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+            with TunedYoutubeDL(ydl_opts, job_tuner=self.tuner, metrics=self.metrics) as ydl:
+                if staged and self.stream_audio and any(info['postprocessor'] for _, info in format_infos):
+                    # MP3/WAV: 포맷만 고른 뒤 받으면서 변환, 흘려받을 수 없으면 그 포맷을 파일로 받음
+                    info = self._extract(ydl, url, format_index, download=False)
+                    if info is None:
+                        raise Exception(tracker.last_error or "다운로드 실패")
+                    streamed = self._stream_audio(ydl, url, info, audio_format, format_infos,
+                                                  progress_callback, complete_callback, tracker)
+                    if streamed is not None:
+                        return streamed
+                    ydl.process_info(info)
+                else:
+                    info = self._extract(ydl, url, format_index)
+            if not self._check_integrity(tracker, complete_callback):
+                return False
+
+            profile = history_profile('audio', audio_format)
+            source = self._downloaded_filepath(info)
+            if staged and source:
+                outputs = self._audio_outputs(source, format_infos)
+                records = [(history_profile('audio', name), target)
+                           for (name, _), (target, _, _) in zip(format_infos, outputs)]
+                if bundle:
+                    records.append((profile, outputs[0][0]))
+
+                # 원본이 이미 목표 포맷이면 (m4a → M4A) 후처리 없이 완료
+                if all(target == source for target, _, _ in outputs):
+                    for record_profile, target in records:
+                        self._record_history(url, record_profile, info, target, tracker)
+                    if complete_callback:
+                        complete_callback(True, "다운로드 완료")
+                    return True
+
+                convert_stats = {}
+                self._hand_off(
+                    lambda done: self.postprocessor.convert_audio_outputs(
+                        source, outputs, done, info.get('acodec'), info.get('abr'), convert_stats),
+                    url, records, info, progress_callback, complete_callback, tracker,
+                    convert_stats, PHASE_TRANSCODE,
+                )
+                return True
+
+            self._record_history(url, profile, info, tracker=tracker)
 
             if complete_callback:
                 complete_callback(True, "다운로드 완료")
@@ -305,6 +792,194 @@ class YouTubeDownloader:
                 complete_callback(False, error_msg)
             return False
 
+    def _stream_audio(self, ydl: yt_dlp.YoutubeDL, url: str, info: Dict[str, Any],
+                      audio_format: str, format_infos: List[tuple],
+                      progress_callback: Optional[Callable], complete_callback: Optional[Callable],
+                      tracker: IntegrityTracker) -> Optional[bool]:
+        """
+        선택된 오디오 포맷을 받으면서 ffmpeg로 바로 인코딩
+
+        원본은 디스크에 쓰지 않고 결과 파일만 쓴다.
+        직접 받을 수 없는 포맷(조각 스트림 등)이거나 ffmpeg가 흘려받은 입력을 해석하지 못하면
+        아무것도 기록하지 않고 None을 반환한다 (호출 측이 파일로 받은 뒤 변환).
+
+        Returns:
+            성공 여부 (완료 콜백 호출됨) - 흘려받을 수 없으면 None
+        """
+        if (info.get('protocol') not in STREAMABLE_PROTOCOLS or not info.get('url')
+                or info.get('requested_formats') or info.get('fragments')):
+            return None
+
+        source = ydl.prepare_filename(info)
+        outputs = self._audio_outputs(source, format_infos)
+        received = [0, info.get('filesize') or 0]
+        chunks = self._stream_chunks(ydl, info, received, progress_callback)
+        stream_stats = {}
+        try:
+            with self.metrics.phase(PHASE_TRANSFER):
+                success, message = self.postprocessor.stream_audio_outputs(
+                    chunks, outputs, info.get('acodec'), info.get('abr'), stream_stats)
+        finally:
+            chunks.close()
+        if not success:
+            return None
+
+        tracker.streamed(received[1], received[0])
+        tracker.add_digests(stream_stats.get('digests', {}))
+        if tracker.problem():
+            for target, _, _ in outputs:
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+            return self._check_integrity(tracker, complete_callback)
+
+        records = [(history_profile('audio', name), target)
+                   for (name, _), (target, _, _) in zip(format_infos, outputs)]
+        if audio_format in self.AUDIO_BUNDLES:
+            records.append((history_profile('audio', audio_format), outputs[0][0]))
+        for profile, target in records:
+            self._record_history(url, profile, info, target, tracker)
+        if complete_callback:
+            complete_callback(True, message)
+        return True
+
+    def _stream_chunks(self, ydl: yt_dlp.YoutubeDL, info: Dict[str, Any], received: List[int],
+                       progress_callback: Optional[Callable]):
+        """
+        포맷 URL 내용을 조각으로 읽기 (진행률/조절기 보고, 취소 확인 포함)
+
+        yt-dlp와 같이 http_chunk_size가 있으면 Range 요청을 나눠 보낸다 (YouTube 속도 제한 회피).
+        received는 [받은 크기, 전체 크기]로 갱신된다.
+        """
+        from yt_dlp.networking import Request
+
+        headers = info.get('http_headers') or {}
+        chunk_size = (info.get('downloader_options') or {}).get('http_chunk_size')
+        filename = os.path.basename(ydl.prepare_filename(info))
+        started = time.monotonic()
+        while True:
+            request_headers = dict(headers)
+            if chunk_size:
+                request_headers['Range'] = f"bytes={received[0]}-{received[0] + chunk_size - 1}"
+            response = ydl.urlopen(Request(info['url'], headers=request_headers))
+            try:
+                if not received[1]:
+                    length = response.headers.get('Content-Range', '').rpartition('/')[2]
+                    if not length.isdigit():
+                        length = response.headers.get('Content-Length', '')
+                    received[1] = int(length) if length.isdigit() else 0
+                got = 0
+                while True:
+                    if self._cancelled:
+                        raise Exception("다운로드 취소됨")
+                    data = response.read(STREAM_READ_SIZE)
+                    if not data:
+                        break
+                    got += len(data)
+                    received[0] += len(data)
+                    yield data
+                    self._report_stream_progress(filename, received, started, progress_callback)
+            finally:
+                response.close()
+            if (not chunk_size or got < chunk_size
+                    or (received[1] and received[0] >= received[1])):
+                return
+
+    def _report_stream_progress(self, filename: str, received: List[int], started: float,
+                                progress_callback: Optional[Callable]):
+        """받으면서 변환할 때의 진행률 (yt-dlp 진행률 훅과 같은 형식)"""
+        done, total = received
+        self._report_received({'filename': filename, 'downloaded_bytes': done})
+        if not progress_callback:
+            return
+        elapsed = max(time.monotonic() - started, 1e-6)
+        speed = done / elapsed
+        progress_callback({
+            'status': 'downloading',
+            'downloaded': done,
+            'total': total,
+            'speed': speed,
+            'eta': int((total - done) / speed) if total and speed else 0,
+        })
+
+    def _audio_format_string(self, format_infos: List[Dict[str, Any]]) -> str:
+        """받을 원본의 선택 문자열 (M4A 출력이 있으면 복사로 끝낼 수 있도록 m4a 원본 우선)"""
+        if any(info['codec'] == 'm4a' for info in format_infos):
+            return self.AUDIO_FORMATS['M4A (최고 품질)']['format']
+        return format_infos[0]['format']
+
+    @staticmethod
+    def _audio_outputs(source: str, format_infos: List[tuple]) -> List[tuple]:
+        """
+        원본 경로로 포맷별 (결과 경로, 코덱, 비트레이트) 목록 생성
+
+        같은 코덱이 여러 번 나오면 파일 이름에 비트레이트를 붙여 구분한다.
+        """
+        root = os.path.splitext(source)[0]
+        codecs = [info['codec'] for _, info in format_infos]
+        outputs = []
+        for _, info in format_infos:
+            codec, quality = info['codec'], info['quality']
+            suffix = f" ({quality}kbps)" if quality and codecs.count(codec) > 1 else ''
+            outputs.append((f"{root}{suffix}.{codec}", codec, quality))
+        return outputs
+
+    def _download_audio_each(self, url: str, audio_format: str, bundle: List[str],
+                             progress_callback: Optional[Callable],
+                             complete_callback: Optional[Callable],
+                             format_index: Optional[FormatIndex]) -> bool:
+        """후처리 단계를 쓸 수 없을 때 묶음의 포맷을 하나씩 받음"""
+        results = []
+        for name in bundle:
+            self.download_audio(url, name, progress_callback,
+                                lambda success, message: results.append((success, message)),
+                                format_index)
+            if not results[-1][0]:
+                if complete_callback:
+                    complete_callback(False, results[-1][1])
+                return False
+
+        if self.history:
+            previous = self.history.lookup(url, history_profile('audio', bundle[0]))
+            if previous:
+                self.history.record(url, history_profile('audio', audio_format),
+                                    previous['output_path'])
+        if complete_callback:
+            complete_callback(True, "다운로드 완료")
+        return True
+
+    def _hand_off(self, submit: Callable, url: str, records: List[tuple], info: Dict[str, Any],
+                  progress_callback: Optional[Callable], complete_callback: Optional[Callable],
+                  tracker: IntegrityTracker = None, stats: Dict[str, Any] = None,
+                  phase: str = PHASE_MERGE):
+        """
+        다운로드된 파일을 후처리 단계로 넘김
+
+        progress_callback으로 'postprocessing' 상태를 알리면 다운로드 슬롯은 비워진 것으로 보고,
+        후처리가 끝나면 complete_callback이 후처리 작업자 스레드에서 호출된다.
+        records의 (프로필, 결과 경로)는 후처리가 성공하면 기록된다.
+        stats는 후처리 단계가 채운 비용으로 phase(병합/변환) 단계 시간이 되며,
+        병합이면 기록에도 함께 남긴다.
+        """
+        if progress_callback:
+            progress_callback({'status': 'postprocessing', 'filename': info.get('title', '')})
+        metrics = self.metrics
+
+        def done(success: bool, message: str, target: str):
+            if metrics is not None and stats and 'seconds' in stats:
+                metrics.add(phase, stats['seconds'])
+            if tracker is not None and stats and 'digests' in stats:
+                tracker.add_digests(stats['digests'])
+            if success:
+                merge = stats if phase == PHASE_MERGE else None
+                for profile, path in records:
+                    self._record_history(url, profile, info, path, tracker, merge)
+            if complete_callback:
+                complete_callback(success, message)
+
+        submit(done)
+
     def download_playlist(
         self,
         url: str,
@@ -329,15 +1004,19 @@ class YouTubeDownloader:
         """
         self._cancelled = False
 
-        # 플레이리스트 정보 가져오기
-        info = self.get_video_info(url)
-        if not info or info['type'] != 'playlist':
+        # 플레이리스트 항목 (평면 추출)
+        entries = self.get_playlist_entries(url)
+        if not entries:
             if complete_callback:
                 complete_callback(False, "플레이리스트를 찾을 수 없습니다")
             return False
 
-        entries = info['entries']
         total = len(entries)
+        skipped = 0
+        if download_type == 'video':
+            profile = history_profile('video', quality)
+        else:
+            profile = history_profile('audio', audio_format)
 
         for idx, entry in enumerate(entries, 1):
             if self._cancelled:
@@ -345,11 +1024,13 @@ class YouTubeDownloader:
                     complete_callback(False, "다운로드 취소됨")
                 return False
 
-            video_url = entry.get('url') or entry.get('webpage_url')
-            if not video_url:
-                continue
+            video_url = entry['url']
+            title = entry['title'] or f'항목 {idx}'
 
-            title = entry.get('title', f'항목 {idx}')
+            # 이미 받은 영상은 건너뜀
+            if self.history and self.history.lookup(video_url, profile):
+                skipped += 1
+                continue
 
             if item_callback:
                 item_callback(idx, total, title)
@@ -360,49 +1041,8 @@ class YouTubeDownloader:
                 self.download_audio(video_url, audio_format, progress_callback)
 
         if complete_callback:
-            complete_callback(True, f"플레이리스트 다운로드 완료 ({total}개)")
+            message = f"플레이리스트 다운로드 완료 ({total}개)"
+            if skipped:
+                message += f" - 이미 받은 {skipped}개 건너뜀"
+            complete_callback(True, message)
         return True
-
-
-def format_duration(seconds: int) -> str:
-    """초를 시:분:초 형식으로 변환"""
-    if not seconds:
-        return "00:00"
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
-
-    if hours > 0:
-        return f"{hours}:{minutes:02d}:{secs:02d}"
-    return f"{minutes:02d}:{secs:02d}"
-
-
-def format_filesize(bytes_size: int) -> str:
-    """바이트를 읽기 쉬운 크기로 변환"""
-    if not bytes_size:
-        return "0 B"
-
-    units = ['B', 'KB', 'MB', 'GB', 'TB']
-    unit_index = 0
-    size = float(bytes_size)
-
-    while size >= 1024 and unit_index < len(units) - 1:
-        size /= 1024
-        unit_index += 1
-
-    return f"{size:.1f} {units[unit_index]}"
-
-
-def is_valid_youtube_url(url: str) -> bool:
-    """YouTube URL 유효성 검사"""
-    youtube_patterns = [
-        r'^(https?://)?(www\.)?youtube\.com/watch\?v=[\w-]+',
-        r'^(https?://)?(www\.)?youtube\.com/playlist\?list=[\w-]+',
-        r'^(https?://)?(www\.)?youtu\.be/[\w-]+',
-        r'^(https?://)?(www\.)?youtube\.com/shorts/[\w-]+',
-    ]
-
-    for pattern in youtube_patterns:
-        if re.match(pattern, url):
-            return True
-    return False
@@ -0,0 +1,216 @@
+"""
+포맷 색인 모듈
+영상 하나를 한 번 추출한 결과로 포맷 목록을 정리하고, 화질/오디오 포맷 선택을 로컬에서 해석
+"""
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# 스트림 URL에 만료 시각이 없을 때 추출 후 유효하다고 볼 시간 (초)
+STREAM_URL_TTL = 5 * 3600
+# 만료 직전 추출 결과는 다운로드 도중 끊길 수 있으므로 이 여유를 두고 버림 (초)
+EXPIRE_MARGIN = 10 * 60
+
+# 선택 문자열 토큰: best / bestvideo / bestaudio + [key<=값] / [key=값] 필터
+_SELECTOR_PATTERN = re.compile(r'^(best|bestvideo|bestaudio)((?:\[[^\]]+\])*)$')
+_FILTER_PATTERN = re.compile(r'\[(\w+)\s*(<=|>=|<|>|=)\s*([^\]]+)\]')
+
+# 컨테이너별로 재인코딩 없이 담을 수 있는 (영상 코덱, 오디오 코덱) 접두어
+CONTAINER_CODECS = {
+    'mp4': (('avc1', 'av01', 'hev1', 'hvc1'), ('mp4a',)),
+    'webm': (('vp9', 'vp09', 'vp8', 'av01'), ('opus', 'vorbis')),
+}
+
+
+def _has(codec: Optional[str]) -> bool:
+    return bool(codec) and codec != 'none'
+
+
+class FormatIndex:
+    """
+    영상 하나의 포맷 색인
+
+    추출 결과(info)의 포맷을 영상 전용/오디오 전용/합본으로 나눠 보관한다.
+    포맷 순서는 yt-dlp가 정렬한 순서(뒤쪽일수록 좋은 포맷)를 그대로 쓰므로
+    QUALITY_OPTIONS/AUDIO_FORMATS의 선택 문자열을 yt-dlp와 같은 결과로 해석할 수 있다.
+    source_info(포맷 선택 전 추출 결과)는 다운로드 단계에 넘겨 같은 영상을 다시 추출하지 않도록 한다.
+    """
+
+    def __init__(self, info: Dict[str, Any], source_info: Dict[str, Any] = None):
+        """
+        초기화
+
+        Args:
+            info: 포맷이 정렬된 추출 결과
+            source_info: 포맷 선택 전 추출 결과 (기본: info)
+        """
+        self.info = source_info if source_info is not None else info
+        self.extracted_at = time.time()
+        self.expires_at = self.extracted_at + STREAM_URL_TTL
+        self.video_id = info.get('id')
+        self.duration = info.get('duration') or 0
+        self.video: List[Dict[str, Any]] = []
+        self.audio: List[Dict[str, Any]] = []
+        self.muxed: List[Dict[str, Any]] = []
+
+        for f in info.get('formats') or []:
+            if not f.get('format_id'):
+                continue
+            entry = {
+                'format_id': f['format_id'],
+                'ext': f.get('ext'),
+                'height': f.get('height'),
+                'fps': f.get('fps'),
+                'vcodec': f.get('vcodec'),
+                'acodec': f.get('acodec'),
+                'abr': f.get('abr'),
+                'size': self._format_size(f),
+            }
+            expire = self._url_expire(f.get('url'))
+            if expire and expire < self.expires_at:
+                self.expires_at = expire
+            has_video, has_audio = _has(f.get('vcodec')), _has(f.get('acodec'))
+            if has_video and has_audio:
+                self.muxed.append(entry)
+            elif has_video:
+                self.video.append(entry)
+            elif has_audio:
+                self.audio.append(entry)
+
+    def __bool__(self) -> bool:
+        return bool(self.video or self.audio or self.muxed)
+
+    @staticmethod
+    def _url_expire(url: Optional[str]) -> Optional[float]:
+        """스트림 URL의 만료 시각 (YouTube: expire 쿼리 또는 /expire/ 경로)"""
+        if not url or 'expire' not in url:
+            return None
+        parsed = urlparse(url)
+        value = parse_qs(parsed.query).get('expire', [None])[0]
+        if value is None:
+            match = re.search(r'/expire/(\d+)', parsed.path)
+            value = match.group(1) if match else None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def is_expired(self, margin: float = EXPIRE_MARGIN) -> bool:
+        """스트림 URL이 만료되었거나 margin 안에 만료되는지 (그러면 다시 추출해야 함)"""
+        return time.time() + margin >= self.expires_at
+
+    def _format_size(self, f: Dict[str, Any]) -> int:
+        """포맷 크기 (정확한 값 → 근사값 → 비트레이트 × 길이 순)"""
+        size = f.get('filesize') or f.get('filesize_approx')
+        if not size and f.get('tbr') and self.duration:
+            size = f['tbr'] * 1000 / 8 * self.duration
+        return int(size or 0)
+
+    def _best(self, candidates: List[Dict[str, Any]], filters: str) -> Optional[Dict[str, Any]]:
+        """필터를 만족하는 가장 좋은 (가장 뒤쪽) 포맷"""
+        conditions = _FILTER_PATTERN.findall(filters)
+        for entry in reversed(candidates):
+            if all(self._matches(entry, key, op, value) for key, op, value in conditions):
+                return entry
+        return None
+
+    @staticmethod
+    def _matches(entry: Dict[str, Any], key: str, op: str, value: str) -> bool:
+        actual = entry.get(key)
+        if op == '=':
+            return str(actual) == value
+        if actual is None:
+            return False
+        try:
+            number = float(value)
+        except ValueError:
+            return False
+        return {'<=': actual <= number, '>=': actual >= number,
+                '<': actual < number, '>': actual > number}[op]
+
+    def resolve(self, format_string: str) -> Optional[Tuple[str, int]]:
+        """
+        선택 문자열을 실제 포맷 ID로 해석
+
+        Args:
+            format_string: 'bestvideo[height<=1080]+bestaudio/best' 형식
+                (best/bestvideo/bestaudio, [key<=값]/[key=값] 필터, '+', '/'만 지원)
+
+        Returns:
+            (포맷 ID 문자열 예: '137+140', 예상 크기) - 해석할 수 없으면 None
+        """
+        for alternative in format_string.split('/'):
+            chosen = []
+            for part in alternative.split('+'):
+                match = _SELECTOR_PATTERN.match(part.strip())
+                if not match:
+                    return None
+                kind, filters = match.groups()
+                pool = {'best': self.muxed, 'bestvideo': self.video, 'bestaudio': self.audio}[kind]
+                entry = self._best(pool, filters)
+                if entry is None:
+                    break
+                chosen.append(entry)
+            else:
+                return '+'.join(e['format_id'] for e in chosen), sum(e['size'] for e in chosen)
+        return None
+
+    def resolve_merge_free(self, format_string: str,
+                           container: str = None) -> Optional[Tuple[str, int]]:
+        """
+        병합 비용을 줄이는 쪽으로 선택 문자열 해석
+
+        resolve() 결과가 영상+오디오 조합이면
+        1. 같은 해상도/프레임 이상인 합본 포맷이 있으면 그것 (병합 없음)
+        2. 조합이 container(없으면 mp4/webm 중 하나)에 그대로 담기지 않으면
+           같은 해상도/프레임에서 담기는 조합 (스트림 복사 remux만 필요)
+        을 고르고, 해당하는 것이 없으면 resolve() 결과를 그대로 반환한다.
+        """
+        resolved = self.resolve(format_string)
+        if resolved is None or '+' not in resolved[0]:
+            return resolved
+        video_id, audio_id = resolved[0].split('+', 1)
+        video = next((e for e in self.video if e['format_id'] == video_id), None)
+        audio = next((e for e in self.audio if e['format_id'] == audio_id), None)
+        if video is None or audio is None or not video['height']:
+            return resolved
+
+        def same_quality(entry):
+            return (entry['height'] or 0) >= video['height'] and (entry['fps'] or 0) >= (video['fps'] or 0)
+
+        for entry in reversed(self.muxed):
+            if same_quality(entry):
+                return entry['format_id'], entry['size']
+
+        containers = [container] if container else list(CONTAINER_CODECS)
+        for name in containers:
+            vcodecs, acodecs = CONTAINER_CODECS.get(name, ((), ()))
+            if str(video['vcodec']).startswith(vcodecs) and str(audio['acodec']).startswith(acodecs):
+                return resolved
+        for name in containers:
+            vcodecs, acodecs = CONTAINER_CODECS.get(name, ((), ()))
+            pair_video = next((e for e in reversed(self.video) if same_quality(e)
+                               and str(e['vcodec']).startswith(vcodecs)), None)
+            pair_audio = next((e for e in reversed(self.audio)
+                               if str(e['acodec']).startswith(acodecs)), None)
+            if pair_video and pair_audio:
+                return (f"{pair_video['format_id']}+{pair_audio['format_id']}",
+                        pair_video['size'] + pair_audio['size'])
+        return resolved
+
+    def resolutions(self) -> List[Tuple[int, int]]:
+        """
+        받을 수 있는 해상도와 예상 크기 (높은 해상도부터)
+
+        해상도별로 가장 좋은 영상에 가장 좋은 오디오를 더한 크기를 쓴다.
+        """
+        audio_size = self.audio[-1]['size'] if self.audio else 0
+        sizes: Dict[int, int] = {}
+        for entry in self.muxed:
+            if entry['height']:
+                sizes[entry['height']] = entry['size']
+        for entry in self.video:
+            if entry['height']:
+                sizes[entry['height']] = entry['size'] + audio_size
+        return sorted(sizes.items(), reverse=True)
@@ -0,0 +1,176 @@
+"""
+조각 동시 다운로드 조절 모듈
+DASH/HLS 조각 동시 요청 수를 측정한 처리량에 따라 늘리고 줄이며, 전체 연결 수는 작업 간에 공유
+"""
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# 모든 다운로드 작업이 함께 쓰는 최대 연결 수
+GLOBAL_CONNECTION_LIMIT = 16
+
+# 조각 동시 요청 수 - 처음에는 적게 시작 (한 작업이 전체 예산을 차지하지 않도록 상한은 예산의 절반)
+INITIAL_FRAGMENT_CONCURRENCY = 2
+MAX_FRAGMENT_CONCURRENCY = GLOBAL_CONNECTION_LIMIT // 2
+
+# 처리량이 이 비율 이상 좋아져야 한 단계 더 올림 (나빠지면 한 단계 내림)
+RAMP_GAIN = 0.1
+# 이보다 작은 다운로드는 측정값이 불안정하므로 조절에 쓰지 않음
+MIN_SAMPLE_BYTES = 4 * 1024 * 1024
+
+# 서버가 요청을 제한할 때 yt-dlp가 남기는 메시지
+# (403은 YouTube에서 대개 만료/거부된 주소라 제한으로 보지 않음 - 재시도 분류기가 처리)
+THROTTLE_MARKERS = ('HTTP Error 429', 'HTTP Error 503', 'Too Many Requests')
+
+
+class ConnectionBudget:
+    """
+    작업 간 공유 연결 예산
+
+    acquire()는 남은 예산과 작업별 몫(limit // 연결을 쓰는 작업 수) 안에서
+    요청한 만큼 (최소 1개) 내주고, 남은 것이 없으면 다른 작업이 반납할 때까지 기다린다.
+    한 작업이 예산을 모두 가져가 다른 작업이 멈추지 않도록 몫을 넘겨 주지 않는다.
+    """
+
+    def __init__(self, limit: int = GLOBAL_CONNECTION_LIMIT):
+        self.limit = limit
+        self.in_use = 0
+        self.holders = 0  # 연결을 받아 쓰는 중인 작업 수
+        self._condition = threading.Condition()
+
+    def share(self) -> int:
+        """지금 새 작업 하나가 받을 수 있는 최대 연결 수"""
+        return max(1, self.limit // (self.holders + 1))
+
+    def acquire(self, wanted: int) -> int:
+        """연결 할당 (실제로 받은 수 반환)"""
+        with self._condition:
+            while self.in_use >= self.limit:
+                self._condition.wait()
+            granted = max(1, min(wanted, self.share(), self.limit - self.in_use))
+            self.in_use += granted
+            self.holders += 1
+            return granted
+
+    def release(self, count: int):
+        """연결 반납"""
+        with self._condition:
+            self.in_use = max(0, self.in_use - count)
+            self.holders = max(0, self.holders - 1)
+            self._condition.notify_all()
+
+
+class _HostState:
+    __slots__ = ('level', 'throughput')
+
+    def __init__(self, level: int):
+        self.level = level
+        self.throughput: Optional[float] = None
+
+
+class FragmentTuner:
+    """
+    호스트별 조각 동시 요청 수 조절
+
+    조각 다운로드가 끝날 때마다 (동시 요청 수, 받은 크기, 걸린 시간, 제한 여부)를 보고받아
+    처리량이 계속 좋아지면 한 단계씩 올리고, 나빠지면 한 단계 내리고,
+    서버가 요청을 제한하면 절반으로 줄인다.
+    """
+
+    def __init__(self, initial: int = INITIAL_FRAGMENT_CONCURRENCY,
+                 maximum: int = MAX_FRAGMENT_CONCURRENCY):
+        self.initial = initial
+        self.maximum = maximum
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, _HostState] = {}
+
+    @staticmethod
+    def host_of(info: Dict) -> str:
+        """포맷 정보에서 조절 단위 호스트"""
+        url = info.get('fragment_base_url') or info.get('url') or ''
+        return urlparse(url).netloc
+
+    def level(self, host: str) -> int:
+        """다음 다운로드에 쓸 동시 요청 수"""
+        with self._lock:
+            state = self._hosts.get(host)
+            return state.level if state else self.initial
+
+    def report(self, host: str, level: int, size: int, seconds: float, throttled: bool = False,
+               granted: int = None):
+        """
+        조각 다운로드 결과 보고
+
+        Args:
+            host: 호스트
+            level: 이번 다운로드에 조절기가 정한 동시 요청 수
+            size: 받은 크기 (바이트)
+            seconds: 걸린 시간
+            throttled: 서버가 요청을 제한했는지 (429/503 등)
+            granted: 예산에서 실제로 받은 연결 수 (level보다 적으면 다른 작업과 경합한 것이라
+                     처리량을 level의 결과로 보지 않음)
+        """
+        with self._lock:
+            state = self._hosts.setdefault(host, _HostState(self.initial))
+            if throttled:
+                state.level = max(1, level // 2)
+                state.throughput = None
+                return
+            if size < MIN_SAMPLE_BYTES or seconds <= 0:
+                return
+            if granted is not None and granted < level:
+                return
+
+            throughput = size / seconds
+            if state.throughput is None or throughput > state.throughput * (1 + RAMP_GAIN):
+                state.level = min(level + 1, self.maximum)
+            elif throughput < state.throughput * (1 - RAMP_GAIN):
+                state.level = max(1, level - 1)
+            else:
+                state.level = level
+            state.throughput = throughput
+
+
+# 프로세스 안의 모든 다운로드가 공유하는 기본 예산과 조절기
+DEFAULT_BUDGET = ConnectionBudget()
+DEFAULT_TUNER = FragmentTuner()
+
+
+class FragmentSession:
+    """
+    포맷 다운로드 하나의 연결 할당과 결과 보고
+
+    with 블록에 들어갈 때 조각 다운로드면 조절기가 정한 수만큼, 아니면 1개를 예산에서 받고,
+    끝나면 반납하며 처리량을 보고한다.
+    """
+
+    def __init__(self, info: Dict, tuner: FragmentTuner, budget: ConnectionBudget):
+        self.tuner = tuner
+        self.budget = budget
+        self.fragmented = bool(info.get('fragments')) or str(info.get('protocol', '')).startswith(
+            ('m3u8', 'http_dash_segments'))
+        self.host = tuner.host_of(info)
+        self.level = 0  # 조절기가 정한 동시 요청 수
+        self.connections = 0  # 예산에서 받은 수 (경합하면 level보다 적음)
+        self.throttled = False
+        self.size = 0
+        self._started = 0.0
+
+    def __enter__(self) -> 'FragmentSession':
+        self.level = self.tuner.level(self.host) if self.fragmented else 1
+        self.connections = self.budget.acquire(self.level)
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.monotonic() - self._started
+        self.budget.release(self.connections)
+        if self.fragmented:
+            self.tuner.report(self.host, self.level, self.size, elapsed, self.throttled,
+                              granted=self.connections)
+
+    def observe(self, message: str):
+        """yt-dlp 메시지에서 요청 제한 감지"""
+        if any(marker in message for marker in THROTTLE_MARKERS):
+            self.throttled = True
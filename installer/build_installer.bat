@@ -10,7 +10,7 @@ cd /d "%~dp0"
 :: 1. Native Host 빌드
 echo [1/2] Native Host 빌드 중...
 cd ..\native_host
-pyinstaller --onefile --noconsole --name=native_host native_host.py
+pyinstaller --onefile --noconsole --paths=.. --name=native_host native_host.py
 if errorlevel 1 (
     echo Native Host 빌드 실패
     pause
@@ -0,0 +1,316 @@
+"""
+무결성 모듈
+다운로드 중인 파일을 쓰인 만큼 따라가며 해시하고, 완료 기록과 대조해 라이브러리를 검사
+
+명령줄 사용:
+    python integrity.py          # 크기/수정 시간이 바뀐 파일만 다시 해시
+    python integrity.py --full   # 모든 파일 다시 해시
+    python integrity.py --no-requeue  # 손상된 항목을 대기열에 다시 넣지 않고 보고만
+"""
+import hashlib
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from job_record import JobRecord
+
+# 해시 알고리즘과 읽기 단위
+HASH_ALGORITHM = 'sha256'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 완료 직후 검사에서 문제가 발견된 다운로드의 완료 메시지 접두어 (호출 측은 다시 대기열에 넣음)
+INCOMPLETE_DOWNLOAD_MESSAGE = "불완전한 다운로드"
+
+# yt-dlp가 받지 못한 조각을 건너뛸 때 남기는 메시지
+_SKIPPED_FRAGMENT_MARKER = 'Skipping fragment'
+
+
+def hash_file(path: str) -> Optional[str]:
+    """파일 전체 해시 (읽기 실패시 None)"""
+    digest = hashlib.new(HASH_ALGORITHM)
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class StreamHasher:
+    """
+    이어 쓰이는 파일의 증분 해시
+
+    update()를 부를 때마다 지난번 이후 새로 쓰인 부분만 읽어 해시에 더한다.
+    방금 쓴 데이터라 페이지 캐시에서 읽히므로 다운로드가 끝난 뒤 파일을 다시 읽지 않는다.
+    파일이 줄어들면 (이어받기 불가로 처음부터 다시 쓰는 경우) 처음부터 다시 해시한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self._digest = hashlib.new(HASH_ALGORITHM)
+
+    def update(self):
+        """새로 쓰인 부분 해시"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self.offset:
+            self.offset = 0
+            self._digest = hashlib.new(HASH_ALGORITHM)
+        if size == self.offset:
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                while self.offset < size:
+                    chunk = f.read(min(HASH_CHUNK_SIZE, size - self.offset))
+                    if not chunk:
+                        break
+                    self._digest.update(chunk)
+                    self.offset += len(chunk)
+        except OSError:
+            pass
+
+    def finish(self, path: str = None) -> Tuple[str, int]:
+        """
+        마지막 부분까지 해시
+
+        Args:
+            path: 완료 후 바뀐 파일 경로 (.part → 최종 이름)
+
+        Returns:
+            (해시, 해시한 크기)
+        """
+        if path:
+            self.path = path
+        self.update()
+        return self._digest.hexdigest(), self.offset
+
+
+class IntegrityTracker:
+    """
+    다운로드 하나의 무결성 정보 수집
+
+    yt-dlp progress_hooks에 hook을, logger 옵션에 자신을 넣으면
+    파일별 증분 해시, 서버가 알려준 크기와 실제로 받은 크기, 건너뛴 조각 수를 모은다.
+    """
+
+    def __init__(self):
+        self.fragment_gaps = 0
+        self.last_error: Optional[str] = None  # 마지막 오류 메시지 (실패 원인 분류용)
+        self._streamed = [0, 0]  # 파일 없이 흘려받은 (예상 크기, 받은 크기)
+        self._hashers: Dict[str, StreamHasher] = {}
+        self._expected: Dict[str, int] = {}
+        self._finished: Dict[str, Tuple[str, int]] = {}
+        self._digests: Dict[str, Optional[str]] = {}
+
+    def hook(self, d: Dict[str, Any]):
+        """yt-dlp 진행률 훅"""
+        if d['status'] == 'downloading':
+            path = d.get('tmpfilename') or d.get('filename')
+            if not path:
+                return
+            hasher = self._hashers.get(path)
+            if hasher is None:
+                hasher = self._hashers[path] = StreamHasher(path)
+            if d.get('total_bytes'):
+                self._expected[path] = d['total_bytes']
+            hasher.update()
+        elif d['status'] == 'finished':
+            # 완료 훅에는 임시 파일 이름이 없는 경우가 많음 (yt-dlp 임시 파일은 '.part'를 붙인 이름)
+            path = d.get('filename')
+            if not path:
+                return
+            tmp_path = d.get('tmpfilename') or f"{path}.part"
+            if tmp_path not in self._hashers:
+                tmp_path = path
+            hasher = self._hashers.pop(tmp_path, None) or StreamHasher(path)
+            self._finished[os.path.abspath(path)] = hasher.finish(path)
+            expected = self._expected.pop(tmp_path, None)
+            if expected:
+                self._expected[os.path.abspath(path)] = expected
+
+    # yt-dlp logger 인터페이스 (quiet 설정과 관계없이 모든 메시지가 전달됨)
+
+    def debug(self, message: str):
+        if _SKIPPED_FRAGMENT_MARKER in message:
+            self.fragment_gaps += 1
+
+    def info(self, message: str):
+        self.debug(message)
+
+    def warning(self, message: str):
+        self.debug(message)
+
+    def error(self, message: str):
+        self.last_error = message
+        print(message, file=sys.stderr)
+
+    def streamed(self, expected: int, received: int):
+        """디스크에 쓰지 않고 인코더로 흘려받은 원본 크기 기록"""
+        self._streamed[0] += expected or 0
+        self._streamed[1] += received
+
+    def expected_bytes(self) -> int:
+        """서버가 알려준 크기 합계 (모르면 0)"""
+        return sum(self._expected.get(path, 0) for path in self._finished) + self._streamed[0]
+
+    def received_bytes(self) -> int:
+        """실제로 받은 크기 합계"""
+        return sum(size for _, size in self._finished.values()) + self._streamed[1]
+
+    def problem(self) -> Optional[str]:
+        """받은 파일이 불완전하면 그 이유"""
+        if self.fragment_gaps:
+            return f"조각 {self.fragment_gaps}개 누락"
+        expected, received = self._streamed
+        if expected and received < expected:
+            return f"스트림 크기 부족 ({received}/{expected})"
+        for path, (_, size) in self._finished.items():
+            expected = self._expected.get(path)
+            if expected and size < expected:
+                return f"{os.path.basename(path)} 크기 부족 ({size}/{expected})"
+        return None
+
+    def add_digests(self, digests: Dict[str, Optional[str]]):
+        """후처리 작업이 결과 파일을 쓰고 만든 해시 등록 (PostProcessStage stats의 digests)"""
+        self._digests.update((os.path.abspath(path), digest) for path, digest in digests.items())
+
+    def file_digest(self, path: str) -> Optional[str]:
+        """
+        최종 파일 해시
+
+        한 번에 해시하는 것은 받은 그대로인 파일(병합/변환 없음)만 해당된다 - 받으면서 만든 해시를 쓴다.
+        ffmpeg로 새로 만든 파일은 후처리 작업이 쓰고 나서 만든 해시(add_digests)를 쓰고,
+        그것도 없으면 (yt-dlp 내장 후처리) 여기서 파일을 다시 읽어 해시한다.
+        """
+        path = os.path.abspath(path)
+        finished = self._finished.get(path)
+        if finished:
+            return finished[0]
+        if path not in self._digests:
+            self._digests[path] = hash_file(path)
+        return self._digests[path]
+
+    def record(self, path: str) -> Dict[str, Any]:
+        """완료 기록에 함께 저장할 무결성 정보"""
+        return {
+            'sha256': self.file_digest(path),
+            'expected_bytes': self.expected_bytes(),
+            'received_bytes': self.received_bytes(),
+            'fragment_gaps': self.fragment_gaps,
+        }
+
+    def discard(self):
+        """불완전한 파일 삭제 (다시 받을 때 이미 받은 파일로 건너뛰지 않도록)"""
+        for path in self._finished:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def verify_library(history, full: bool = False) -> List[Dict[str, Any]]:
+    """
+    완료 기록과 파일 대조
+
+    빠른 검사(기본)는 크기와 수정 시간이 기록과 같으면 통과시키고, 다르면 다시 해시한다.
+    full이면 모든 파일을 다시 해시한다.
+
+    Args:
+        history: DownloadHistory
+
+    Returns:
+        문제가 있는 기록 목록 (각 항목에 'problem' 설명 추가)
+    """
+    corrupt = []
+    for entry in history.entries():
+        path = entry['output_path']
+        problem = None
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+
+        if stat is None:
+            problem = "파일 없음"
+        elif entry['size'] and stat.st_size != entry['size']:
+            problem = f"크기 불일치 ({stat.st_size}/{entry['size']})"
+        elif entry['fragment_gaps']:
+            problem = f"조각 {entry['fragment_gaps']}개 누락"
+        elif entry['sha256'] and (full or stat.st_mtime != entry['mtime']):
+            if hash_file(path) != entry['sha256']:
+                problem = "해시 불일치"
+
+        if problem:
+            entry['problem'] = problem
+            corrupt.append(entry)
+    return corrupt
+
+
+def requeue_entry(history, entry: Dict[str, Any], session=None) -> Optional[JobRecord]:
+    """
+    손상된 기록을 지우고 다시 받을 대기 항목 반환
+
+    기록과 손상된 파일을 지워 중복 다운로드 검사에 걸리지 않게 하고,
+    session(SessionStore)이 있으면 대기 항목으로 추가한다.
+
+    Returns:
+        대기 상태의 JobRecord (길이는 모르므로 0) - URL을 알 수 없으면 None
+    """
+    kind, _, video_id = entry['video_id'].partition(':')
+    if kind != 'video' or not video_id:
+        return None
+    download_type, _, quality = entry['profile'].partition(':')
+
+    history.forget(entry['video_id'], entry['profile'])
+    if entry['output_path'] and entry.get('problem') != "파일 없음":
+        try:
+            os.remove(entry['output_path'])
+        except OSError:
+            pass
+
+    item = JobRecord(f"https://www.youtube.com/watch?v={video_id}", entry['title'] or "", 0,
+                     entry['channel'] or "", download_type, quality)
+    if session is not None:
+        session.item_added(item)
+    return item
+
+
+def main(argv: List[str] = None) -> int:
+    """라이브러리 검사 명령"""
+    from download_history import DownloadHistory
+    from session_store import SessionStore
+
+    argv = sys.argv[1:] if argv is None else argv
+    full = '--full' in argv
+    requeue = '--no-requeue' not in argv
+
+    history = DownloadHistory()
+    started = time.monotonic()
+    corrupt = verify_library(history, full)
+    elapsed = time.monotonic() - started
+
+    session = None
+    if requeue and corrupt:
+        # GUI와 같은 세션 파일 - 다음 실행 때 대기 항목으로 복원됨
+        session = SessionStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'session.db'))
+    for entry in corrupt:
+        print(f"[{entry['problem']}] {entry['title'] or entry['video_id']} - {entry['output_path']}")
+        if session is not None:
+            requeue_entry(history, entry, session)
+
+    print(f"검사 완료: {len(corrupt)}개 문제 ({elapsed:.1f}초)"
+          + (" - 다시 받도록 대기열에 추가함" if session is not None else ""))
+    if session is not None:
+        session.close()
+    history.close()
+    return 1 if corrupt else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
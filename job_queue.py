@@ -0,0 +1,153 @@
+"""
+다운로드 대기열 모듈
+정규화된 ID 맵과 상태별 버킷으로 중복 검사/다음 작업 선택/일괄 상태 처리를 빠르게 수행
+"""
+import heapq
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from job_record import JobStatus
+from media_id import canonical_key
+
+# 대기 상태 (다음 작업 선택 대상)
+STATUS_PENDING = JobStatus.QUEUED
+
+
+class DownloadQueue:
+    """
+    다운로드 항목 대기열
+
+    항목 순서(테이블 행 순서)를 유지하면서 다음 인덱스를 함께 관리:
+    - 정규화 키 → 항목 맵 (중복 검사 O(1))
+    - 상태 → 항목 버킷 (상태별 일괄 작업 O(해당 항목 수))
+    - 대기 항목 힙 (다음 작업 선택 O(log n), 지연 삭제)
+
+    항목의 status는 반드시 set_status()로 변경해야 인덱스가 유지된다.
+
+    listeners로 지정한 객체들에 item_added(item), item_changed(item, *fields),
+    items_removed(items)로 변경 사항을 통지한다 (예: SessionStore, QueueSearchIndex).
+    """
+
+    def __init__(self, listeners: Iterable[Any] = ()):
+        self.listeners = list(listeners)
+        self._items: List[Any] = []
+        self._rows: Dict[Any, int] = {}
+        self._seq: Dict[Any, int] = {}
+        self._by_key: Dict[str, Any] = {}
+        self._buckets: Dict[JobStatus, Dict[Any, None]] = {}
+        self._pending_heap: List[tuple] = []
+        self._in_heap = set()
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def __getitem__(self, row: int) -> Any:
+        return self._items[row]
+
+    def add(self, item: Any) -> int:
+        """항목 추가 후 행 번호 반환"""
+        row = len(self._items)
+        self._items.append(item)
+        self._rows[item] = row
+        self._seq[item] = self._next_seq
+        self._next_seq += 1
+        self._by_key[canonical_key(item.url)] = item
+        self._bucket_add(item, item.status)
+        for listener in self.listeners:
+            listener.item_added(item)
+        return row
+
+    def find(self, url: str) -> Optional[Any]:
+        """같은 영상/플레이리스트 항목 찾기"""
+        return self._by_key.get(canonical_key(url))
+
+    def row_of(self, item: Any) -> Optional[int]:
+        """항목의 현재 행 번호 (삭제된 항목이면 None)"""
+        return self._rows.get(item)
+
+    def set_status(self, item: Any, status: JobStatus):
+        """항목 상태 변경 및 인덱스 갱신"""
+        if item.status == status:
+            return
+        if item in self._rows:
+            self._bucket_remove(item, item.status)
+            item.status = status
+            self._bucket_add(item, status)
+            self.item_changed(item, 'status')
+        else:
+            item.status = status
+
+    def item_changed(self, item: Any, *fields: str):
+        """status 이외의 항목 속성 변경을 리스너에 통지"""
+        if item not in self._rows:
+            return
+        for listener in self.listeners:
+            listener.item_changed(item, *fields)
+
+    def count(self, *statuses: JobStatus) -> int:
+        """지정 상태의 항목 수"""
+        return sum(len(self._buckets.get(s, ())) for s in statuses)
+
+    def items_with(self, *statuses: JobStatus) -> List[Any]:
+        """지정 상태의 항목 목록 (행 순서)"""
+        found = [item for s in statuses for item in self._buckets.get(s, ())]
+        found.sort(key=self._rows.__getitem__)
+        return found
+
+    def has_pending(self) -> bool:
+        """대기 항목 존재 여부"""
+        return bool(self._buckets.get(STATUS_PENDING))
+
+    def next_pending(self) -> Optional[Any]:
+        """행 순서상 가장 앞의 대기 항목 (대기열에서 제거하지 않음)"""
+        heap = self._pending_heap
+        while heap:
+            item = heap[0][1]
+            if item in self._rows and item.status == STATUS_PENDING:
+                return item
+            heapq.heappop(heap)
+            self._in_heap.discard(item)
+        return None
+
+    def remove_rows(self, rows: Iterable[int]) -> List[int]:
+        """
+        여러 행 삭제
+
+        Returns:
+            실제로 삭제된 행 번호 (내림차순, 테이블 removeRow 순서)
+        """
+        removed = sorted({r for r in rows if 0 <= r < len(self._items)}, reverse=True)
+        if not removed:
+            return removed
+
+        for row in removed:
+            item = self._items[row]
+            self._bucket_remove(item, item.status)
+            del self._rows[item]
+            del self._seq[item]
+            key = canonical_key(item.url)
+            if self._by_key.get(key) is item:
+                del self._by_key[key]
+
+        removed_items = [self._items[row] for row in removed]
+        for listener in self.listeners:
+            listener.items_removed(removed_items)
+
+        removed_set = set(removed)
+        self._items = [item for row, item in enumerate(self._items) if row not in removed_set]
+        self._rows = {item: row for row, item in enumerate(self._items)}
+        return removed
+
+    def _bucket_add(self, item: Any, status: JobStatus):
+        self._buckets.setdefault(status, {})[item] = None
+        if status == STATUS_PENDING and item not in self._in_heap:
+            heapq.heappush(self._pending_heap, (self._seq[item], item))
+            self._in_heap.add(item)
+
+    def _bucket_remove(self, item: Any, status: JobStatus):
+        bucket = self._buckets.get(status)
+        if bucket is not None:
+            bucket.pop(item, None)
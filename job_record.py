@@ -0,0 +1,230 @@
+"""
+작업 기록 모듈
+GUI 대기열, 일괄 실행기(runner.py), 네이티브 호스트가 함께 쓰는 다운로드 작업 한 건의 데이터
+
+수천 개 항목이 대기열에 있어도 가볍도록 __slots__로 속성을 고정하고,
+진행률/받은 바이트/속도/남은 시간은 숫자로, 상태는 정수 코드(JobStatus)로 보관한다.
+문자열은 화면에 표시할 때만 만든다 (진행률 콜백마다 문자열을 만들지 않음).
+yt-dlp 없이 불러올 수 있다.
+"""
+import enum
+from typing import Any, Dict, Optional, Union
+
+
+class JobStatus(enum.IntEnum):
+    """작업 상태 코드 (0은 쓰지 않음 - 빈 값과 구분)"""
+    QUEUED = 1        # 대기
+    CONNECTING = 2    # 정보 가져오는 중 (GUI)
+    DOWNLOADING = 3
+    DOWNLOADED = 4    # 받기 끝, 변환 전 (GUI)
+    CONVERTING = 5    # 변환/병합 중 (GUI)
+    SPACE_WAIT = 6    # 저장 공간 부족으로 보류
+    RETRY_WAIT = 7    # 일시적인 오류로 백오프 후 재시도 대기
+    DONE = 8
+    FAILED = 9
+    SKIPPED = 10      # 이미 받은 영상
+    CANCELLED = 11
+
+    @property
+    def label(self) -> str:
+        """화면 표시 이름"""
+        return _LABELS[self]
+
+    @property
+    def key(self) -> str:
+        """API/명령줄 결과에 쓰는 이름 (queued, waiting, downloading, done, failed, skipped, cancelled)"""
+        return _KEYS[self]
+
+    @property
+    def finished(self) -> bool:
+        return self in FINAL_STATUSES
+
+    def __str__(self) -> str:
+        return self.label
+
+    def __format__(self, spec: str) -> str:
+        return format(self.label, spec)
+
+    @classmethod
+    def parse(cls, value: Any, default: 'JobStatus' = None) -> 'JobStatus':
+        """
+        저장된 값을 상태 코드로 (정수, 숫자 문자열, 이전 버전이 저장한 표시 이름 또는 API 이름)
+
+        알 수 없는 값이면 default (없으면 QUEUED)
+        """
+        if isinstance(value, cls):
+            return value
+        try:
+            return cls(int(value))
+        except (TypeError, ValueError):
+            pass
+        text = str(value or '').strip()
+        return _BY_LABEL.get(text) or _BY_KEY.get(text) or default or cls.QUEUED
+
+
+_LABELS = {
+    JobStatus.QUEUED: "대기중",
+    JobStatus.CONNECTING: "서버 연결중",
+    JobStatus.DOWNLOADING: "다운로드 중",
+    JobStatus.DOWNLOADED: "완료",
+    JobStatus.CONVERTING: "변환 중",
+    JobStatus.SPACE_WAIT: "공간 부족 대기",
+    JobStatus.RETRY_WAIT: "재시도 대기",
+    JobStatus.DONE: "✓ 완료",
+    JobStatus.FAILED: "✗ 실패",
+    JobStatus.SKIPPED: "이미 다운로드됨",
+    JobStatus.CANCELLED: "취소됨",
+}
+_KEYS = {
+    JobStatus.QUEUED: 'queued',
+    JobStatus.CONNECTING: 'queued',
+    JobStatus.DOWNLOADING: 'downloading',
+    JobStatus.DOWNLOADED: 'downloading',
+    JobStatus.CONVERTING: 'downloading',
+    JobStatus.SPACE_WAIT: 'waiting',
+    JobStatus.RETRY_WAIT: 'waiting',
+    JobStatus.DONE: 'done',
+    JobStatus.FAILED: 'failed',
+    JobStatus.SKIPPED: 'skipped',
+    JobStatus.CANCELLED: 'cancelled',
+}
+_BY_LABEL = {label: status for status, label in _LABELS.items()}
+_BY_KEY = {'queued': JobStatus.QUEUED, 'waiting': JobStatus.SPACE_WAIT}
+_BY_KEY.update((key, status) for status, key in _KEYS.items() if key not in _BY_KEY)
+
+# 끝난 상태
+FINAL_STATUSES = frozenset((JobStatus.DONE, JobStatus.FAILED, JobStatus.SKIPPED,
+                            JobStatus.CANCELLED))
+# 디스패처가 가져갈 수 있는 상태 (일괄 실행기)
+READY_STATUSES = frozenset((JobStatus.QUEUED, JobStatus.SPACE_WAIT, JobStatus.RETRY_WAIT))
+# 진행 중으로 표시하는 상태
+ACTIVE_STATUSES = frozenset((JobStatus.DOWNLOADING, JobStatus.CONVERTING))
+
+
+def format_duration(seconds: int) -> str:
+    """초를 시:분:초 형식으로 변환"""
+    if not seconds:
+        return "00:00"
+    seconds = int(seconds)
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    secs = seconds % 60
+
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def format_filesize(bytes_size: int) -> str:
+    """바이트를 읽기 쉬운 크기로 변환"""
+    if not bytes_size:
+        return "0 B"
+
+    units = ['B', 'KB', 'MB', 'GB', 'TB']
+    unit_index = 0
+    size = float(bytes_size)
+
+    while size >= 1024 and unit_index < len(units) - 1:
+        size /= 1024
+        unit_index += 1
+
+    return f"{size:.1f} {units[unit_index]}"
+
+
+def parse_duration(value: Union[int, float, str, None]) -> int:
+    """길이 값을 초로 (숫자 또는 이전 버전이 저장한 "분:초"/"시:분:초" 문자열, 모르면 0)"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    seconds = 0
+    try:
+        for part in str(value or '').split(':'):
+            seconds = seconds * 60 + int(part)
+    except ValueError:
+        return 0
+    return seconds
+
+
+def parse_percent(value: Union[int, float, str, None]) -> float:
+    """진행률 값을 백분율 숫자로 (숫자 또는 이전 버전이 저장한 "45.3%" 문자열, 모르면 0)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value or '').strip().rstrip('%'))
+    except ValueError:
+        return 0.0
+
+
+class JobRecord:
+    """
+    다운로드 작업 한 건
+
+    progress는 백분율(0~100), speed는 초당 바이트, eta는 남은 초 (모르면 0).
+    *_text 속성은 표시용 문자열 (부를 때 만듦).
+    """
+
+    __slots__ = (
+        'url', 'title', 'duration', 'channel', 'download_type', 'quality', 'status',
+        'progress', 'downloaded_bytes', 'total_bytes', 'speed', 'eta', 'thumbnail',
+        'job_id', 'format_index', 'trace', 'integrity_retries', 'error_retries',
+    )
+
+    def __init__(self, url: str, title: str = '', duration: int = 0, channel: str = '',
+                 download_type: str = 'video', quality: str = '최고 화질'):
+        self.url = url
+        self.title = title
+        self.duration = duration  # 초
+        self.channel = channel
+        self.download_type = download_type  # 'video' 또는 'audio'
+        self.quality = quality  # 화질 또는 오디오 포맷
+        self.status = JobStatus.QUEUED
+        self.progress = 0.0
+        self.downloaded_bytes = 0
+        self.total_bytes = 0
+        self.speed = 0.0
+        self.eta = 0
+        self.thumbnail = ""  # 썸네일 URL
+        self.job_id: Optional[int] = None  # 세션 저장소 행 ID
+        self.format_index = None  # 정보 단계의 전체 추출 결과 (다운로드에 재사용, 저장하지 않음)
+        self.trace = None  # 작업 기록 (작업 기록을 켠 경우)
+        self.integrity_retries = 0  # 불완전한 다운로드로 다시 받은 횟수
+        self.error_retries = 0  # 일시적인 오류로 다시 받은 횟수
+
+    def update_progress(self, progress: Dict[str, Any]) -> bool:
+        """
+        진행률 콜백 내용(downloaded, total, speed, eta) 반영
+
+        Returns:
+            표시되는 정수 백분율이 바뀌었는지
+        """
+        before = int(self.progress)
+        done = progress.get('downloaded') or 0
+        total = progress.get('total') or 0
+        self.downloaded_bytes = done
+        self.total_bytes = total
+        self.speed = progress.get('speed') or 0.0
+        self.eta = progress.get('eta') or 0
+        if total:
+            self.progress = min(done * 100.0 / total, 100.0)
+        return int(self.progress) != before
+
+    def finish_transfer(self):
+        """받기가 끝남 - 진행률 100%, 속도/남은 시간 지움"""
+        self.progress = 100.0
+        self.speed = 0.0
+        self.eta = 0
+
+    @property
+    def duration_text(self) -> str:
+        return format_duration(self.duration) if self.duration else "--:--"
+
+    @property
+    def progress_text(self) -> str:
+        return f"{self.progress:.1f}%" if self.progress % 1 else f"{self.progress:.0f}%"
+
+    @property
+    def speed_text(self) -> str:
+        return f"{format_filesize(self.speed)}/s" if self.speed else ""
+
+    @property
+    def eta_text(self) -> str:
+        return format_duration(self.eta) if self.eta else ""
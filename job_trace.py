@@ -0,0 +1,158 @@
+"""
+작업 기록(trace) 모듈
+작업 수명 주기 이벤트(추가, 시작, 단계, 진행률 표본, 끝)를 시각과 함께 JSON Lines로 기록
+(replay.py가 읽어 동시 작업 수/우선순위 정책을 오프라인으로 비교)
+
+한 줄이 이벤트 하나다:
+    {"t": 1700000000.123, "source": "gui", "job": "gui-1234-1", "event": "enqueue", ...}
+
+- enqueue: 대기열에 들어감 (url, type, quality, 다시 넣은 경우 retry)
+- start: 다운로드 시도 시작 (type)
+- phase: 단계 시작/끝 (phase, state='start'|'end', 끝이면 seconds, 실패면 failed)
+- progress: 받은 바이트 표본 (bytes - 시도 안 누적, PROGRESS_SAMPLE_INTERVAL마다)
+- finish: 시도 끝 (status, message, seconds, bytes, retries)
+
+재시도는 같은 job으로 enqueue(또는 start)부터 다시 기록된다.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# 지정하면 이 파일에 기록 (GUI 메뉴/명령줄 옵션이 없을 때의 기본값, 네이티브 호스트는 이것만 사용)
+TRACE_ENV = 'SONDOWNLOADER_TRACE'
+# 작업별 진행률 표본 최소 간격 (초)
+PROGRESS_SAMPLE_INTERVAL = 1.0
+
+# 이벤트 종류
+EVENT_ENQUEUE = 'enqueue'
+EVENT_START = 'start'
+EVENT_PHASE = 'phase'
+EVENT_PROGRESS = 'progress'
+EVENT_FINISH = 'finish'
+
+
+class TraceWriter:
+    """
+    작업 기록 파일 (여러 스레드에서 호출됨)
+
+    줄 단위로 덧붙여 쓰므로 여러 프로세스(요청마다 뜨는 네이티브 호스트)가 같은 파일에 써도 된다.
+    쓰기에 실패하면 기록을 멈추고 다운로드는 그대로 진행한다.
+    """
+
+    def __init__(self, path: str, source: str):
+        """
+        초기화
+
+        Args:
+            path: 기록 파일 (없으면 생성, 있으면 덧붙임)
+            source: 기록한 쪽 ('gui', 'runner', 'native_host')
+        """
+        self.path = path
+        self.source = source
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._prefix = f"{source}-{os.getpid()}"
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def job(self, url: str, download_type: str, quality: str = None) -> 'JobTrace':
+        """새 작업 기록기 (enqueue 이벤트를 남김)"""
+        trace = JobTrace(self, f"{self._prefix}-{next(self._ids)}")
+        trace.enqueue(url=url, type=download_type, quality=quality)
+        return trace
+
+    def write(self, event: str, job: str, **fields):
+        """이벤트 한 줄 기록"""
+        record = {'t': round(time.time(), 3), 'source': self.source, 'job': job, 'event': event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(line)
+                self._file.flush()
+            except (OSError, ValueError):
+                self._file = None
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class JobTrace:
+    """
+    작업 하나의 기록기
+
+    JobMetrics에 넘기면 단계/진행률/끝을 기록한다.
+    한 시도의 finish는 한 번만 남으므로 엔진이 이미 남긴 뒤에
+    호출 측(건너뜀, 대기 중 취소 등)이 다시 불러도 된다.
+    """
+
+    def __init__(self, writer: TraceWriter, job_id: str):
+        self.writer = writer
+        self.id = job_id
+        self.running = False  # 시도가 진행 중인지
+        self._open = False    # 아직 finish를 남기지 않은 시도(대기 포함)가 있는지
+        self._last_sample = 0.0
+
+    def enqueue(self, **fields):
+        """대기열에 (다시) 들어감"""
+        self._open = True
+        self.writer.write(EVENT_ENQUEUE, self.id, **fields)
+
+    def start(self, download_type: str):
+        """다운로드 시도 시작"""
+        self.running = self._open = True
+        self._last_sample = 0.0
+        self.writer.write(EVENT_START, self.id, type=download_type)
+
+    def phase(self, phase: str, state: str, seconds: float = None, failed: bool = False):
+        fields: Dict[str, Any] = {'phase': phase, 'state': state}
+        if seconds is not None:
+            fields['seconds'] = round(seconds, 3)
+        if failed:
+            fields['failed'] = True
+        self.writer.write(EVENT_PHASE, self.id, **fields)
+
+    def progress(self, received: int):
+        """받은 바이트 표본 (PROGRESS_SAMPLE_INTERVAL보다 잦으면 버림)"""
+        now = time.monotonic()
+        if now - self._last_sample < PROGRESS_SAMPLE_INTERVAL:
+            return
+        self._last_sample = now
+        self.writer.write(EVENT_PROGRESS, self.id, bytes=received)
+
+    def finish(self, status: str, message: str = '', **fields):
+        """시도 끝 (이미 남겼으면 무시)"""
+        if not self._open:
+            return
+        self.running = self._open = False
+        self.writer.write(EVENT_FINISH, self.id, status=status, message=message, **fields)
+
+
+def open_trace(path: Optional[str], source: str, log=None) -> Optional[TraceWriter]:
+    """
+    기록 파일 열기
+
+    path가 없으면 TRACE_ENV 환경 변수를 쓰고, 둘 다 없거나 열 수 없으면 None (기록 안 함)
+    """
+    path = path or os.environ.get(TRACE_ENV)
+    if not path:
+        return None
+    try:
+        return TraceWriter(path, source)
+    except OSError as e:
+        if log:
+            log(f"작업 기록 파일을 열 수 없음 ({path}): {e}")
+        return None
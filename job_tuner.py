@@ -0,0 +1,296 @@
+"""
+동시 작업 수 조절 모듈
+전체 처리량, 오류/재시도 비율, 후처리 CPU 부하, 디스크 쓰기 지연을 보고 동시에 받을 작업 수를 조절
+"""
+import ctypes
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+# 동시 작업 수 범위 (설정으로 바꿀 수 있음)
+MIN_CONCURRENT_JOBS = 1
+MAX_CONCURRENT_JOBS = 4
+INITIAL_CONCURRENT_JOBS = 2
+
+# 판단 주기 (초)
+TUNE_INTERVAL = 30.0
+
+# 처리량이 이 비율 이상 변해야 변화로 봄
+GOODPUT_GAIN = 0.1
+# 완료된 작업 중 실패/재시도 비율이 이보다 높으면 줄임
+ERROR_RATE_LIMIT = 0.25
+# 후처리 대기 작업이 작업자당 이보다 많거나, 코어당 부하가 이보다 높으면 줄임
+POSTPROCESS_BACKLOG_LIMIT = 1.0
+CPU_LOAD_LIMIT = 0.9
+# 디스크 쓰기 지연 측정 (PROBE_BYTES를 쓰고 fsync하는 시간) 한도
+DISK_LATENCY_LIMIT = 0.5
+PROBE_BYTES = 1024 * 1024
+
+# 메모리에 남겨 둘 최근 판단 수
+DECISION_HISTORY = 100
+
+
+class JobSlots:
+    """
+    크기를 바꿀 수 있는 작업 슬롯
+
+    GUI는 try_acquire()로 빈 슬롯이 있을 때만 다음 항목을 시작하고,
+    네이티브 호스트는 작업 스레드에서 acquire()로 슬롯이 빌 때까지 기다린다.
+    limit을 줄여도 실행 중인 작업은 멈추지 않고, 끝나 반납될 때 새 한도가 적용된다.
+    """
+
+    def __init__(self, limit: int = INITIAL_CONCURRENT_JOBS):
+        self.limit = limit
+        self.active = 0
+        self._condition = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        """빈 슬롯이 있으면 차지"""
+        with self._condition:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def acquire(self):
+        """빈 슬롯이 생길 때까지 기다린 뒤 차지"""
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active += 1
+
+    def release(self):
+        """슬롯 반납"""
+        with self._condition:
+            self.active = max(0, self.active - 1)
+            self._condition.notify_all()
+
+    def set_limit(self, limit: int):
+        """한도 변경"""
+        with self._condition:
+            self.limit = limit
+            self._condition.notify_all()
+
+
+def measure_disk_latency(directory: str) -> Optional[float]:
+    """directory에 PROBE_BYTES를 쓰고 디스크에 반영되기까지 걸린 시간 (실패시 None)"""
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix='.probe-', dir=directory)
+    except OSError:
+        return None
+    try:
+        started = time.monotonic()
+        os.write(fd, b'\0' * PROBE_BYTES)
+        os.fsync(fd)
+        return time.monotonic() - started
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Windows: 지난 cpu_load() 호출 때의 (유휴, 전체) CPU 시간
+_cpu_times: Optional[Tuple[int, int]] = None
+
+
+def _windows_cpu_busy() -> Optional[float]:
+    """지난 호출 이후 CPU 사용 비율 (GetSystemTimes, 첫 호출이나 실패시 None)"""
+    global _cpu_times
+    idle, kernel, user = ctypes.c_ulonglong(), ctypes.c_ulonglong(), ctypes.c_ulonglong()
+    try:
+        ok = ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel),
+                                                   ctypes.byref(user))
+    except (AttributeError, OSError):
+        return None
+    if not ok:
+        return None
+    # 커널 시간에 유휴 시간이 포함됨
+    previous, _cpu_times = _cpu_times, (idle.value, kernel.value + user.value)
+    if previous is None:
+        return None
+    total = _cpu_times[1] - previous[1]
+    if total <= 0:
+        return None
+    return 1.0 - (_cpu_times[0] - previous[0]) / total
+
+
+def cpu_load() -> Optional[float]:
+    """
+    코어당 CPU 부하 (알 수 없으면 None)
+
+    Linux/macOS는 1분 평균 부하를 코어 수로 나눈 값.
+    Windows에는 평균 부하가 없어 지난 호출 이후 전체 CPU 사용 비율(0~1)을 쓴다 (첫 호출은 None).
+    """
+    if sys.platform == 'win32':
+        return _windows_cpu_busy()
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class JobConcurrencyTuner:
+    """
+    동시 작업 수 조절기
+
+    다운로드 경로가 받은 바이트, 작업 결과, 재시도를 보고하면
+    evaluate()가 주기마다 지난 구간의 지표를 모아 슬롯 한도를 한 단계씩 조절한다.
+
+    - 실패/재시도가 많거나, 후처리가 밀리거나, 디스크 쓰기가 느리면 줄임
+    - 슬롯을 모두 쓰는데 처리량이 좋아지고 있으면 같은 방향으로 한 단계 더,
+      처리량이 나빠졌으면 반대 방향으로 한 단계
+    - 슬롯이 남아 있으면 (대기 항목 부족) 그대로 둠
+
+    판단은 매번 log로 한 줄씩 남긴다.
+    """
+
+    def __init__(self, minimum: int = MIN_CONCURRENT_JOBS, maximum: int = MAX_CONCURRENT_JOBS,
+                 postprocessor=None, probe_dir: str = None,
+                 log: Callable[[str], None] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 load: Callable[[], Optional[float]] = cpu_load):
+        """
+        초기화
+
+        Args:
+            minimum: 최소 동시 작업 수
+            maximum: 최대 동시 작업 수
+            postprocessor: PostProcessStage (대기 작업 수로 후처리 부하 판단)
+            probe_dir: 디스크 쓰기 지연을 잴 폴더 (보통 저장 폴더)
+            log: 판단 기록 함수
+            clock: 처리량 구간 시계 (replay.py의 모의 시계 등)
+            load: 코어당 CPU 부하 함수 (None을 돌려주면 보지 않음)
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.postprocessor = postprocessor
+        self.probe_dir = probe_dir
+        self.log = log
+        self.clock = clock
+        self.load = load
+        self.decisions: Deque[str] = deque(maxlen=DECISION_HISTORY)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._results = 0
+        self._failures = 0
+        self._retries = 0
+        self._window_started = clock()
+        self._goodput: Optional[float] = None
+        self._direction = 1
+
+    def clamp(self, limit: int) -> int:
+        """범위 안으로 맞춘 한도"""
+        return min(max(limit, self.minimum), self.maximum)
+
+    def record_bytes(self, count: int):
+        """받은 바이트 보고"""
+        if count > 0:
+            with self._lock:
+                self._bytes += count
+
+    def record_result(self, success: bool):
+        """작업 결과 보고"""
+        with self._lock:
+            self._results += 1
+            if not success:
+                self._failures += 1
+
+    def record_retry(self):
+        """재시도/요청 제한 보고"""
+        with self._lock:
+            self._retries += 1
+
+    def _take_window(self):
+        """지난 구간 지표를 꺼내고 새 구간 시작"""
+        with self._lock:
+            now = self.clock()
+            elapsed = max(now - self._window_started, 1e-6)
+            window = (self._bytes / elapsed, self._results, self._failures, self._retries)
+            self._bytes = self._results = self._failures = self._retries = 0
+            self._window_started = now
+            return window
+
+    def _postprocess_backlog(self) -> float:
+        if self.postprocessor is None:
+            return 0.0
+        return self.postprocessor.pending / max(self.postprocessor.workers, 1)
+
+    def evaluate(self, slots: JobSlots) -> int:
+        """
+        지난 구간을 보고 slots 한도 조절
+
+        Returns:
+            새 한도
+        """
+        goodput, results, failures, retries = self._take_window()
+        errors = failures + retries
+        error_rate = errors / max(results + retries, 1) if errors else 0.0
+        backlog = self._postprocess_backlog()
+        load = self.load()
+        latency = measure_disk_latency(self.probe_dir) if self.probe_dir else None
+
+        current = slots.limit
+        limit = current
+        if error_rate > ERROR_RATE_LIMIT:
+            limit, reason = current - 1, "오류/재시도 많음"
+        elif backlog > POSTPROCESS_BACKLOG_LIMIT or (load is not None and load > CPU_LOAD_LIMIT):
+            limit, reason = current - 1, "후처리/CPU 부하"
+        elif latency is not None and latency > DISK_LATENCY_LIMIT:
+            limit, reason = current - 1, "디스크 쓰기 지연"
+        elif slots.active < current:
+            reason = "빈 슬롯 있음"
+        elif self._goodput is None or goodput > self._goodput * (1 + GOODPUT_GAIN):
+            limit, reason = current + self._direction, "처리량 증가"
+        elif goodput < self._goodput * (1 - GOODPUT_GAIN):
+            self._direction = -self._direction
+            limit, reason = current + self._direction, "처리량 감소"
+        else:
+            reason = "처리량 유지"
+
+        limit = self.clamp(limit)
+        if limit < current:
+            self._direction = -1
+        elif limit > current:
+            self._direction = 1
+        if slots.active >= current or limit < current:
+            # 슬롯이 남던 구간의 처리량은 비교 기준으로 쓰지 않음
+            self._goodput = goodput
+        slots.set_limit(limit)
+
+        decision = (
+            f"{time.strftime('%Y-%m-%d %H:%M:%S')} 동시 작업 {current}→{limit} ({reason}) "
+            f"처리량 {goodput / 1024 / 1024:.2f}MB/s, 실행 {slots.active}, "
+            f"완료 {results} 실패 {failures} 재시도 {retries}, 후처리 대기 {backlog:.2f}, "
+            f"CPU {'-' if load is None else f'{load:.2f}'}, "
+            f"디스크 {'-' if latency is None else f'{latency * 1000:.0f}ms'}"
+        )
+        self.decisions.append(decision)
+        if self.log:
+            self.log(decision)
+        return limit
+
+    def run(self, slots: JobSlots, interval: float = TUNE_INTERVAL,
+            stop: threading.Event = None) -> threading.Thread:
+        """백그라운드 스레드에서 주기적으로 조절 (GUI 없이 쓰는 경우)"""
+        stop = stop or threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.evaluate(slots)
+                except Exception as e:
+                    if self.log:
+                        self.log(f"동시 작업 조절 오류: {e}")
+
+        thread = threading.Thread(target=loop, name='job-tuner', daemon=True)
+        thread.start()
+        return thread
@@ -7,14 +7,22 @@ import os
 import json
 import webbrowser
 import time
+import heapq
+
+# 시작 시간 측정 기준 (PyQt/엔진 모듈 로딩 전)
+STARTUP_STARTED = time.perf_counter()
+STARTUP_STARTED_AT = time.time()
+
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLineEdit, QLabel, QComboBox, QProgressBar,
     QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog,
-    QTabBar, QFrame, QMessageBox, QMenu, QStyle, QAbstractItemView
+    QTabBar, QFrame, QMessageBox, QMenu, QStyle, QAbstractItemView, QStackedWidget
+)
+from PyQt6.QtCore import (
+    Qt, QThread, pyqtSignal, QSize, QTimer, QSettings, QObject, QRunnable, QThreadPool
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QTimer, QSettings
-from PyQt6.QtGui import QFont, QAction, QIcon, QClipboard, QColor
+from PyQt6.QtGui import QFont, QAction, QIcon, QClipboard, QColor, QImage, QPixmap
 
 # 쿠팡 파트너스 설정
 COUPANG_LINK = 'https://link.coupang.com/a/dgLA94'
@@ -22,10 +30,94 @@ COUPANG_COOKIE_HOURS = 20
 
 # 설정 파일 경로
 SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'settings.json')
-
-from downloader import (
-    YouTubeDownloader, format_duration, format_filesize, is_valid_youtube_url
+# 다운로드 대기열 저장 파일 경로
+SESSION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'session.db')
+
+# 세션 복원시 한 번에 테이블에 추가할 항목 수
+RESTORE_BATCH_SIZE = 200
+
+# 불완전한 다운로드를 자동으로 다시 받는 최대 횟수
+MAX_INTEGRITY_RETRIES = 2
+
+# 저장 공간이 부족해 보류된 항목(JobStatus.SPACE_WAIT)을 다시 확인하는 간격 (밀리초)
+SPACE_RETRY_INTERVAL = 30 * 1000
+
+# 동시 작업 수 자동 조절 판단 기록 파일
+JOB_TUNER_LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'job_tuner.log')
+# 작업 수명 주기 기록 파일 (메뉴로 켬 - replay.py로 재생)
+JOB_TRACE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'job_trace.jsonl')
+
+# 썸네일 설정
+THUMBNAIL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thumbnails')
+THUMBNAIL_SIZE = QSize(64, 36)
+THUMBNAIL_WORKERS = 4  # 동시 다운로드 수
+THUMBNAIL_MEMORY_BYTES = 16 * 1024 * 1024  # 디코딩된 이미지 메모리 한도
+THUMBNAIL_DISK_BYTES = 200 * 1024 * 1024  # 원본 파일 디스크 한도
+
+# 라이브러리 탭에 한 번에 표시할 최대 검색 결과 수 (최근 완료 순)
+LIBRARY_RESULT_LIMIT = 500
+
+# 창이 그려지지 않아도 (최소화 상태로 시작 등) 엔진 로딩을 시작할 시간 (밀리초)
+STARTUP_PAINT_TIMEOUT = 500
+
+# 다운로드 엔진 모듈 - yt-dlp 로딩이 시작 시간의 대부분이라 창을 먼저 띄운 뒤
+# EngineImportThread에서 불러옴 (main.py는 엔진 준비 후에만 이 모듈의 이름을 씀)
+ENGINE_MODULE = 'downloader'
+
+from download_history import DownloadHistory, history_profile
+from integrity import INCOMPLETE_DOWNLOAD_MESSAGE, requeue_entry, verify_library
+from job_queue import DownloadQueue
+from job_record import ACTIVE_STATUSES, JobRecord, JobStatus, format_filesize
+from job_trace import open_trace
+from job_tuner import (
+    INITIAL_CONCURRENT_JOBS, MAX_CONCURRENT_JOBS, MIN_CONCURRENT_JOBS, TUNE_INTERVAL,
+    JobConcurrencyTuner, JobSlots
 )
+from media_id import parse_media
+from postprocess import PostProcessStage
+from profiling import DEFAULT_PROFILE_WINDOW, ProfileSwitch, profile_dir_for
+from retry import ERROR_LABELS, ERROR_RATE_LIMITED, CircuitBreaker, RetryPolicy, classify_error
+from search_index import QueueSearchIndex, SearchIndex
+from session_store import SessionStore
+from thumbnail_cache import ByteLRU, DiskCache, fetch_thumbnail
+
+# 복원시 대기 상태로 되돌릴 상태 (이전 실행에서 중단된 작업)
+RESTORE_AS_PENDING = (JobStatus.CONNECTING, JobStatus.DOWNLOADING, JobStatus.DOWNLOADED,
+                      JobStatus.CONVERTING, JobStatus.SPACE_WAIT, JobStatus.RETRY_WAIT)
+
+# 시작 단계별 시각 (STARTUP_STARTED 기준 초)
+startup_marks = {}
+
+
+def mark_startup(stage: str):
+    """시작 단계 시각 기록 (처음 한 번만)"""
+    startup_marks.setdefault(stage, round(time.perf_counter() - STARTUP_STARTED, 4))
+
+
+mark_startup('imports')
+
+
+class EngineImportThread(QThread):
+    """창이 뜬 뒤 다운로드 엔진 모듈(yt-dlp 포함)을 백그라운드에서 불러오는 스레드"""
+    loaded = pyqtSignal(float, str)  # 걸린 시간(초), 오류 메시지
+
+    def run(self):
+        started = time.perf_counter()
+        error = ""
+        try:
+            __import__(ENGINE_MODULE)
+        except Exception as e:
+            error = str(e)
+        self.loaded.emit(time.perf_counter() - started, error)
+
+
+class LoadingLabel(QLabel):
+    """엔진 준비 전 임시 화면 (첫 페인트를 알림)"""
+    painted = pyqtSignal()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self.painted.emit()
 
 
 class DownloadThread(QThread):
@@ -33,20 +125,24 @@ class DownloadThread(QThread):
     progress = pyqtSignal(dict)
     finished = pyqtSignal(bool, str)
     info_fetched = pyqtSignal(dict)
+    format_indexed = pyqtSignal(object)
 
-    def __init__(self, downloader: YouTubeDownloader, url: str, download_type: str,
-                 quality: str = None, audio_format: str = None):
+    def __init__(self, downloader: 'YouTubeDownloader', url: str, download_type: str,
+                 quality: str = None, audio_format: str = None, format_index=None,
+                 full_info: bool = False):
         super().__init__()
         self.downloader = downloader
         self.url = url
         self.download_type = download_type  # 'video', 'audio', 'info'
         self.quality = quality
         self.audio_format = audio_format
+        self.format_index = format_index  # 정보 단계에서 받은 추출 결과
+        self.full_info = full_info
 
     def run(self):
         if self.download_type == 'info':
             try:
-                info = self.downloader.get_video_info(self.url)
+                info = self.downloader.get_video_info(self.url, full=self.full_info)
                 if info:
                     self.info_fetched.emit(info)
                 else:
@@ -58,50 +154,223 @@ class DownloadThread(QThread):
                 self.url,
                 self.quality,
                 progress_callback=self.progress.emit,
-                complete_callback=self.finished.emit
+                complete_callback=self.finished.emit,
+                format_index=self.fetch_format_index(),
             )
         elif self.download_type == 'audio':
             self.downloader.download_audio(
                 self.url,
                 self.audio_format,
                 progress_callback=self.progress.emit,
-                complete_callback=self.finished.emit
+                complete_callback=self.finished.emit,
+                format_index=self.fetch_format_index(),
             )
 
+    def fetch_format_index(self):
+        """
+        포맷 색인을 알리고 다운로드에 재사용
 
-class DownloadItem:
-    """다운로드 항목 데이터"""
-    def __init__(self, url: str, title: str, duration: str, channel: str):
+        정보 단계의 추출 결과가 아직 유효하면 그대로 쓰고, 없거나 만료되었으면 새로 추출한다.
+        (실패시 None - 다운로드가 직접 추출)
+        """
+        format_index = self.format_index
+        if format_index is None or format_index.is_expired():
+            format_index = self.downloader.get_format_index(self.url)
+        if format_index is not None:
+            self.format_indexed.emit(format_index)
+        return format_index
+
+
+class VerifyThread(QThread):
+    """라이브러리 검사 스레드"""
+    verified = pyqtSignal(list)
+
+    def __init__(self, history: DownloadHistory, full: bool = False):
+        super().__init__()
+        self.history = history
+        self.full = full
+
+    def run(self):
+        self.verified.emit(verify_library(self.history, self.full))
+
+
+class TuneThread(QThread):
+    """동시 작업 수 조절 스레드 (디스크 쓰기 지연 측정이 느린 저장 폴더에서 UI를 멈추지 않도록)"""
+    tuned = pyqtSignal(int)
+
+    def __init__(self, tuner: JobConcurrencyTuner, slots: JobSlots):
+        super().__init__()
+        self.tuner = tuner
+        self.slots = slots
+
+    def run(self):
+        try:
+            limit = self.tuner.evaluate(self.slots)
+        except Exception as e:
+            if self.tuner.log:
+                self.tuner.log(f"동시 작업 조절 오류: {e}")
+            limit = self.slots.limit
+        self.tuned.emit(limit)
+
+
+class ThumbnailSignals(QObject):
+    """썸네일 작업 시그널"""
+    loaded = pyqtSignal(str, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    """썸네일 가져오기/디코딩 작업 (스레드 풀에서 실행)"""
+
+    def __init__(self, url: str, disk_cache: DiskCache, signals: ThumbnailSignals):
+        super().__init__()
         self.url = url
-        self.title = title
-        self.duration = duration
-        self.channel = channel
-        self.progress = 0
-        self.status = "대기중"
-        self.speed = ""
-        self.eta = ""
-        self.file_size = ""
-        self.download_type = "video"
-        self.quality = "최고 화질"
-        self.audio_format = "MP3 (320kbps)"
+        self.disk_cache = disk_cache
+        self.signals = signals
+
+    def run(self):
+        image = QImage()
+        data = fetch_thumbnail(self.url, self.disk_cache)
+        if data and image.loadFromData(data):
+            image = image.scaled(
+                THUMBNAIL_SIZE,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+        self.signals.loaded.emit(self.url, image)
 
 
 class MainWindow(QMainWindow):
     """메인 윈도우"""
 
+    # 엔진/UI 준비가 끝나면 발생 (시작 측정용)
+    startup_finished = pyqtSignal()
+
     def __init__(self):
         super().__init__()
-        self.downloader = YouTubeDownloader()
-        self.download_items = []
-        self.current_download_thread = None
+        # 시작은 단계적으로: 창 틀과 임시 화면을 먼저 그리고, 첫 페인트 후 엔진 모듈을
+        # 백그라운드에서 불러온 다음 엔진/UI/메뉴 구성, 저장된 설정과 대기열 복원
+        self.setWindowTitle("YouTube Downloader")
+        self.setMinimumSize(900, 600)
+        self.resize(1000, 700)
+        self.loading_label = LoadingLabel("불러오는 중...")
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.setStyleSheet("color: #999; font-size: 14px;")
+        self.loading_label.painted.connect(self.start_engine_import)
+        self.setCentralWidget(self.loading_label)
+        self.engine_thread = None
+        self.engine_ready = False
+        self.postprocessor = None
+        self.session = None
+        self.tracer = None
+        self.trace_jobs = False  # 작업 기록 남기기
+
+        self.slot_items = set()  # 다운로드 슬롯을 차지하고 있는 항목
+        self.download_threads = {}  # 항목 → 스레드 (후처리 완료 콜백까지 참조 유지)
+        self.finished_threads = []
         self.is_downloading = False
+        self.tune_thread = None  # 동시 작업 수 조절 중인 스레드
+        self.download_stopped = False  # 사용자가 중지함 (보류 항목이 풀려도 자동으로 다시 시작하지 않음)
         self.last_coupang_click = 0  # 쿠팡 클릭 시간 기록
+        self.reuse_extraction = True  # 정보 단계에서 전체 추출하고 다운로드에 재사용
+
+        # 썸네일: 보이는 행만 스레드 풀에서 가져오고 메모리/디스크 LRU에 보관
+        self.thumbnail_cache = ByteLRU(THUMBNAIL_MEMORY_BYTES)
+        self.thumbnail_disk = DiskCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_DISK_BYTES)
+        self.thumbnail_pool = QThreadPool(self)
+        self.thumbnail_pool.setMaxThreadCount(THUMBNAIL_WORKERS)
+        self.thumbnail_signals = ThumbnailSignals()
+        self.thumbnail_signals.loaded.connect(self.on_thumbnail_loaded)
+        self.thumbnail_pending = set()
+        self.thumbnail_failed = set()
+        self.thumbnail_shown = set()
+        self.thumbnail_timer = QTimer(self)
+        self.thumbnail_timer.setSingleShot(True)
+        self.thumbnail_timer.setInterval(100)
+        self.thumbnail_timer.timeout.connect(self.load_visible_thumbnails)
+
+        # 저장 공간 부족으로 보류된 항목 재확인 타이머
+        self.space_retry_timer = QTimer(self)
+        self.space_retry_timer.setSingleShot(True)
+        self.space_retry_timer.setInterval(SPACE_RETRY_INTERVAL)
+        self.space_retry_timer.timeout.connect(self.retry_space_waiting)
+
+        # 오류 종류별 재시도와 요청 제한 회로 차단기 (열린 동안 새 다운로드를 시작하지 않음)
+        self.retry_policy = RetryPolicy()
+        self.breaker = CircuitBreaker(log=self.log_message)
+        self.breaker_timer = QTimer(self)
+        self.breaker_timer.setSingleShot(True)
+        self.breaker_timer.timeout.connect(self.process_next_download)
+
+        # 동시 작업 수 조절 타이머 (다운로드 중에만 판단)
+        self.job_tuner_timer = QTimer(self)
+        self.job_tuner_timer.setInterval(int(TUNE_INTERVAL * 1000))
+        self.job_tuner_timer.timeout.connect(self.tune_concurrency)
+
+        # 검색/필터 상태
+        self.current_filter = "all"
+        self.hidden_items = set()
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(80)
+        self.search_timer.timeout.connect(self.apply_filter)
+
+        # 다운로드 라이브러리 (완료 기록) 검색 인덱스 - 라이브러리 탭을 처음 열 때 생성
+        self.library_index = SearchIndex()
+        self.library_entries = {}
+        self.library_loaded_until = None
+
+        QTimer.singleShot(STARTUP_PAINT_TIMEOUT, self.start_engine_import)
+
+    def start_engine_import(self):
+        """첫 페인트 후 엔진 모듈 로딩 시작 (한 번만)"""
+        if self.engine_thread is not None:
+            return
+        mark_startup('first_paint')
+        self.engine_thread = EngineImportThread()
+        self.engine_thread.loaded.connect(self.finish_startup)
+        self.engine_thread.start()
+
+    def finish_startup(self, seconds: float, error: str):
+        """엔진 모듈 로딩 완료 - 엔진과 UI를 구성하고 저장된 상태 복원"""
+        mark_startup('engine_imported')
+        startup_marks['engine_import_seconds'] = round(seconds, 4)
+        if error:
+            QMessageBox.critical(self, "오류", f"다운로드 엔진을 불러올 수 없습니다:\n{error}")
+            self.close()
+            return
+        self.init_engine()
 
         # 저장된 설정 불러오기
         self.load_settings()
+        self.open_tracer()
 
         self.init_ui()
         self.setup_connections()
+        self.engine_ready = True
+        mark_startup('ui_ready')
+
+        # 이전 세션 대기열은 나눠서 복원 (복원 대상은 지금 저장된 항목까지)
+        self._restore_rows = self.session.load()
+        QTimer.singleShot(0, self.restore_session)
+
+    def init_engine(self):
+        """다운로드 엔진 구성"""
+        from downloader import YouTubeDownloader
+
+        # 변환/병합은 별도 후처리 단계에서 처리 (다운로드는 바로 다음 항목으로 진행)
+        self.postprocessor = PostProcessStage()
+        # 동시 작업 수는 처리량/오류/후처리 부하/디스크 지연을 보고 자동 조절
+        self.job_tuner = JobConcurrencyTuner(postprocessor=self.postprocessor,
+                                             log=self.log_tuner_decision)
+        self.job_slots = JobSlots(INITIAL_CONCURRENT_JOBS)
+        self.downloader = YouTubeDownloader(history=DownloadHistory(), postprocessor=self.postprocessor,
+                                            tuner=self.job_tuner)
+        # 작업 프로파일링 (메뉴로 켜고 끔 - 결과는 로그 옆 profiles 폴더)
+        self.downloader.profiler = ProfileSwitch(profile_dir_for(JOB_TUNER_LOG_FILE),
+                                                 log=self.log_message)
+        self.session = SessionStore(SESSION_FILE)
+        self.search_index = QueueSearchIndex()
+        self.download_items = DownloadQueue(listeners=[self.session, self.search_index])
 
     def should_open_coupang(self):
         """쿠팡 링크 열어야 하는지 확인 (20시간 내 클릭 안했으면 True)"""
@@ -126,6 +395,13 @@ class MainWindow(QMainWindow):
                     if saved_path and os.path.exists(saved_path):
                         self.downloader.set_output_path(saved_path)
                     self.last_coupang_click = settings.get('last_coupang_click', 0)
+                    self.reuse_extraction = settings.get('reuse_extraction', True)
+                    self.downloader.stream_audio = settings.get('stream_audio', True)
+                    self.trace_jobs = settings.get('trace_jobs', False)
+                    self.job_tuner.minimum = max(1, settings.get('min_concurrent_jobs', MIN_CONCURRENT_JOBS))
+                    self.job_tuner.maximum = max(self.job_tuner.minimum,
+                                                 settings.get('max_concurrent_jobs', MAX_CONCURRENT_JOBS))
+                    self.job_slots.set_limit(self.job_tuner.clamp(self.job_slots.limit))
             except:
                 pass
 
@@ -133,7 +409,12 @@ class MainWindow(QMainWindow):
         """설정 저장"""
         settings = {
             'output_path': self.downloader.output_path,
-            'last_coupang_click': self.last_coupang_click
+            'last_coupang_click': self.last_coupang_click,
+            'reuse_extraction': self.reuse_extraction,
+            'stream_audio': self.downloader.stream_audio,
+            'trace_jobs': self.trace_jobs,
+            'min_concurrent_jobs': self.job_tuner.minimum,
+            'max_concurrent_jobs': self.job_tuner.maximum,
         }
         try:
             with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
@@ -141,13 +422,120 @@ class MainWindow(QMainWindow):
         except:
             pass
 
-    def init_ui(self):
-        """UI 초기화"""
-        self.setWindowTitle("YouTube Downloader")
-        self.setMinimumSize(900, 600)
-        self.resize(1000, 700)
+    def restore_session(self):
+        """저장된 대기열을 RESTORE_BATCH_SIZE개씩 이벤트 루프 사이사이에 복원"""
+        if self.session.closed:
+            return
+        if self._restore_rows is None:
+            self._restore_rows = self.session.load()
+
+        self.table.setUpdatesEnabled(False)
+        restored = 0
+        try:
+            for row in self._restore_rows:
+                item = JobRecord(row['url'], row['title'] or "", row['duration'] or 0,
+                                 row['channel'] or "")
+                item.job_id = row['id']
+                item.download_type = row['download_type'] or "video"
+                item.quality = row['quality'] or ""
+                item.progress = row['progress'] or 0.0
+                item.downloaded_bytes = row['downloaded_bytes'] or 0
+                item.total_bytes = row['total_bytes'] or 0
+                item.thumbnail = row['thumbnail'] or ""
+                item.status = JobStatus.parse(row['status'])
+                self.insert_item_row(item)
+                if item.status in RESTORE_AS_PENDING:
+                    self.download_items.set_status(item, JobStatus.QUEUED)
+                if item.status == JobStatus.QUEUED:
+                    self.trace_enqueue(item)
+                self.update_table_item(self.download_items.row_of(item))
+
+                restored += 1
+                if restored >= RESTORE_BATCH_SIZE:
+                    QTimer.singleShot(0, self.restore_session)
+                    return
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.update_item_count()
+
+        self._restore_rows = None
+        self.schedule_thumbnails()
+        if len(self.download_items):
+            self.status_label.setText(f"이전 대기열 {len(self.download_items)}개 복원됨")
+        mark_startup('session_restored')
+        self.startup_finished.emit()
+
+    def schedule_thumbnails(self):
+        """스크롤/크기 변경이 잦을 때 한 번만 처리되도록 썸네일 로딩 예약"""
+        self.thumbnail_timer.start()
+
+    def load_visible_thumbnails(self):
+        """화면에 보이는 행의 썸네일만 표시/요청하고, 벗어난 행의 아이콘은 해제"""
+        visible = set()
+        first = self.table.rowAt(0)
+        if first >= 0:
+            last = self.table.rowAt(self.table.viewport().height() - 1)
+            if last < 0:
+                last = self.table.rowCount() - 1
+            for row in range(first, last + 1):
+                if self.table.isRowHidden(row):
+                    continue
+                item = self.download_items[row]
+                url = item.thumbnail
+                if not url or url in self.thumbnail_failed:
+                    continue
+                pixmap = self.thumbnail_cache.get(url)
+                if pixmap is not None:
+                    if item not in self.thumbnail_shown:
+                        self.table.item(row, 1).setIcon(QIcon(pixmap))
+                    visible.add(item)
+                elif url not in self.thumbnail_pending:
+                    self.thumbnail_pending.add(url)
+                    self.thumbnail_pool.start(
+                        ThumbnailTask(url, self.thumbnail_disk, self.thumbnail_signals)
+                    )
+
+        for item in self.thumbnail_shown - visible:
+            row = self.download_items.row_of(item)
+            if row is not None:
+                self.table.item(row, 1).setIcon(QIcon())
+        self.thumbnail_shown = visible
+
+    def on_thumbnail_loaded(self, url: str, image: QImage):
+        """썸네일 디코딩 완료 - 메모리 캐시에 넣고 보이는 행 갱신"""
+        self.thumbnail_pending.discard(url)
+        if image.isNull():
+            self.thumbnail_failed.add(url)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.thumbnail_cache.put(url, pixmap, image.sizeInBytes())
+        self.schedule_thumbnails()
+
+    def resizeEvent(self, event):
+        """창 크기 변경시 보이는 행이 바뀌므로 썸네일 갱신"""
+        super().resizeEvent(event)
+        if getattr(self, 'engine_ready', False):
+            self.schedule_thumbnails()
+
+    def closeEvent(self, event):
+        """종료시 저장소 정리"""
+        if self.engine_thread is not None:
+            # 엔진 준비 전에 닫은 경우 모듈 로딩이 끝날 때까지만 기다림
+            self.engine_thread.wait()
+        if self.tune_thread is not None:
+            self.tune_thread.wait()
+        if self.session is not None:
+            self.session.close()
+        if self.tracer is not None:
+            self.tracer.close()
+        # 진행 중인 변환은 프로세스 종료 전까지 마저 처리되고 완료 기록도 남김
+        if self.postprocessor is not None:
+            self.postprocessor.shutdown(wait=False)
+        super().closeEvent(event)
 
-        # 중앙 위젯
+    def init_ui(self):
+        """UI 초기화 (창 제목/크기는 시작할 때 설정)"""
+        # 중앙 위젯 (임시 화면 대체)
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         main_layout = QVBoxLayout(central_widget)
@@ -316,6 +704,7 @@ class MainWindow(QMainWindow):
         self.tab_all = QPushButton("전체")
         self.tab_video = QPushButton("동영상")
         self.tab_audio = QPushButton("오디오")
+        self.tab_library = QPushButton("라이브러리")
 
         tab_style = """
             QPushButton {
@@ -334,7 +723,7 @@ class MainWindow(QMainWindow):
                 border-bottom: 2px solid #4CAF50;
             }
         """
-        for btn in [self.tab_all, self.tab_video, self.tab_audio]:
+        for btn in [self.tab_all, self.tab_video, self.tab_audio, self.tab_library]:
             btn.setCheckable(True)
             btn.setStyleSheet(tab_style)
 
@@ -343,8 +732,27 @@ class MainWindow(QMainWindow):
         tab_layout.addWidget(self.tab_all)
         tab_layout.addWidget(self.tab_video)
         tab_layout.addWidget(self.tab_audio)
+        tab_layout.addWidget(self.tab_library)
         tab_layout.addStretch()
 
+        # 검색 (제목, 채널, URL, 상태)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 검색 (제목, 채널, URL, 상태)")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setFixedWidth(260)
+        self.search_input.setStyleSheet("""
+            QLineEdit {
+                padding: 6px 10px;
+                border: 1px solid #ddd;
+                border-radius: 5px;
+                font-size: 12px;
+            }
+            QLineEdit:focus {
+                border-color: #4CAF50;
+            }
+        """)
+        tab_layout.addWidget(self.search_input)
+
         # 항목 수 표시
         self.item_count_label = QLabel("0 아이템")
         self.item_count_label.setStyleSheet("color: #999; font-size: 12px;")
@@ -368,6 +776,8 @@ class MainWindow(QMainWindow):
         self.table.setColumnWidth(4, 150)
         self.table.setColumnWidth(5, 100)
         self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setDefaultSectionSize(THUMBNAIL_SIZE.height() + 12)
+        self.table.setIconSize(THUMBNAIL_SIZE)
         self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.setAlternatingRowColors(True)
         self.table.setStyleSheet("""
@@ -392,7 +802,26 @@ class MainWindow(QMainWindow):
             }
         """)
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        main_layout.addWidget(self.table)
+
+        # 라이브러리 (완료 기록) 테이블
+        self.library_table = QTableWidget()
+        self.library_table.setColumnCount(5)
+        self.library_table.setHorizontalHeaderLabels(["제목", "채널", "형식", "크기", "완료 시각"])
+        self.library_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.library_table.setColumnWidth(1, 150)
+        self.library_table.setColumnWidth(2, 150)
+        self.library_table.setColumnWidth(3, 90)
+        self.library_table.setColumnWidth(4, 140)
+        self.library_table.verticalHeader().setVisible(False)
+        self.library_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.library_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.library_table.setAlternatingRowColors(True)
+        self.library_table.setStyleSheet(self.table.styleSheet())
+
+        self.view_stack = QStackedWidget()
+        self.view_stack.addWidget(self.table)
+        self.view_stack.addWidget(self.library_table)
+        main_layout.addWidget(self.view_stack)
 
         # 하단 상태바 영역
         status_widget = QWidget()
@@ -473,6 +902,37 @@ class MainWindow(QMainWindow):
         stop_action.triggered.connect(self.stop_download)
         download_menu.addAction(stop_action)
 
+        download_menu.addSeparator()
+
+        verify_action = QAction("라이브러리 검사", self)
+        verify_action.triggered.connect(self.verify_library)
+        download_menu.addAction(verify_action)
+
+        reuse_action = QAction("정보 추출 결과 재사용", self)
+        reuse_action.setCheckable(True)
+        reuse_action.setChecked(self.reuse_extraction)
+        reuse_action.toggled.connect(self.set_reuse_extraction)
+        download_menu.addAction(reuse_action)
+
+        stream_action = QAction("받으면서 변환 (MP3/WAV)", self)
+        stream_action.setCheckable(True)
+        stream_action.setChecked(self.downloader.stream_audio)
+        stream_action.toggled.connect(self.set_stream_audio)
+        download_menu.addAction(stream_action)
+
+        download_menu.addSeparator()
+
+        self.profile_action = QAction(f"모든 작업 프로파일링 ({DEFAULT_PROFILE_WINDOW // 60}분)", self)
+        self.profile_action.setCheckable(True)
+        self.profile_action.toggled.connect(self.set_profiling)
+        download_menu.addAction(self.profile_action)
+
+        trace_action = QAction("작업 기록 남기기 (재생용)", self)
+        trace_action.setCheckable(True)
+        trace_action.setChecked(self.trace_jobs)
+        trace_action.toggled.connect(self.set_tracing)
+        download_menu.addAction(trace_action)
+
         # 도움말 메뉴
         help_menu = menubar.addMenu("도움말")
 
@@ -488,11 +948,15 @@ class MainWindow(QMainWindow):
         self.download_btn.clicked.connect(self.on_download_btn_clicked)
         self.path_btn.clicked.connect(self.change_save_path)
         self.table.customContextMenuRequested.connect(self.show_context_menu)
+        self.table.verticalScrollBar().valueChanged.connect(self.schedule_thumbnails)
 
         # 탭 버튼
         self.tab_all.clicked.connect(lambda: self.filter_table("all"))
         self.tab_video.clicked.connect(lambda: self.filter_table("video"))
         self.tab_audio.clicked.connect(lambda: self.filter_table("audio"))
+        self.tab_library.clicked.connect(lambda: self.filter_table("library"))
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.library_table.cellDoubleClicked.connect(self.open_library_file)
 
     def on_download_btn_clicked(self):
         """다운로드 버튼 클릭 핸들러"""
@@ -500,11 +964,76 @@ class MainWindow(QMainWindow):
 
     def update_quality_options(self):
         """다운로드 타입에 따라 화질/품질 옵션 업데이트"""
+        from downloader import YouTubeDownloader
+
         self.quality_combo.clear()
         if self.type_combo.currentText() == "비디오":
             self.quality_combo.addItems(list(YouTubeDownloader.QUALITY_OPTIONS.keys()))
         else:
             self.quality_combo.addItems(list(YouTubeDownloader.AUDIO_FORMATS.keys()))
+            self.quality_combo.addItems(list(YouTubeDownloader.AUDIO_BUNDLES.keys()))
+
+    def set_reuse_extraction(self, enabled: bool):
+        """정보 추출 결과 재사용 설정"""
+        self.reuse_extraction = enabled
+        self.save_settings()
+
+    def set_stream_audio(self, enabled: bool):
+        """받으면서 변환 설정 (끄면 원본을 받은 뒤 변환)"""
+        self.downloader.stream_audio = enabled
+        self.save_settings()
+
+    def set_profiling(self, enabled: bool):
+        """일정 시간 동안 시작하는 모든 작업 프로파일링 (시간이 지나면 메뉴 체크 해제)"""
+        if enabled:
+            self.downloader.profiler.enable_for(DEFAULT_PROFILE_WINDOW)
+            QTimer.singleShot(DEFAULT_PROFILE_WINDOW * 1000, self.refresh_profiling_action)
+            self.status_label.setText(
+                f"프로파일링 켜짐 - 결과: {self.downloader.profiler.directory}")
+        else:
+            self.downloader.profiler.disable()
+
+    def refresh_profiling_action(self):
+        """전체 프로파일링 시간이 끝났으면 메뉴 체크 해제"""
+        if self.profile_action.isChecked() and not self.downloader.profiler.remaining:
+            self.profile_action.setChecked(False)
+
+    def profile_selected(self):
+        """선택한 항목의 다음 다운로드 한 번 프로파일링"""
+        rows = set(idx.row() for idx in self.table.selectedIndexes())
+        for row in rows:
+            self.downloader.profiler.profile_job(self.download_items[row].url)
+        if rows:
+            self.status_label.setText(
+                f"다음 다운로드 {len(rows)}개 프로파일링 - 결과: {self.downloader.profiler.directory}")
+
+    def set_tracing(self, enabled: bool):
+        """작업 수명 주기 기록 설정 (JOB_TRACE_FILE - replay.py로 정책 비교)"""
+        self.trace_jobs = enabled
+        self.open_tracer()
+        self.save_settings()
+        if enabled and self.tracer is not None:
+            self.status_label.setText(f"작업 기록 켜짐 - {self.tracer.path}")
+
+    def open_tracer(self):
+        """설정에 따라 작업 기록 파일 열기 (꺼져 있으면 SONDOWNLOADER_TRACE 환경 변수만 봄)"""
+        if self.tracer is not None:
+            self.tracer.close()
+        self.tracer = open_trace(JOB_TRACE_FILE if self.trace_jobs else None, 'gui',
+                                 log=self.log_message)
+
+    def trace_enqueue(self, item: JobRecord, **fields):
+        """작업 기록에 대기열 추가/재시도 남김"""
+        if self.tracer is None or self.tracer.closed:
+            return
+        if item.trace is None or item.trace.writer is not self.tracer:
+            item.trace = self.tracer.job(item.url, item.download_type, item.quality)
+        else:
+            item.trace.enqueue(**fields)
+
+    def log_message(self, message: str):
+        """프로파일링/작업 기록 메시지 (동시 작업 조절 판단과 같은 로그 파일, 작업 스레드에서 호출됨)"""
+        self.log_tuner_decision(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}")
 
     def paste_url(self):
         """클립보드에서 URL 붙여넣기"""
@@ -522,37 +1051,47 @@ class MainWindow(QMainWindow):
         if not url:
             return
 
-        # shorts URL을 일반 형식으로 변환
-        if '/shorts/' in url:
-            url = url.replace('/shorts/', '/watch?v=')
-
-        if not is_valid_youtube_url(url):
+        # shorts/youtu.be/시간·추적 파라미터가 붙은 주소를 정규 URL로
+        media = parse_media(url)
+        if media is None:
             QMessageBox.warning(self, "오류", "올바른 YouTube URL이 아닙니다.")
             return
+        url = media.url
 
         # 중복 체크
-        for item in self.download_items:
-            if item.url == url:
-                QMessageBox.information(self, "알림", "이미 추가된 URL입니다.")
-                return
+        if self.download_items.find(url) is not None:
+            QMessageBox.information(self, "알림", "이미 추가된 URL입니다.")
+            return
+
+        # 이전에 같은 화질/포맷으로 받은 영상인지 확인
+        download_type = "video" if self.type_combo.currentText() == "비디오" else "audio"
+        previous = self.downloader.history.lookup(
+            url, history_profile(download_type, self.quality_combo.currentText())
+        )
+        if previous:
+            QMessageBox.information(
+                self, "알림", f"이미 다운로드한 영상입니다.\n{previous['output_path']}"
+            )
+            return
 
         # 먼저 리스트에 추가 (서버 연결중 상태로)
-        item = DownloadItem(
+        item = JobRecord(
             url=url,
             title="정보 가져오는 중...",
-            duration="--:--",
+            duration=0,
             channel=""
         )
-        item.status = "서버 연결중"
+        item.status = JobStatus.CONNECTING
         self.add_item_to_table(item)
+        self.trace_enqueue(item)
         self.url_input.clear()
         self.update_item_count()
 
-        # 정보 가져오기 스레드 시작
-        current_row = len(self.download_items) - 1
-        info_thread = DownloadThread(self.downloader, url, 'info')
-        info_thread.info_fetched.connect(lambda info, r=current_row: self.on_info_fetched(info, r))
-        info_thread.finished.connect(lambda s, m, r=current_row: self.on_info_error(s, m, r))
+        # 정보 가져오기 스레드 시작 (행 번호 대신 항목을 기억 - 삭제로 행이 밀려도 안전)
+        info_thread = DownloadThread(self.downloader, url, 'info',
+                                     full_info=self.reuse_extraction)
+        info_thread.info_fetched.connect(lambda info, it=item: self.on_info_fetched(info, it))
+        info_thread.finished.connect(lambda s, m, it=item: self.on_info_error(s, m, it))
         info_thread.start()
 
         # 스레드 참조 유지 (가비지 컬렉션 방지)
@@ -560,22 +1099,27 @@ class MainWindow(QMainWindow):
             self.info_threads = []
         self.info_threads.append(info_thread)
 
-    def on_info_fetched(self, info: dict, row: int):
+    def on_info_fetched(self, info: dict, item: JobRecord):
         """비디오 정보 수신 후 바로 다운로드 시작"""
-        if row >= len(self.download_items):
+        row = self.download_items.row_of(item)
+        if row is None:
             return
 
-        item = self.download_items[row]
         item.title = info['title']
-        item.duration = format_duration(info.get('duration', 0))
+        item.duration = int(info.get('duration') or 0)
         item.channel = info.get('channel', '')
-        item.status = "대기중"
+        item.thumbnail = info.get('thumbnail') or ""
+        item.format_index = info.get('format_index')
+        self.download_items.item_changed(item, 'title', 'duration', 'channel', 'thumbnail')
+        self.schedule_thumbnails()
+        self.schedule_filter()
+        self.download_items.set_status(item, JobStatus.QUEUED)
 
         # 테이블 업데이트
         self.table.item(row, 1).setText(item.title)
         self.table.item(row, 1).setToolTip(f"{item.title}\n채널: {item.channel}\nURL: {item.url}")
-        self.table.item(row, 2).setText(item.duration)
-        self.table.item(row, 3).setText(item.status)
+        self.table.item(row, 2).setText(item.duration_text)
+        self.table.item(row, 3).setText(item.status.label)
 
         self.status_label.setText("준비됨")
 
@@ -585,24 +1129,28 @@ class MainWindow(QMainWindow):
         # 바로 다운로드 시작
         self.start_all_downloads()
 
-    def on_info_error(self, success: bool, message: str, row: int):
+    def on_info_error(self, success: bool, message: str, item: JobRecord):
         """정보 가져오기 에러 - 그래도 다운로드 시도 가능"""
-        if not success and row < len(self.download_items):
-            item = self.download_items[row]
+        row = self.download_items.row_of(item)
+        if not success and row is not None:
             # 정보 가져오기 실패해도 다운로드는 시도 가능
-            item.status = "대기중"
             item.title = "제목 없음 (다운로드 시도 가능)"
+            self.download_items.item_changed(item, 'title')
+            self.download_items.set_status(item, JobStatus.QUEUED)
             self.table.item(row, 1).setText(item.title)
-            self.table.item(row, 3).setText(item.status)
+            self.table.item(row, 3).setText(item.status.label)
             self.status_label.setText("준비됨")
 
-    def add_item_to_table(self, item: DownloadItem):
+    def add_item_to_table(self, item: JobRecord):
         """테이블에 항목 추가"""
         item.download_type = "video" if self.type_combo.currentText() == "비디오" else "audio"
         item.quality = self.quality_combo.currentText()
+        self.insert_item_row(item)
 
-        self.download_items.append(item)
-        row = self.table.rowCount()
+    def insert_item_row(self, item: JobRecord):
+        """대기열과 테이블에 행 추가"""
+        row = self.download_items.add(item)
+        self.schedule_filter()
         self.table.insertRow(row)
 
         # 체크박스 대용 아이콘
@@ -616,11 +1164,11 @@ class MainWindow(QMainWindow):
         self.table.setItem(row, 1, title_item)
 
         # 길이
-        self.table.setItem(row, 2, QTableWidgetItem(item.duration))
+        self.table.setItem(row, 2, QTableWidgetItem(item.duration_text))
         self.table.item(row, 2).setTextAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # 상태
-        self.table.setItem(row, 3, QTableWidgetItem(item.status))
+        self.table.setItem(row, 3, QTableWidgetItem(item.status.label))
         self.table.item(row, 3).setTextAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # 진행률
@@ -642,13 +1190,97 @@ class MainWindow(QMainWindow):
         self.tab_all.setChecked(filter_type == "all")
         self.tab_video.setChecked(filter_type == "video")
         self.tab_audio.setChecked(filter_type == "audio")
+        self.tab_library.setChecked(filter_type == "library")
 
-        for row in range(self.table.rowCount()):
-            if filter_type == "all":
-                self.table.setRowHidden(row, False)
-            else:
-                item = self.download_items[row]
-                self.table.setRowHidden(row, item.download_type != filter_type)
+        self.current_filter = filter_type
+        self.view_stack.setCurrentWidget(
+            self.library_table if filter_type == "library" else self.table
+        )
+        self.apply_filter()
+
+    def schedule_filter(self):
+        """필터/검색이 적용 중이면 새 항목/정보 반영을 위해 다시 필터링 예약"""
+        if self.current_filter != "all" or self.search_input.text().strip():
+            self.search_timer.start()
+
+    def apply_filter(self):
+        """현재 탭과 검색어를 적용 (숨김 상태가 바뀌는 행만 갱신)"""
+        if self.current_filter == "library":
+            self.refresh_library()
+            return
+
+        matches = self.search_index.search(self.search_input.text())
+        if matches is None and self.current_filter == "all":
+            hidden = set()
+        else:
+            candidates = self.download_items if matches is None else matches
+            visible = {item for item in candidates
+                       if self.current_filter == "all" or item.download_type == self.current_filter}
+            hidden = set(self.download_items) - visible
+
+        for item in hidden ^ self.hidden_items:
+            row = self.download_items.row_of(item)
+            if row is not None:
+                self.table.setRowHidden(row, item in hidden)
+        self.hidden_items = hidden
+        self.schedule_thumbnails()
+
+        if matches is not None:
+            self.status_label.setText(f"검색 결과 {len(self.download_items) - len(hidden)}개")
+
+    def update_library_index(self):
+        """완료 기록 중 아직 색인하지 않은 항목을 라이브러리 인덱스에 추가"""
+        for entry in self.downloader.history.entries(self.library_loaded_until or 0.0):
+            doc_id = (entry['video_id'], entry['profile'])
+            title = entry['title'] or os.path.splitext(os.path.basename(entry['output_path'] or ''))[0]
+            entry['title'] = title
+            self.library_entries[doc_id] = entry
+            self.library_index.update(doc_id, title, entry['channel'], entry['video_id'],
+                                      entry['profile'])
+            self.library_loaded_until = max(self.library_loaded_until or 0.0,
+                                            entry['completed_at'] or 0.0)
+        if self.library_loaded_until is None:
+            self.library_loaded_until = 0.0
+
+    def refresh_library(self):
+        """라이브러리 탭 - 검색 결과 중 최근 완료된 LIBRARY_RESULT_LIMIT개 표시"""
+        self.update_library_index()
+
+        matches = self.library_index.search(self.search_input.text())
+        doc_ids = self.library_entries.keys() if matches is None else matches
+        entries = heapq.nlargest(
+            LIBRARY_RESULT_LIMIT,
+            (self.library_entries[doc_id] for doc_id in doc_ids),
+            key=lambda e: e['completed_at'] or 0,
+        )
+
+        self.library_table.setUpdatesEnabled(False)
+        self.library_table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            completed = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['completed_at'] or 0))
+            cells = [
+                entry['title'], entry['channel'] or "", entry['profile'].split(':', 1)[-1],
+                format_filesize(entry['size']), completed,
+            ]
+            for column, text in enumerate(cells):
+                cell = QTableWidgetItem(text)
+                if column == 0:
+                    cell.setToolTip(entry['output_path'] or "")
+                    cell.setData(Qt.ItemDataRole.UserRole, entry['output_path'])
+                self.library_table.setItem(row, column, cell)
+        self.library_table.setUpdatesEnabled(True)
+
+        self.status_label.setText(
+            f"라이브러리 {len(self.library_entries)}개 중 {len(doc_ids)}개 일치"
+        )
+
+    def open_library_file(self, row: int, column: int):
+        """라이브러리 항목 더블클릭 - 파일 열기"""
+        path = self.library_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        if path and os.path.exists(path):
+            os.startfile(path)
+        else:
+            self.status_label.setText("파일을 찾을 수 없습니다")
 
     def show_context_menu(self, pos):
         """컨텍스트 메뉴"""
@@ -657,6 +1289,9 @@ class MainWindow(QMainWindow):
         start_action = menu.addAction("다운로드 시작")
         start_action.triggered.connect(self.start_selected_download)
 
+        profile_action = menu.addAction("다음 다운로드 프로파일링")
+        profile_action.triggered.connect(self.profile_selected)
+
         menu.addSeparator()
 
         delete_action = menu.addAction("삭제")
@@ -673,103 +1308,311 @@ class MainWindow(QMainWindow):
             self.status_label.setText("이미 다운로드 중입니다")
             return
 
-        has_pending = any(item.status == "대기중" for item in self.download_items)
-        if not has_pending:
+        if not self.download_items.has_pending():
             self.status_label.setText("다운로드할 항목이 없습니다")
             return
 
+        self.download_stopped = False
+        self.is_downloading = True
         self.status_label.setText("다운로드 시작...")
         self.process_next_download()
 
     def process_next_download(self):
-        """다음 다운로드 처리"""
-        # 대기 중인 항목 찾기
-        for idx, item in enumerate(self.download_items):
-            if item.status == "대기중":
-                self.start_download(idx)
-                return
+        """빈 슬롯만큼 다음 다운로드 시작 (중지되었으면 무시)"""
+        if not self.is_downloading:
+            return
+        paused = self.breaker.remaining()
+        if paused > 0 and self.download_items.has_pending():
+            # 요청 제한 - 차단기가 풀리면 다시 시작
+            self.status_label.setText(f"요청 제한 감지 - {paused:.0f}초 뒤 다운로드 재개")
+            self.breaker_timer.start(int(paused * 1000) + 100)
+            return
+        while self.download_items.has_pending() and self.job_slots.try_acquire():
+            item = self.download_items.next_pending()
+            self.start_download(self.download_items.row_of(item))
+        if self.slot_items:
+            return
 
         # 모든 다운로드 완료
         self.is_downloading = False
-        self.status_label.setText("모든 다운로드 완료")
+        self.job_tuner_timer.stop()
+        converting = self.download_items.count(JobStatus.CONVERTING)
+        waiting = self.download_items.count(JobStatus.SPACE_WAIT)
+        retrying = self.download_items.count(JobStatus.RETRY_WAIT)
+        if waiting:
+            self.status_label.setText(f"저장 공간 부족 - {waiting}개 보류 중 (공간이 생기면 자동 시작)")
+        elif retrying:
+            self.status_label.setText(f"일시적인 오류 - {retrying}개 잠시 뒤 다시 시도")
+        elif converting:
+            self.status_label.setText(f"다운로드 완료 - 변환 작업 {converting}개 남음")
+        else:
+            self.status_label.setText("모든 다운로드 완료")
 
     def start_download(self, index: int):
-        """특정 항목 다운로드 시작"""
+        """특정 항목 다운로드 시작 (호출 측이 슬롯을 차지한 상태)"""
         if index >= len(self.download_items):
+            self.job_slots.release()
             return
 
         item = self.download_items[index]
-        item.status = "다운로드 중"
+        self.download_items.set_status(item, JobStatus.DOWNLOADING)
         self.update_table_item(index)
 
         self.is_downloading = True
-        self.current_download_index = index
-        self.status_label.setText(f"다운로드 중: {item.title}")
+        self.slot_items.add(item)
+        if not self.job_tuner_timer.isActive():
+            self.job_tuner_timer.start()
+        self.status_label.setText(
+            f"다운로드 중 ({len(self.slot_items)}/{self.job_slots.limit}): {item.title}"
+        )
 
         download_type = item.download_type
         quality = item.quality if download_type == "video" else None
         audio_format = item.quality if download_type == "audio" else None
 
-        self.current_download_thread = DownloadThread(
-            self.downloader, item.url, download_type, quality, audio_format
-        )
-        self.current_download_thread.progress.connect(
-            lambda p: self.on_download_progress(index, p)
+        # 실행이 끝난 스레드 참조 정리
+        self.finished_threads = [t for t in self.finished_threads if not t.isFinished()]
+
+        # 동시에 받는 작업마다 취소 상태가 따로인 다운로더 사용
+        downloader = self.downloader.for_job()
+        if self.tracer is not None and (item.trace is None or item.trace.writer is not self.tracer):
+            # 기록을 켜기 전에 추가된 항목
+            self.trace_enqueue(item)
+        downloader.trace = item.trace if self.tracer is not None else None
+        thread = DownloadThread(
+            downloader, item.url, download_type, quality, audio_format,
+            format_index=item.format_index,
         )
-        self.current_download_thread.finished.connect(
-            lambda s, m: self.on_download_finished(index, s, m)
-        )
-        self.current_download_thread.start()
+        self.download_threads[item] = thread
+        thread.progress.connect(lambda p: self.on_download_progress(item, p))
+        thread.finished.connect(lambda s, m: self.on_download_finished(item, s, m))
+        thread.format_indexed.connect(lambda index: self.on_format_indexed(item, index))
+        thread.start()
 
     def start_selected_download(self):
         """선택된 항목 다운로드 시작"""
         rows = set(idx.row() for idx in self.table.selectedIndexes())
         for row in rows:
-            if self.download_items[row].status == "대기중":
+            if self.download_items[row].status == JobStatus.QUEUED:
+                if not self.job_slots.try_acquire():
+                    self.status_label.setText("동시 작업 수 한도 - 빈 슬롯이 생기면 시작됩니다")
+                    return
                 self.start_download(row)
                 break
 
-    def on_download_progress(self, index: int, progress: dict):
-        """다운로드 진행률 업데이트"""
-        if index >= len(self.download_items):
+    def on_format_indexed(self, item: JobRecord, format_index):
+        """포맷 색인 수신 - 실제 받을 수 있는 해상도와 예상 크기를 툴팁에 표시"""
+        from downloader import YouTubeDownloader
+
+        row = self.download_items.row_of(item)
+        if row is None:
             return
 
-        item = self.download_items[index]
+        lines = [item.title, f"채널: {item.channel}", f"URL: {item.url}"]
+        item.format_index = format_index
+        resolutions = format_index.resolutions()
+        if resolutions:
+            lines.append("")
+            lines.append("받을 수 있는 화질:")
+            lines += [f"  {height}p - 약 {format_filesize(size)}" for height, size in resolutions]
+
+        if item.download_type == "video":
+            format_string = YouTubeDownloader.QUALITY_OPTIONS.get(item.quality)
+        else:
+            name = (YouTubeDownloader.AUDIO_BUNDLES.get(item.quality) or [item.quality])[0]
+            format_string = YouTubeDownloader.AUDIO_FORMATS.get(name, {}).get('format')
+        resolved = format_index.resolve(format_string) if format_string else None
+        if resolved and resolved[1]:
+            item.total_bytes = resolved[1]
+            lines.append(f"선택한 포맷: {resolved[0]} (약 {format_filesize(resolved[1])})")
+            self.download_items.item_changed(item, 'total_bytes')
+
+        self.table.item(row, 1).setToolTip("\n".join(lines))
+
+    def on_download_progress(self, item: JobRecord, progress: dict):
+        """다운로드 진행률 업데이트"""
+        index = self.download_items.row_of(item)
+        if index is None:
+            return
 
         if progress['status'] == 'downloading':
-            item.progress = progress.get('percent', '0%')
-            item.speed = progress.get('speed', '')
-            item.eta = progress.get('eta', '')
-            item.status = "다운로드 중"
+            item.update_progress(progress)
+            self.download_items.set_status(item, JobStatus.DOWNLOADING)
+            self.download_items.item_changed(item, 'progress', 'downloaded_bytes', 'total_bytes')
         elif progress['status'] == 'processing':
-            item.status = "변환 중"
-            item.progress = "100%"
+            self.download_items.set_status(item, JobStatus.CONVERTING)
+            item.finish_transfer()
+        elif progress['status'] == 'postprocessing':
+            # 후처리 단계로 넘어감 - 변환이 끝나기 전에 다음 다운로드 시작
+            self.download_items.set_status(item, JobStatus.CONVERTING)
+            item.finish_transfer()
+            self.release_download_slot(item)
         elif progress['status'] == 'finished':
-            item.status = "완료"
-            item.progress = "100%"
+            self.download_items.set_status(item, JobStatus.DOWNLOADED)
+            item.finish_transfer()
 
         self.update_table_item(index)
 
-    def on_download_finished(self, index: int, success: bool, message: str):
-        """다운로드 완료"""
-        if index >= len(self.download_items):
+    def release_download_slot(self, item: JobRecord):
+        """항목이 슬롯을 차지하고 있으면 반납하고 다음 다운로드 예약"""
+        if item in self.slot_items:
+            self.slot_items.discard(item)
+            self.job_slots.release()
+            QTimer.singleShot(500, self.process_next_download)
+
+    def tune_concurrency(self):
+        """지난 구간 지표로 동시 작업 수를 조절하고, 늘었으면 빈 슬롯만큼 시작"""
+        if not self.is_downloading:
+            self.job_tuner_timer.stop()
+            return
+        if self.tune_thread is not None and self.tune_thread.isRunning():
+            # 지난 측정이 아직 끝나지 않음 (느린 저장 폴더)
             return
+        self.job_tuner.probe_dir = self.downloader.output_path
+        self.tune_thread = TuneThread(self.job_tuner, self.job_slots)
+        self.tune_thread.tuned.connect(self.on_concurrency_tuned)
+        self.tune_thread.start()
 
-        item = self.download_items[index]
+    def on_concurrency_tuned(self, limit: int):
+        """조절 결과 반영 - 한도가 늘었으면 빈 슬롯만큼 시작"""
+        self.process_next_download()
 
-        if success:
-            item.status = "✓ 완료"
-            item.progress = "100%"
-        else:
-            item.status = "✗ 실패"
-            if "취소" in message:
-                item.status = "취소됨"
+    def log_tuner_decision(self, decision: str):
+        """동시 작업 수 조절 판단 기록"""
+        try:
+            with open(JOB_TUNER_LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(decision + "\n")
+        except:
+            pass
 
-        item.speed = ""
-        self.update_table_item(index)
+    def on_download_finished(self, item: JobRecord, success: bool, message: str):
+        """다운로드 완료"""
+        from downloader import INSUFFICIENT_SPACE_MESSAGE
+
+        thread = self.download_threads.pop(item, None)
+        if thread is not None:
+            self.finished_threads.append(thread)
+        if not message.startswith(INSUFFICIENT_SPACE_MESSAGE):
+            item.format_index = None
+            if "취소" not in message:
+                self.job_tuner.record_result(success)
+
+        index = self.download_items.row_of(item)
+        if index is not None:
+            if success:
+                self.breaker.record_success()
+                self.download_items.set_status(item, JobStatus.DONE)
+                item.progress = 100.0
+            elif "취소" in message:
+                self.download_items.set_status(item, JobStatus.CANCELLED)
+            elif (message.startswith(INCOMPLETE_DOWNLOAD_MESSAGE)
+                  and item.integrity_retries < MAX_INTEGRITY_RETRIES):
+                # 누락 조각/크기 부족 - 파일은 이미 지워졌으므로 다시 받음
+                item.integrity_retries += 1
+                self.download_items.set_status(item, JobStatus.QUEUED)
+                self.trace_enqueue(item, retry='integrity')
+                self.table.item(index, 3).setToolTip(message)
+            elif message.startswith(INSUFFICIENT_SPACE_MESSAGE):
+                # 실패가 아니라 보류 - 다른 작업이 끝나거나 일정 시간 후 다시 시도
+                self.download_items.set_status(item, JobStatus.SPACE_WAIT)
+                self.table.item(index, 3).setToolTip(message)
+                self.space_retry_timer.start()
+            else:
+                self.retry_or_fail(item, index, message)
+
+            item.speed = 0.0
+            item.eta = 0
+            self.download_items.item_changed(item, 'status', 'progress')
+            self.update_table_item(index)
+
+            # 라이브러리 인덱스가 만들어져 있으면 새 완료 기록 반영
+            if success and self.library_loaded_until is not None:
+                self.update_library_index()
+
+            # 작업이 끝나 예약이 반납되었으므로 보류된 항목 다시 확인
+            if (item.status != JobStatus.SPACE_WAIT
+                    and self.download_items.count(JobStatus.SPACE_WAIT)):
+                QTimer.singleShot(0, self.retry_space_waiting)
 
         # 다음 다운로드 처리
-        QTimer.singleShot(500, self.process_next_download)
+        self.release_download_slot(item)
+
+    def verify_library(self):
+        """완료 기록과 파일을 대조해 손상된 항목을 다시 받음"""
+        if getattr(self, 'verify_thread', None) is not None and self.verify_thread.isRunning():
+            return
+        self.status_label.setText("라이브러리 검사 중...")
+        self.verify_thread = VerifyThread(self.downloader.history)
+        self.verify_thread.verified.connect(self.on_library_verified)
+        self.verify_thread.start()
+
+    def on_library_verified(self, corrupt: list):
+        """라이브러리 검사 결과 - 손상/누락 파일은 기록을 지우고 대기열에 다시 추가"""
+        requeued = 0
+        for entry in corrupt:
+            item = requeue_entry(self.downloader.history, entry)
+            if item is None or self.download_items.find(item.url) is not None:
+                continue
+            item.title = item.title or item.url
+            self.insert_item_row(item)
+            requeued += 1
+
+        if self.library_loaded_until is not None:
+            # 지운 기록을 라이브러리 인덱스에서도 빼도록 처음부터 다시 색인
+            self.library_index = SearchIndex()
+            self.library_entries = {}
+            self.library_loaded_until = None
+            if self.current_filter == "library":
+                self.refresh_library()
+
+        self.update_item_count()
+        self.status_label.setText(
+            f"라이브러리 검사 완료 - 문제 {len(corrupt)}개, {requeued}개 다시 받기"
+        )
+        if requeued:
+            self.start_all_downloads()
+
+    def retry_or_fail(self, item: JobRecord, index: int, message: str):
+        """실패 원인을 분류해 일시적인 오류면 백오프 후 다시 시도, 아니면 바로 실패"""
+        kind = classify_error(message)
+        self.breaker.record_failure(kind)
+        delay = self.retry_policy.delay(kind, item.error_retries)
+        self.table.item(index, 3).setToolTip(f"{ERROR_LABELS[kind]}: {message}")
+        if delay is None:
+            self.download_items.set_status(item, JobStatus.FAILED)
+            return
+        if kind == ERROR_RATE_LIMITED:
+            delay = max(delay, self.breaker.remaining())
+        item.error_retries += 1
+        self.download_items.set_status(item, JobStatus.RETRY_WAIT)
+        QTimer.singleShot(int(delay * 1000), lambda: self.retry_waiting_item(item, kind))
+
+    def retry_waiting_item(self, item: JobRecord, kind: str):
+        """재시도 대기가 끝난 항목을 대기 상태로 되돌려 다시 시작 (그 사이 중지/삭제되었으면 무시)"""
+        index = self.download_items.row_of(item)
+        if index is None or item.status != JobStatus.RETRY_WAIT:
+            return
+        self.download_items.set_status(item, JobStatus.QUEUED)
+        self.trace_enqueue(item, retry=kind)
+        self.update_table_item(index)
+        if self.is_downloading:
+            self.process_next_download()
+        elif not self.download_stopped:
+            self.start_all_downloads()
+
+    def retry_space_waiting(self):
+        """
+        저장 공간 부족으로 보류된 항목을 대기 상태로 되돌려 다시 시도
+
+        사용자가 중지한 뒤에는 대기 상태로만 되돌리고 시작하지 않음
+        """
+        waiting = self.download_items.items_with(JobStatus.SPACE_WAIT)
+        for item in waiting:
+            self.download_items.set_status(item, JobStatus.QUEUED)
+            self.trace_enqueue(item, retry='space')
+            self.update_table_item(self.download_items.row_of(item))
+        if waiting and not self.is_downloading and not self.download_stopped:
+            self.start_all_downloads()
 
     def update_table_item(self, index: int):
         """테이블 항목 업데이트"""
@@ -778,16 +1621,16 @@ class MainWindow(QMainWindow):
 
         item = self.download_items[index]
 
-        self.table.item(index, 3).setText(item.status)
-        self.table.item(index, 4).setText(str(item.progress))
-        self.table.item(index, 5).setText(item.speed)
+        self.table.item(index, 3).setText(item.status.label)
+        self.table.item(index, 4).setText(item.progress_text)
+        self.table.item(index, 5).setText(item.speed_text)
 
         # 상태에 따른 색상
-        if "완료" in item.status:
+        if item.status in (JobStatus.DONE, JobStatus.DOWNLOADED):
             color = QColor("#4CAF50")
-        elif "실패" in item.status:
+        elif item.status == JobStatus.FAILED:
             color = QColor("#f44336")
-        elif "다운로드 중" in item.status or "변환 중" in item.status:
+        elif item.status in ACTIVE_STATUSES:
             color = QColor("#2196F3")
         else:
             color = QColor("#666")
@@ -795,32 +1638,38 @@ class MainWindow(QMainWindow):
         self.table.item(index, 3).setForeground(color)
 
     def stop_download(self):
-        """다운로드 중지"""
-        self.downloader.cancel_download()
+        """다운로드 중지 (실행 중인 모든 작업 취소)"""
+        for thread in self.download_threads.values():
+            thread.downloader.cancel_download()
+        # 재시도를 기다리던 항목은 다시 시작하지 않고 대기 상태로
+        for item in self.download_items.items_with(JobStatus.RETRY_WAIT):
+            self.download_items.set_status(item, JobStatus.QUEUED)
+            self.update_table_item(self.download_items.row_of(item))
         self.is_downloading = False
+        self.download_stopped = True
+        self.job_tuner_timer.stop()
+        self.breaker_timer.stop()
+        self.space_retry_timer.stop()
         self.status_label.setText("다운로드 중지됨")
 
     def delete_selected(self):
         """선택된 항목 삭제"""
-        rows = sorted(set(idx.row() for idx in self.table.selectedIndexes()), reverse=True)
-        for row in rows:
-            if row < len(self.download_items):
-                del self.download_items[row]
-                self.table.removeRow(row)
+        rows = set(idx.row() for idx in self.table.selectedIndexes())
+        for row in self.download_items.remove_rows(rows):
+            self.table.removeRow(row)
         self.update_item_count()
+        self.schedule_thumbnails()
 
     def clear_completed(self):
         """완료된 항목 삭제"""
-        rows_to_delete = []
-        for idx, item in enumerate(self.download_items):
-            if "완료" in item.status:
-                rows_to_delete.append(idx)
+        completed = self.download_items.items_with(JobStatus.DONE, JobStatus.DOWNLOADED)
+        rows = [self.download_items.row_of(item) for item in completed]
 
-        for row in reversed(rows_to_delete):
-            del self.download_items[row]
+        for row in self.download_items.remove_rows(rows):
             self.table.removeRow(row)
 
         self.update_item_count()
+        self.schedule_thumbnails()
 
     def copy_selected_url(self):
         """선택된 항목 URL 복사"""
@@ -857,7 +1706,18 @@ class MainWindow(QMainWindow):
         )
 
 
+def report_startup():
+    """시작 단계별 시각을 JSON 한 줄로 출력 (startup_benchmark.py가 읽음)"""
+    print(json.dumps({'started_at': STARTUP_STARTED_AT, 'marks': startup_marks}), flush=True)
+    QApplication.quit()
+
+
 def main():
+    # --startup-benchmark: 대기열 복원까지 마치면 단계별 시각을 출력하고 종료
+    benchmark = '--startup-benchmark' in sys.argv
+    if benchmark:
+        sys.argv.remove('--startup-benchmark')
+
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
 
@@ -866,7 +1726,10 @@ def main():
     app.setFont(font)
 
     window = MainWindow()
+    if benchmark:
+        window.startup_finished.connect(report_startup)
     window.show()
+    mark_startup('shown')
 
     sys.exit(app.exec())
 
@@ -0,0 +1,100 @@
+"""
+미디어 ID 모듈
+지원하는 모든 YouTube URL을 종류가 있는 미디어 ID(영상, 쇼츠, 재생목록)로 정규화
+
+같은 영상이 watch/youtu.be/shorts/embed 주소나 시간(t=), 추적 파라미터(si=, feature= 등)가
+붙은 주소로 들어와도 같은 키가 되므로 중복 검사, 완료 기록, 캐시가 모두 이 키를 쓴다.
+GUI, 다운로드 엔진, 네이티브 호스트가 함께 쓰며 yt-dlp 없이 불러올 수 있다.
+"""
+import functools
+import re
+from typing import Iterable, List, NamedTuple, Optional
+
+# 미디어 종류
+MEDIA_VIDEO = 'video'
+MEDIA_SHORT = 'short'
+MEDIA_PLAYLIST = 'playlist'
+
+# 주소 전체 (호스트 + 경로의 ID 또는 쿼리) - 앞뒤 공백 허용
+_URL_PATTERN = re.compile(
+    r'^\s*(?:https?://)?(?:(?:www|m|music)\.)?(?:'
+    r'youtu\.be/(?P<link>[\w-]{11})'
+    r'|youtube(?:-nocookie)?\.com/(?:'
+    r'(?P<path>shorts|embed|v|live)/(?P<path_id>[\w-]{11})'
+    r'|(?:watch|playlist)/?\?(?P<query>[^#\s]*)'
+    r'))(?:[/?&#]\S*)?\s*$',
+    re.IGNORECASE,
+)
+_VIDEO_PARAM = re.compile(r'(?:^|&)v=([\w-]{11})(?:&|$)')
+_LIST_PARAM = re.compile(r'(?:^|&)list=([\w-]+)')
+
+# parse_media 결과 캐시 크기 (같은 URL을 여러 모듈에서 반복해 정규화함)
+PARSE_CACHE_SIZE = 4096
+
+
+class MediaId(NamedTuple):
+    """정규화된 미디어 ID"""
+    kind: str  # MEDIA_VIDEO / MEDIA_SHORT / MEDIA_PLAYLIST
+    id: str
+
+    @property
+    def key(self) -> str:
+        """중복 검사/기록 키 (video:ID, playlist:ID) - 쇼츠는 같은 영상의 watch 주소와 같은 키"""
+        return f"{MEDIA_PLAYLIST if self.kind == MEDIA_PLAYLIST else MEDIA_VIDEO}:{self.id}"
+
+    @property
+    def url(self) -> str:
+        """정규 URL (시간/추적 파라미터 없음)"""
+        if self.kind == MEDIA_PLAYLIST:
+            return f"https://www.youtube.com/playlist?list={self.id}"
+        return f"https://www.youtube.com/watch?v={self.id}"
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_media(url: str) -> Optional[MediaId]:
+    """URL의 미디어 ID (지원하지 않는 주소면 None)"""
+    match = _URL_PATTERN.match(url)
+    if match is None:
+        return None
+    if match.group('link'):
+        return MediaId(MEDIA_VIDEO, match.group('link'))
+    if match.group('path_id'):
+        kind = MEDIA_SHORT if match.group('path').lower() == 'shorts' else MEDIA_VIDEO
+        return MediaId(kind, match.group('path_id'))
+    # watch?v=ID&list=... 는 영상 하나 (재생목록은 playlist?list= 또는 v 없는 watch?list=)
+    query = match.group('query')
+    video = _VIDEO_PARAM.search(query)
+    if video:
+        return MediaId(MEDIA_VIDEO, video.group(1))
+    playlist = _LIST_PARAM.search(query)
+    if playlist:
+        return MediaId(MEDIA_PLAYLIST, playlist.group(1))
+    return None
+
+
+def is_valid_youtube_url(url: str) -> bool:
+    """YouTube URL 유효성 검사"""
+    return parse_media(url) is not None
+
+
+def canonical_key(url: str) -> str:
+    """URL을 중복 검사용 정규화 키로 변환 (video:ID / playlist:ID, 지원하지 않는 주소는 그대로)"""
+    media = parse_media(url)
+    return media.key if media else url.strip()
+
+
+def canonical_url(url: str) -> str:
+    """정규 URL (지원하지 않는 주소는 앞뒤 공백만 제거)"""
+    media = parse_media(url)
+    return media.url if media else url.strip()
+
+
+def parse_many(urls: Iterable[str]) -> List[Optional[MediaId]]:
+    """
+    여러 URL 한꺼번에 정규화 (수천 개 파일 입력용 - 결과 캐시를 거치지 않음)
+
+    Returns:
+        입력 순서대로 미디어 ID (지원하지 않는 URL은 None)
+    """
+    parse = parse_media.__wrapped__
+    return [parse(url) for url in urls]
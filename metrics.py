@@ -0,0 +1,341 @@
+"""
+작업 지표 모듈
+작업 단계별 소요 시간, 받은 바이트, 재시도, 오류를 기록하고
+프로세스 전체 히스토그램/카운터로 모아 Prometheus 텍스트 형식과 JSON으로 내보냄
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 작업 단계
+PHASE_OEMBED = 'oembed'          # oEmbed 빠른 정보
+PHASE_EXTRACT = 'extract'        # yt-dlp 정보 추출과 포맷 선택
+PHASE_PLAYER_JS = 'player_js'    # 플레이어 JS 다운로드 (추출 시간에도 포함됨)
+PHASE_TRANSFER = 'transfer'      # 포맷 다운로드 (받으면서 변환하면 인코딩 포함)
+PHASE_MERGE = 'merge'            # 영상+오디오 병합
+PHASE_TRANSCODE = 'transcode'    # 오디오 변환
+PHASES = (PHASE_OEMBED, PHASE_EXTRACT, PHASE_PLAYER_JS, PHASE_TRANSFER, PHASE_MERGE,
+          PHASE_TRANSCODE)
+
+# 작업 결과
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+
+# 소요 시간 히스토그램 구간 상한 (초)
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+                   600.0, 1800.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """레이블 값별 누적 카운터"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        """labels(레이블 값 튜플)의 값을 amount만큼 증가"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_number(value)}"
+                for key, value in values]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [{'labels': dict(zip(self.labels, key)), 'value': value} for key, value in values]
+
+
+class Histogram:
+    """
+    레이블 값별 히스토그램
+
+    구간마다 개수만 세므로 observe()는 이진 탐색 한 번과 덧셈 몇 번이다.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = SECONDS_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # 레이블 → [구간별 개수 (마지막은 +Inf), 합계, 개수]
+        self._values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, labels: Labels = ()) -> int:
+        with self._lock:
+            state = self._values.get(labels)
+            return state[2] if state else 0
+
+    def _cumulative(self) -> List[Tuple[Labels, List[Tuple[float, int]], float, int]]:
+        with self._lock:
+            values = sorted((key, list(state[0]), state[1], state[2])
+                            for key, state in self._values.items())
+        result = []
+        for key, counts, total, count in values:
+            running = 0
+            buckets = []
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                running += bucket_count
+                buckets.append((bound, running))
+            result.append((key, buckets, total, count))
+        return result
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, buckets, total, count in self._cumulative():
+            for bound, running in buckets:
+                labels = _format_labels(self.labels, key, f'le="{_format_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{
+            'labels': dict(zip(self.labels, key)),
+            'count': count,
+            'sum': round(total, 6),
+            'buckets': {_format_number(bound): running for bound, running in buckets},
+        } for key, buckets, total, count in self._cumulative()]
+
+
+class MetricsRegistry:
+    """지표 모음 (이름이 같으면 같은 지표를 돌려줌)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name}은 이미 {metric.kind}로 등록됨")
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = SECONDS_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labels, buckets)
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON으로 내보낼 수 있는 현재 값"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: {'type': metric.kind, 'help': metric.help,
+                              'values': metric.snapshot()} for metric in metrics}
+
+
+# 프로세스 전체 지표
+REGISTRY = MetricsRegistry()
+PHASE_SECONDS = REGISTRY.histogram(
+    'sondownloader_phase_seconds', "작업 단계별 소요 시간 (초)", ('phase',))
+PHASE_ERRORS = REGISTRY.counter(
+    'sondownloader_phase_errors_total', "작업 단계별 오류 수", ('phase',))
+JOB_SECONDS = REGISTRY.histogram(
+    'sondownloader_job_seconds', "작업 전체 소요 시간 (초)", ('type', 'status'))
+JOBS = REGISTRY.counter(
+    'sondownloader_jobs_total', "끝난 작업 수", ('type', 'status'))
+RECEIVED_BYTES = REGISTRY.counter(
+    'sondownloader_received_bytes_total', "받은 바이트", ('type',))
+RETRIES = REGISTRY.counter(
+    'sondownloader_retries_total', "재시도/요청 제한 수", ('type',))
+
+
+def observe_phase(phase: str, seconds: float, failed: bool = False):
+    """작업 밖에서 잰 단계 시간 기록 (정보 가져오기 등)"""
+    PHASE_SECONDS.observe(seconds, (phase,))
+    if failed:
+        PHASE_ERRORS.inc((phase,))
+
+
+def job_status(success: bool, message: str) -> str:
+    """완료 콜백 인자로 작업 결과 분류"""
+    if success:
+        return STATUS_DONE
+    return STATUS_CANCELLED if "취소" in message else STATUS_FAILED
+
+
+class JobMetrics:
+    """
+    작업 하나의 단계별 시간과 받은 바이트/재시도/오류
+
+    단계 시간은 단계가 끝날 때마다 프로세스 히스토그램에 바로 반영하고 (취소된 작업도 남음),
+    finish()에서 작업 전체 시간과 결과를 반영한다.
+    같은 단계가 여러 번이면 (영상/오디오 포맷 전송 등) 작업 안에서는 합산한다.
+    download_type 없이 만들면 단계 시간만 기록한다 (작업 전 정보 가져오기).
+    trace(job_trace.JobTrace)를 주면 시작/단계/받은 바이트/끝을 작업 기록에도 남긴다.
+    """
+
+    def __init__(self, download_type: str = None, trace=None):
+        self.download_type = download_type
+        self.trace = trace
+        self.phases: Dict[str, float] = {}
+        self.errors: Dict[str, int] = {}
+        self.bytes = 0
+        self.retries = 0
+        self.status: Optional[str] = None
+        self._started = time.monotonic()
+        self._finished: Optional[float] = None
+        self._open: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if trace is not None:
+            trace.start(download_type)
+
+    def start(self, phase: str):
+        """단계 시작 (이미 진행 중이면 그대로)"""
+        with self._lock:
+            if phase in self._open:
+                return
+            self._open[phase] = time.monotonic()
+        if self.trace is not None:
+            self.trace.phase(phase, 'start')
+
+    def stop(self, phase: str, failed: bool = False):
+        """단계 끝 (진행 중이 아니면 무시)"""
+        with self._lock:
+            started = self._open.pop(phase, None)
+        if started is not None:
+            self.add(phase, time.monotonic() - started, failed)
+            if failed:
+                self.error(phase)
+
+    def running(self, phase: str) -> bool:
+        return phase in self._open
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """with 블록을 한 단계로 기록 (예외가 나면 그 단계 오류)"""
+        self.start(phase)
+        try:
+            yield
+        except BaseException:
+            self.stop(phase, failed=True)
+            raise
+        self.stop(phase)
+
+    def add(self, phase: str, seconds: float, failed: bool = False):
+        """따로 잰 단계 시간 추가 (후처리 단계가 잰 병합/변환 시간 등)"""
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        PHASE_SECONDS.observe(seconds, (phase,))
+        if self.trace is not None:
+            self.trace.phase(phase, 'end', seconds, failed)
+
+    def error(self, phase: str):
+        with self._lock:
+            self.errors[phase] = self.errors.get(phase, 0) + 1
+        PHASE_ERRORS.inc((phase,))
+
+    def record_bytes(self, count: int):
+        if count > 0:
+            self.bytes += count
+            if self.trace is not None:
+                self.trace.progress(self.bytes)
+
+    def retry(self):
+        self.retries += 1
+
+    def finish(self, status: str, message: str = '') -> Dict[str, Any]:
+        """작업 끝 - 열린 단계를 닫고 전체 지표에 반영 (두 번째 호출부터는 요약만 반환)"""
+        with self._lock:
+            if self._finished is not None:
+                first = False
+            else:
+                first = True
+                self._finished = time.monotonic()
+                self.status = status
+            open_phases = list(self._open) if first else []
+        for phase in open_phases:
+            self.stop(phase)
+        if first and self.download_type:
+            labels = (self.download_type,)
+            JOB_SECONDS.observe(self._finished - self._started, (self.download_type, status))
+            JOBS.inc((self.download_type, status))
+            RECEIVED_BYTES.inc(labels, self.bytes)
+            if self.retries:
+                RETRIES.inc(labels, self.retries)
+        summary = self.summary()
+        if first and self.trace is not None:
+            self.trace.finish(status, message, seconds=summary['seconds'], bytes=self.bytes,
+                              retries=self.retries)
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        """작업 지표 요약 (결과 이벤트/로그용)"""
+        end = self._finished if self._finished is not None else time.monotonic()
+        with self._lock:
+            phases = {phase: round(seconds, 3) for phase, seconds in self.phases.items()}
+            errors = dict(self.errors)
+        return {
+            'seconds': round(end - self._started, 3),
+            'phases': phases,
+            'bytes': self.bytes,
+            'retries': self.retries,
+            'errors': errors,
+        }
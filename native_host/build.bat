@@ -10,7 +10,7 @@ cd /d "%~dp0"
 
 :: PyInstaller로 exe 빌드
 echo PyInstaller로 빌드 중...
-pyinstaller --onefile --noconsole --name=native_host native_host.py
+pyinstaller --onefile --noconsole --paths=.. --name=native_host native_host.py
 
 :: 빌드된 exe 복사
 if exist "dist\native_host.exe" (
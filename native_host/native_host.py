@@ -5,6 +5,7 @@ Chrome 확장프로그램과 통신하여 yt-dlp로 다운로드 수행
 """
 import sys
 import os
+import copy
 import threading
 
 # 로그 파일 - 가장 먼저 설정
@@ -42,10 +43,92 @@ log("Loading yt_dlp...")
 import yt_dlp
 log("yt_dlp loaded")
 
+# 저장소 루트의 공용 모듈 사용 (PyInstaller 빌드시에는 --paths로 포함됨)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from download_history import DownloadHistory, history_profile
+from downloader import StagedYoutubeDL, TunedYoutubeDL, YouTubeDownloader
+from job_record import JobRecord
+from job_trace import open_trace
+from job_tuner import JobConcurrencyTuner, JobSlots
+from media_id import canonical_url
+from metrics import PHASE_EXTRACT, PHASE_MERGE, PHASE_TRANSCODE, REGISTRY, JobMetrics
+from postprocess import PostProcessStage
+from profiling import DEFAULT_PROFILE_WINDOW, ProfileSwitch, profile_dir_for
+
+
+# 프로파일링 스위치 상태 파일 (요청마다 새 프로세스가 떠도 유지) - 결과는 로그 옆 폴더
+PROFILE_CONTROL_FILE = os.path.join(os.path.expanduser('~'), 'son_downloader_profiling.json')
+PROFILE_DIR = profile_dir_for(LOG_FILE, 'son_downloader_profiles')
 
 # 기본 다운로드 경로 (사용자 Videos 폴더)
 DEFAULT_DOWNLOAD_PATH = os.path.join(os.path.expanduser('~'), 'Videos')
 
+# 확장프로그램 요청 → GUI와 같은 기록 프로필 (GUI에서 받은 영상도 중복으로 인식)
+PROFILE_NAMES = {
+    ('video', 'best'): history_profile('video', '최고 화질'),
+    ('video', '720'): history_profile('video', '720p'),
+    ('audio', 'best'): history_profile('audio', 'MP3 (320kbps)'),
+    ('audio', '720'): history_profile('audio', 'MP3 (320kbps)'),
+}
+
+
+def get_profile(format_type, quality):
+    """다운로드 요청의 기록 프로필"""
+    return PROFILE_NAMES.get((format_type, quality)) or history_profile(format_type, quality)
+
+
+_history = None
+_postprocessor = None
+_job_slots = None
+_job_tuner = None
+_profiler = None
+_tracer = None
+
+
+def get_postprocessor():
+    """후처리 단계 (변환/병합 ffmpeg 작업을 코어 수로 제한하고 낮은 우선순위로 실행)"""
+    global _postprocessor
+    if _postprocessor is None:
+        _postprocessor = PostProcessStage()
+    return _postprocessor
+
+
+def get_job_slots():
+    """동시 다운로드 슬롯 (처음 사용할 때 조절 스레드 시작 - 판단은 로그 파일에 기록)"""
+    global _job_slots, _job_tuner
+    if _job_slots is None:
+        _job_tuner = JobConcurrencyTuner(postprocessor=get_postprocessor(), log=log)
+        _job_slots = JobSlots()
+        _job_tuner.run(_job_slots)
+    return _job_slots, _job_tuner
+
+
+def get_profiler():
+    """작업 프로파일링 스위치"""
+    global _profiler
+    if _profiler is None:
+        _profiler = ProfileSwitch(PROFILE_DIR, log=log, control_file=PROFILE_CONTROL_FILE)
+    return _profiler
+
+
+def get_tracer():
+    """작업 기록 파일 (SONDOWNLOADER_TRACE 환경 변수로 지정한 경우만, 아니면 None)"""
+    global _tracer
+    if _tracer is None:
+        _tracer = open_trace(None, 'native_host', log=log) or False
+    return _tracer or None
+
+
+def get_history():
+    """다운로드 기록 (처음 사용할 때 열기)"""
+    global _history
+    if _history is None:
+        try:
+            _history = DownloadHistory()
+        except Exception as e:
+            log(f"History open error: {e}")
+    return _history
+
 def get_message():
     """확장프로그램에서 메시지 읽기"""
     raw_length = sys.stdin.buffer.read(4)
@@ -158,6 +241,9 @@ def main():
 
             action = message.get('action')
             url = message.get('url')
+            if url:
+                # 페이지 주소의 시간/재생목록/추적 파라미터 제거 (GUI와 같은 기록 키)
+                url = canonical_url(url)
             quality = message.get('quality', 'best')
             format_type = message.get('format', 'video')
             msg_id = message.get('_id')  # 메시지 ID 추출
@@ -215,6 +301,21 @@ if ($result -eq [System.Windows.Forms.DialogResult]::OK) {{
                 except Exception as e:
                     send_message({'status': 'error', 'error': str(e)}, msg_id)
 
+            elif action == 'getMetrics':
+                # 이 프로세스에서 받은 작업의 단계별 시간/바이트/재시도/오류
+                send_message({'metrics': REGISTRY.snapshot(), 'text': REGISTRY.render()}, msg_id)
+
+            elif action == 'setProfiling':
+                # url이 있으면 그 영상의 다음 다운로드, 없으면 seconds 동안 모든 다운로드
+                profiler = get_profiler()
+                if not message.get('enabled', True):
+                    profiler.disable()
+                elif url:
+                    profiler.profile_job(url)
+                else:
+                    profiler.enable_for(message.get('seconds') or DEFAULT_PROFILE_WINDOW)
+                send_message({'success': True, **profiler.state()}, msg_id)
+
             elif action == 'getUrl':
                 result = get_download_url(url, quality, format_type)
                 send_message(result, msg_id)
@@ -227,8 +328,34 @@ if ($result -eq [System.Windows.Forms.DialogResult]::OK) {{
                 # 진행률 파일 경로
                 progress_file = os.path.join(os.path.expanduser('~'), 'son_downloader_progress.json')
 
+                # 이미 받은 영상이면 다운로드 없이 완료 처리
+                history = get_history()
+                profile = get_profile(format_type, quality)
+                previous = history.lookup(url, profile) if history else None
+                if previous:
+                    log(f"Already downloaded: {url} -> {previous['output_path']}")
+                    try:
+                        with open(progress_file, 'w', encoding='utf-8') as f:
+                            json.dump({
+                                'status': 'complete',
+                                'percent': 100,
+                                'title': os.path.basename(previous['output_path']),
+                                'error': '',
+                                'path': os.path.dirname(previous['output_path']),
+                                'skipped': True,
+                            }, f, ensure_ascii=False)
+                    except:
+                        pass
+                    send_message({
+                        'success': True,
+                        'message': '이미 다운로드됨',
+                        'path': os.path.dirname(previous['output_path']),
+                        'skipped': True,
+                    }, msg_id)
+                    continue
+
                 # 백그라운드 스레드에서 다운로드 실행
-                def do_download(video_url, download_path, fmt_type, qual):
+                def do_download(video_url, download_path, fmt_type, qual, profile):
                     def save_progress(status, percent=0, title='', error=''):
                         try:
                             with open(progress_file, 'w', encoding='utf-8') as f:
@@ -242,17 +369,32 @@ if ($result -eq [System.Windows.Forms.DialogResult]::OK) {{
                         except:
                             pass
 
+                    received = {}
+                    record = JobRecord(video_url, download_type=fmt_type, quality=qual)
+                    tracer = get_tracer()
+                    job_trace = tracer.job(video_url, fmt_type, qual) if tracer else None
+
                     def progress_hook(d):
                         if d['status'] == 'downloading':
-                            percent = 0
-                            if d.get('total_bytes'):
-                                percent = int(d['downloaded_bytes'] / d['total_bytes'] * 100)
-                            elif d.get('total_bytes_estimate'):
-                                percent = int(d['downloaded_bytes'] / d['total_bytes_estimate'] * 100)
-                            save_progress('downloading', percent, d.get('filename', ''))
+                            path = d.get('tmpfilename') or d.get('filename')
+                            done = d.get('downloaded_bytes') or 0
+                            tuner.record_bytes(done - received.get(path, 0))
+                            metrics.record_bytes(done - received.get(path, 0))
+                            received[path] = done
+                            # 진행률 파일은 표시되는 백분율이 바뀔 때만 다시 씀
+                            total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+                            if record.update_progress({'downloaded': done, 'total': total}):
+                                save_progress('downloading', int(record.progress), d.get('filename', ''))
                         elif d['status'] == 'finished':
                             save_progress('merging', 99, d.get('filename', ''))
 
+                    # 빈 슬롯이 생길 때까지 대기 (동시 작업 수는 조절 스레드가 정함)
+                    slots, tuner = get_job_slots()
+                    save_progress('queued', 0)
+                    slots.acquire()
+                    metrics = JobMetrics(fmt_type, job_trace)
+                    tuner.probe_dir = download_path
+                    success = False
                     try:
                         log(f"[DL] Thread started for {video_url}")
                         save_progress('starting', 0)
@@ -262,9 +404,13 @@ if ($result -eq [System.Windows.Forms.DialogResult]::OK) {{
                         sys.stdout = io.StringIO()
                         sys.stderr = io.StringIO()
 
+                        # 변환/병합은 후처리 단계에서 (ffmpeg가 없으면 yt-dlp 내장 후처리)
+                        stage = get_postprocessor()
+                        staged = stage.available
+
                         if fmt_type == 'audio':
                             format_string = 'bestaudio/best'
-                            postprocessors = [{
+                            postprocessors = [] if staged else [{
                                 'key': 'FFmpegExtractAudio',
                                 'preferredcodec': 'mp3',
                                 'preferredquality': '320',
@@ -276,6 +422,14 @@ if ($result -eq [System.Windows.Forms.DialogResult]::OK) {{
                                 format_string = 'bestvideo+bestaudio/best'
                             postprocessors = []
 
+                        # 한 번 추출한 포맷 목록에서 같은 화질의 합본 포맷이나
+                        # mp4에 그대로 담기는 조합을 우선 (병합 없음 또는 remux만)
+                        format_index = YouTubeDownloader(download_path).get_format_index(video_url)
+                        if format_index is not None:
+                            resolved = format_index.resolve_merge_free(format_string, 'mp4')
+                            if resolved:
+                                format_string = resolved[0]
+
                         # stdout/stderr를 완전히 차단하여 yt-dlp 출력 에러 방지
                         ydl_opts = {
                             'format': format_string,
@@ -296,17 +450,70 @@ if ($result -eq [System.Windows.Forms.DialogResult]::OK) {{
                         if postprocessors:
                             ydl_opts['postprocessors'] = postprocessors
 
-                        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                            info = ydl.extract_info(video_url, download=True)
-                            title = info.get('title', 'video')
-                            save_progress('complete', 100, title)
-                            log(f"[DL] Download complete: {title} -> {download_path}")
+                        with (StagedYoutubeDL if staged else TunedYoutubeDL)(
+                                ydl_opts, job_tuner=tuner, metrics=metrics) as ydl:
+                            # 추출 단계는 첫 포맷 다운로드가 시작될 때 닫힘
+                            metrics.start(PHASE_EXTRACT)
+                            if format_index is not None:
+                                info = ydl.process_ie_result(copy.deepcopy(format_index.info), download=True)
+                            else:
+                                info = ydl.extract_info(video_url, download=True)
+                        title = info.get('title', 'video')
+
+                        downloads = info.get('requested_downloads') or []
+                        filepath = downloads[-1].get('filepath') if downloads else None
+
+                        job = None
+                        merge_stats = None
+                        stage_stats, stage_phase = {}, PHASE_MERGE
+                        if staged and ydl.deferred_merges:
+                            files, filepath, streams = ydl.deferred_merges[0]
+                            merge_stats = stage_stats
+                            job = stage.merge(files, filepath, streams, stats=merge_stats)
+                        elif fmt_type != 'audio' and not info.get('requested_formats'):
+                            merge_stats = {'seconds': 0.0, 'bytes': 0}
+                        elif staged and fmt_type == 'audio' and filepath:
+                            source = filepath
+                            filepath = f"{os.path.splitext(source)[0]}.mp3"
+                            stage_phase = PHASE_TRANSCODE
+                            job = stage.convert_audio(source, filepath, 'mp3', '320',
+                                                      stats=stage_stats)
+                        if job is not None:
+                            save_progress('merging', 99, title)
+                            success, message = job.result()
+                            if 'seconds' in stage_stats:
+                                metrics.add(stage_phase, stage_stats['seconds'])
+                            if not success:
+                                metrics.error(stage_phase)
+                                raise Exception(message)
+
+                        history = get_history()
+                        if history and filepath and os.path.exists(filepath):
+                            history.record(video_url, profile, filepath, title=title,
+                                           channel=info.get('channel') or info.get('uploader') or '',
+                                           merge=merge_stats)
+                        if merge_stats:
+                            log(f"[DL] Merge: {merge_stats.get('seconds', 0):.1f}s, "
+                                f"{merge_stats.get('bytes', 0)} bytes")
+
+                        save_progress('complete', 100, title)
+                        log(f"[DL] Download complete: {title} -> {download_path}")
+                        success = True
                     except Exception as e:
                         save_progress('error', 0, '', str(e))
                         log(f"[DL] Download error: {e}\n{traceback.format_exc()}")
+                    finally:
+                        tuner.record_result(success)
+                        slots.release()
+                        log(f"[DL] Metrics: {json.dumps(metrics.finish('done' if success else 'failed'))}")
+
+                def run_download(*args):
+                    # 프로파일링 대상이면 CPU 프로파일/메모리 스냅샷 저장 (아니면 그대로 실행)
+                    with get_profiler().session(args[0]):
+                        do_download(*args)
 
                 # 스레드 시작 (daemon=False로 native host 종료 후에도 계속 실행)
-                t = threading.Thread(target=do_download, args=(url, custom_path, format_type, quality), daemon=False)
+                t = threading.Thread(target=run_download, args=(url, custom_path, format_type, quality, profile), daemon=False)
                 t.start()
 
                 # 즉시 응답 반환
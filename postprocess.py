@@ -0,0 +1,351 @@
+"""
+후처리 모듈
+다운로드와 분리된 ffmpeg 작업(오디오 변환, 영상+오디오 병합)을 별도 작업 풀에서 실행
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from integrity import hash_file
+
+# ffmpeg 프로세스 하나가 사용할 스레드 수 (코어 수만큼 작업이 동시에 돌므로 작게 유지)
+FFMPEG_THREADS = 2
+# ffmpeg 프로세스의 nice 값 (Windows는 BELOW_NORMAL 우선순위)
+LOW_PRIORITY_NICE = 10
+
+# 오디오 코덱별 ffmpeg 인코더 옵션
+AUDIO_CODEC_ARGS = {
+    'mp3': ['-c:a', 'libmp3lame'],
+    'wav': ['-c:a', 'pcm_s16le'],
+    'm4a': ['-c:a', 'aac'],
+}
+
+# 재인코딩 없이 스트림 복사로 만들 수 있는 원본 코덱 (yt-dlp acodec 접두어)
+AUDIO_COPY_CODECS = {
+    'mp3': ('mp3',),
+    'm4a': ('mp4a', 'aac'),
+}
+
+# 완료 콜백: (성공 여부, 메시지, 결과 파일 경로)
+DoneCallback = Callable[[bool, str, str], None]
+
+
+def find_ffmpeg() -> Optional[str]:
+    """ffmpeg 실행 파일 경로"""
+    return shutil.which('ffmpeg')
+
+
+def can_copy_audio(source_codec: Optional[str], codec: str, quality: str = None,
+                   source_bitrate: float = None) -> bool:
+    """
+    원본 오디오를 재인코딩 없이 복사해도 되는지
+
+    원본 코덱이 목표 코덱과 같고, 비트레이트 지정이 없거나 원본이 그 이하일 때만 복사한다.
+    """
+    if not source_codec or not source_codec.startswith(AUDIO_COPY_CODECS.get(codec, ())):
+        return False
+    if not quality:
+        return True
+    return bool(source_bitrate) and source_bitrate <= float(quality)
+
+
+def _popen_low_priority(command: List[str], **kwargs) -> subprocess.Popen:
+    """
+    ffmpeg을 낮은 우선순위로 실행
+
+    작업자 스레드에서 부르므로 preexec_fn(여러 스레드가 있으면 자식에서 교착될 수 있음)
+    대신 시작 직후 부모에서 자식의 nice 값을 올린다.
+    """
+    if sys.platform == 'win32':
+        kwargs['creationflags'] = (subprocess.BELOW_NORMAL_PRIORITY_CLASS
+                                   | subprocess.CREATE_NO_WINDOW)
+    process = subprocess.Popen(command, **kwargs)
+    if sys.platform != 'win32':
+        try:
+            os.setpriority(os.PRIO_PROCESS, process.pid, LOW_PRIORITY_NICE)
+        except OSError:
+            # 이미 끝났거나 권한 없음 - 보통 우선순위로 진행
+            pass
+    return process
+
+
+class PostProcessStage:
+    """
+    후처리 단계
+
+    다운로드 작업은 받은 파일을 submit 계열 메서드로 넘기고 바로 다음 다운로드로 진행한다.
+    넘겨진 작업은 대기열에 쌓였다가 CPU 코어 수만큼의 작업자가 하나씩 꺼내
+    스레드 수를 제한하고 우선순위를 낮춘 ffmpeg 프로세스로 처리한다.
+    """
+
+    def __init__(self, workers: int = None, ffmpeg_threads: int = FFMPEG_THREADS,
+                 ffmpeg_path: str = None):
+        """
+        초기화
+
+        Args:
+            workers: 동시에 실행할 ffmpeg 프로세스 수 (기본: CPU 코어 수)
+            ffmpeg_threads: ffmpeg 프로세스당 스레드 수
+            ffmpeg_path: ffmpeg 경로 (기본: PATH에서 검색)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.ffmpeg_threads = ffmpeg_threads
+        self.ffmpeg_path = ffmpeg_path or find_ffmpeg()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='postprocess')
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def available(self) -> bool:
+        """ffmpeg 사용 가능 여부 (불가능하면 호출 측이 yt-dlp 내장 후처리로 대체)"""
+        return bool(self.ffmpeg_path)
+
+    @property
+    def pending(self) -> int:
+        """대기 중이거나 실행 중인 작업 수"""
+        return self._pending
+
+    def shutdown(self, wait: bool = True):
+        """작업 풀 종료"""
+        self._executor.shutdown(wait=wait)
+
+    def convert_audio(self, source: str, target: str, codec: str, quality: str = None,
+                      callback: DoneCallback = None, source_codec: str = None,
+                      source_bitrate: float = None, stats: dict = None) -> Future:
+        """
+        오디오 변환 작업 제출
+
+        Args:
+            source: 다운로드된 원본 파일
+            target: 결과 파일 경로
+            codec: 'mp3', 'wav', 'm4a'
+            quality: 비트레이트 (kbps, 예: '320')
+            callback: 완료 콜백
+            source_codec: 원본 오디오 코덱 (목표와 같으면 재인코딩 없이 복사)
+            source_bitrate: 원본 비트레이트 (kbps)
+            stats: 지정시 콜백 전에 변환 비용을 채움 (merge()와 같음)
+        """
+        return self.convert_audio_outputs(source, [(target, codec, quality)], callback,
+                                          source_codec, source_bitrate, stats)
+
+    def convert_audio_outputs(self, source: str, outputs: Sequence[tuple],
+                              callback: DoneCallback = None, source_codec: str = None,
+                              source_bitrate: float = None, stats: dict = None) -> Future:
+        """
+        한 원본에서 여러 오디오 파일을 만드는 작업 제출
+
+        ffmpeg 프로세스 하나가 원본을 한 번만 디코딩해 모든 출력으로 인코딩한다.
+        원본 코덱이 목표와 같은 출력은 스트림 복사로 만들고,
+        결과 경로가 원본과 같으면 (이미 목표 포맷) 아무 작업도 하지 않는다.
+
+        Args:
+            source: 다운로드된 원본 파일
+            outputs: (결과 경로, 코덱, 비트레이트) 목록
+            callback: 완료 콜백 (결과 경로는 첫 번째 출력)
+            source_codec: 원본 오디오 코덱
+            source_bitrate: 원본 비트레이트 (kbps)
+            stats: 지정시 콜백 전에 변환 비용을 채움 (merge()와 같음)
+        """
+        output_args = self._audio_output_args(outputs, source_codec, source_bitrate, source)
+        keep_source = len(output_args) < len(outputs)
+        sources = [] if keep_source else [source]
+        return self._submit(['-i', source], output_args, sources, outputs[0][0], callback, stats)
+
+    def stream_audio_outputs(self, chunks: Iterable[bytes], outputs: Sequence[tuple],
+                             source_codec: str = None, source_bitrate: float = None,
+                             stats: dict = None) -> tuple:
+        """
+        받는 중인 오디오를 ffmpeg 표준 입력으로 흘려 바로 인코딩 (호출 스레드에서 실행)
+
+        원본을 디스크에 쓰지 않고 결과 파일만 쓴다. 다운로드와 동시에 돌아야 하므로
+        작업 풀을 거치지 않지만 pending에는 포함되어 후처리 부하로 보인다.
+        chunks에서 예외가 나면 ffmpeg를 종료하고 임시 파일을 지운 뒤 예외를 그대로 올린다.
+
+        Args:
+            chunks: 원본 데이터 조각
+            outputs: (결과 경로, 코덱, 비트레이트) 목록
+            source_codec: 원본 오디오 코덱
+            source_bitrate: 원본 비트레이트 (kbps)
+            stats: 지정시 결과 경로별 해시를 digests로 채움
+
+        Returns:
+            (성공 여부, 메시지)
+        """
+        if not self.ffmpeg_path:
+            return False, "ffmpeg를 찾을 수 없습니다"
+        output_args = self._audio_output_args(outputs, source_codec, source_bitrate)
+        command, temp_targets = self._command(['-i', 'pipe:0'], output_args)
+
+        with self._lock:
+            self._pending += 1
+        try:
+            with tempfile.TemporaryFile() as stderr:
+                process = _popen_low_priority(command, stdin=subprocess.PIPE,
+                                              stdout=subprocess.DEVNULL, stderr=stderr)
+                try:
+                    for chunk in chunks:
+                        process.stdin.write(chunk)
+                    process.stdin.close()
+                except BrokenPipeError:
+                    # ffmpeg가 먼저 종료됨 (입력을 해석할 수 없음) - 종료 코드로 판단
+                    pass
+                except BaseException:
+                    process.kill()
+                    process.wait()
+                    self._remove(temp_targets)
+                    raise
+                process.wait()
+                stderr.seek(0)
+                return self._finish(process.returncode, stderr.read(), temp_targets,
+                                    output_args, [], stats)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @staticmethod
+    def _audio_output_args(outputs: Sequence[tuple], source_codec: Optional[str],
+                           source_bitrate: Optional[float], source: str = None) -> List[tuple]:
+        """출력별 ffmpeg 인자 (결과 경로가 원본과 같은 출력은 제외)"""
+        output_args = []
+        for target, codec, quality in outputs:
+            if source and os.path.abspath(target) == os.path.abspath(source):
+                continue
+            args = ['-map', '0:a:0', '-map_metadata', '0']
+            if can_copy_audio(source_codec, codec, quality, source_bitrate):
+                args += ['-c:a', 'copy']
+            else:
+                args += AUDIO_CODEC_ARGS.get(codec, ['-c:a', codec])
+                if quality:
+                    args += ['-b:a', f'{quality}k']
+            output_args.append((args, target))
+        return output_args
+
+    def merge(self, sources: Sequence[str], target: str, streams: Sequence[tuple],
+              callback: DoneCallback = None, stats: dict = None) -> Future:
+        """
+        영상/오디오 병합 작업 제출 (스트림 복사)
+
+        Args:
+            sources: 병합할 파일 목록
+            target: 결과 파일 경로
+            streams: 파일별 (vcodec, acodec) - 'none'이면 해당 스트림 없음
+            callback: 완료 콜백
+            stats: 지정시 콜백 전에 병합 비용을 채움 (seconds: 걸린 시간, bytes: 읽고 쓴 크기,
+                   digests: 결과 경로별 해시)
+        """
+        args = ['-c', 'copy']
+        for i, (vcodec, acodec) in enumerate(streams):
+            if acodec != 'none':
+                args += ['-map', f'{i}:a:0']
+            if vcodec != 'none':
+                args += ['-map', f'{i}:v:0']
+        if target.endswith('.mp4'):
+            args += ['-movflags', '+faststart']
+        input_args = []
+        for source in sources:
+            input_args += ['-i', source]
+        return self._submit(input_args, [(args, target)], list(sources), target, callback, stats)
+
+    def _submit(self, input_args: List[str], outputs: List[tuple], sources: List[str],
+                target: str, callback: Optional[DoneCallback], stats: dict = None) -> Future:
+        with self._lock:
+            self._pending += 1
+        future = self._executor.submit(self._run, input_args, outputs, sources, stats)
+
+        def on_done(f: Future):
+            with self._lock:
+                self._pending -= 1
+            try:
+                success, message = f.result()
+            except Exception as e:
+                success, message = False, str(e)
+            if callback:
+                callback(success, message, target)
+
+        future.add_done_callback(on_done)
+        return future
+
+    def _run(self, input_args: List[str], outputs: List[tuple], sources: List[str],
+             stats: dict = None) -> tuple:
+        """
+        ffmpeg 실행 (작업자 스레드)
+
+        출력마다 임시 파일에 쓴 뒤 모두 성공하면 교체하고 원본 삭제.
+        outputs가 비어 있으면 (원본이 이미 결과) 아무것도 하지 않는다.
+        stats가 있으면 걸린 시간과 읽고 쓴 크기, 결과 파일 해시를 채운다.
+        """
+        if not outputs:
+            return True, "다운로드 완료"
+        if not self.ffmpeg_path:
+            return False, "ffmpeg를 찾을 수 없습니다"
+
+        started = time.monotonic()
+        read_bytes = sum(os.path.getsize(s) for s in sources if os.path.exists(s))
+        command, temp_targets = self._command(input_args, outputs)
+        process = _popen_low_priority(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        _, stderr = process.communicate()
+        if stats is not None:
+            stats['seconds'] = time.monotonic() - started
+            stats['bytes'] = read_bytes + sum(
+                os.path.getsize(t) for t in temp_targets if os.path.exists(t))
+        return self._finish(process.returncode, stderr, temp_targets, outputs, sources, stats)
+
+    def _command(self, input_args: List[str], outputs: List[tuple]) -> tuple:
+        """ffmpeg 명령과 출력별 임시 파일 경로"""
+        # 표준 입력을 쓰는 경우에는 -nostdin을 붙이지 않음
+        command = [
+            self.ffmpeg_path, '-y', '-hide_banner', '-loglevel', 'error',
+            '-threads', str(self.ffmpeg_threads),
+            *input_args,
+        ]
+        if 'pipe:0' not in input_args:
+            command.insert(3, '-nostdin')
+        temp_targets = []
+        for args, target in outputs:
+            root, ext = os.path.splitext(target)
+            temp_targets.append(f"{root}.temp{ext}")
+            command += [*args, '-threads', str(self.ffmpeg_threads), temp_targets[-1]]
+        return command, temp_targets
+
+    @staticmethod
+    def _remove(paths: Sequence[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _finish(self, returncode: int, stderr: bytes, temp_targets: List[str],
+                outputs: List[tuple], sources: List[str], stats: dict = None) -> tuple:
+        """
+        성공하면 임시 파일을 결과로 교체하고 원본 삭제, 실패하면 임시 파일 삭제
+
+        stats가 있으면 결과 경로별 해시를 digests로 채운다. ffmpeg는 끝날 때 앞으로 돌아가
+        헤더를 고쳐 쓰므로 쓰는 동안 따라가며 해시할 수 없어, 방금 써서 페이지 캐시에 있을 때
+        이 작업자에서 한 번 읽는다 (다운로드 스레드나 완료 기록에서 다시 읽지 않도록).
+        """
+        if returncode != 0:
+            self._remove(temp_targets)
+            error = stderr.decode('utf-8', 'replace').strip().splitlines()
+            return False, f"변환 실패: {error[-1] if error else returncode}"
+
+        targets = set()
+        for temp_target, (_, target) in zip(temp_targets, outputs):
+            if stats is not None:
+                stats.setdefault('digests', {})[os.path.abspath(target)] = hash_file(temp_target)
+            os.replace(temp_target, target)
+            targets.add(os.path.abspath(target))
+        for source in sources:
+            if os.path.abspath(source) not in targets:
+                try:
+                    os.remove(source)
+                except OSError:
+                    pass
+        return True, "다운로드 완료"
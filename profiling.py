@@ -0,0 +1,236 @@
+"""
+작업 프로파일링 모듈
+지정한 작업이나 일정 시간 동안 시작한 작업의 CPU 프로파일(cProfile)과
+메모리 할당 스냅샷(tracemalloc)을 로그 옆 폴더에 저장
+
+재시작 없이 켜고 끌 수 있고, 꺼져 있으면 작업마다 조건 확인 한 번만 한다.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, Set
+
+from media_id import canonical_key
+
+# 프로파일 결과 폴더 이름 (로그 파일 옆)
+PROFILE_DIR_NAME = 'profiles'
+# 기본 전체 프로파일링 시간 (초)
+DEFAULT_PROFILE_WINDOW = 10 * 60
+# 요약 파일에 남길 함수/할당 위치 수
+SUMMARY_LIMIT = 40
+# 할당 위치별 스택 깊이
+TRACEMALLOC_FRAMES = 10
+
+
+def profile_dir_for(log_file: str, name: str = PROFILE_DIR_NAME) -> str:
+    """로그 파일 옆의 프로파일 폴더"""
+    return os.path.join(os.path.dirname(os.path.abspath(log_file)), name)
+
+
+def _file_label(key: str) -> str:
+    """파일 이름에 쓸 작업 이름 (video:ID → video-ID)"""
+    return re.sub(r'[^\w.-]+', '-', key).strip('-')[:60] or 'job'
+
+
+class ProfileSwitch:
+    """
+    프로파일링 스위치
+
+    profile_job(url)은 그 URL의 다음 작업 한 번을, enable_for(seconds)는 그 시간 동안
+    시작하는 모든 작업을 프로파일링한다. session(url)로 감싼 구간이 대상이면
+    그 스레드의 CPU 프로파일과 끝날 때의 메모리 할당 스냅샷을
+    '<작업>-<시각>.prof', '.tracemalloc', '.txt'(요약)로 저장한다.
+
+    cProfile은 session을 연 스레드만 잰다 (조각 동시 다운로드 스레드, ffmpeg 프로세스 제외).
+    다른 프로파일러가 이미 돌고 있으면 CPU 프로파일 없이 메모리 스냅샷만 남긴다.
+
+    control_file을 주면 스위치 상태를 그 파일에 두고 작업마다 바뀌었는지 확인하므로
+    요청마다 새로 뜨는 프로세스(네이티브 호스트)에서도 다시 시작 없이 켜고 끌 수 있다.
+    """
+
+    def __init__(self, directory: str, log: Callable[[str], None] = None,
+                 control_file: str = None):
+        """
+        초기화
+
+        Args:
+            directory: 결과 폴더 (보통 profile_dir_for(로그 파일))
+            log: 저장/오류 기록 함수
+            control_file: 프로세스 간 공유할 스위치 상태 파일
+        """
+        self.directory = directory
+        self.log = log
+        self.control_file = control_file
+        self._lock = threading.Lock()
+        self._jobs: Set[str] = set()
+        self._until = 0.0
+        self._control_mtime: Optional[float] = None
+        self._tracing = 0  # tracemalloc을 쓰는 진행 중 세션 수
+        self._started_tracing = False
+        self._local = threading.local()
+
+    @property
+    def active(self) -> bool:
+        """켜져 있는지 (지정한 작업이 남았거나 전체 프로파일링 시간 안)"""
+        return bool(self._jobs) or time.monotonic() < self._until
+
+    @property
+    def remaining(self) -> float:
+        """전체 프로파일링 남은 시간 (초)"""
+        return max(0.0, self._until - time.monotonic())
+
+    def state(self) -> Dict[str, Any]:
+        """현재 스위치 상태"""
+        self._sync()
+        return {'jobs': sorted(self._jobs), 'remaining': round(self.remaining, 1),
+                'directory': self.directory}
+
+    def profile_job(self, url: str):
+        """url의 다음 작업 한 번 프로파일링"""
+        self._sync()
+        with self._lock:
+            self._jobs.add(canonical_key(url))
+            self._persist()
+
+    def enable_for(self, seconds: float = DEFAULT_PROFILE_WINDOW):
+        """지금부터 seconds 동안 시작하는 모든 작업 프로파일링"""
+        self._sync()
+        with self._lock:
+            self._until = time.monotonic() + seconds
+            self._persist()
+
+    def disable(self):
+        """예약된 작업과 전체 프로파일링 모두 해제 (진행 중인 세션은 끝까지 기록)"""
+        with self._lock:
+            self._jobs.clear()
+            self._until = 0.0
+            self._persist()
+
+    def session(self, url: str) -> ContextManager[None]:
+        """작업 구간 - 대상이 아니면 아무것도 하지 않는 컨텍스트"""
+        self._sync()
+        if not self._jobs and not self._until:
+            return nullcontext()
+        key = canonical_key(url)
+        with self._lock:
+            if key in self._jobs:
+                self._jobs.discard(key)
+                self._persist()
+            elif time.monotonic() >= self._until:
+                self._until = 0.0
+                return nullcontext()
+        if getattr(self._local, 'active', False):
+            # 같은 스레드 안의 하위 작업 (묶음 포맷을 하나씩 받는 경우) - 바깥 세션이 기록
+            return nullcontext()
+        return self._capture(key)
+
+    def _sync(self):
+        """상태 파일이 바뀌었으면 다시 읽음 (다른 프로세스가 켜고 끈 경우)"""
+        if not self.control_file:
+            return
+        try:
+            mtime = os.stat(self.control_file).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._control_mtime:
+            return
+        data = {}
+        if mtime is not None:
+            try:
+                with open(self.control_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+        with self._lock:
+            self._control_mtime = mtime
+            self._jobs = set(data.get('jobs') or [])
+            # 파일에는 벽시계 시각으로 저장
+            remaining = (data.get('until') or 0) - time.time()
+            self._until = time.monotonic() + remaining if remaining > 0 else 0.0
+
+    def _persist(self):
+        """상태 파일에 저장 (잠금 안에서 호출)"""
+        if not self.control_file:
+            return
+        try:
+            if not self._jobs and not self._until:
+                if os.path.exists(self.control_file):
+                    os.remove(self.control_file)
+                self._control_mtime = None
+                return
+            until = time.time() + max(0.0, self._until - time.monotonic()) if self._until else 0
+            with open(self.control_file, 'w', encoding='utf-8') as f:
+                json.dump({'jobs': sorted(self._jobs), 'until': until}, f)
+            self._control_mtime = os.stat(self.control_file).st_mtime
+        except OSError as e:
+            self._write_log(f"프로파일링 상태 저장 실패: {e}")
+
+    @contextmanager
+    def _capture(self, key: str) -> Iterator[None]:
+        self._local.active = True
+        self._start_tracing()
+        profiler: Optional[cProfile.Profile] = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            self._write_log(f"CPU 프로파일 시작 실패 ({key}): {e}")
+            profiler = None
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+            self._stop_tracing()
+            self._local.active = False
+            self._save(key, time.monotonic() - started, profiler, snapshot)
+
+    def _start_tracing(self):
+        with self._lock:
+            self._tracing += 1
+            if self._tracing == 1 and not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracing = True
+
+    def _stop_tracing(self):
+        with self._lock:
+            self._tracing -= 1
+            if self._tracing == 0 and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def _save(self, key: str, seconds: float, profiler: Optional[cProfile.Profile],
+              snapshot: Optional[tracemalloc.Snapshot]):
+        base = os.path.join(self.directory,
+                            f"{_file_label(key)}-{time.strftime('%Y%m%d-%H%M%S')}")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            summary = io.StringIO()
+            summary.write(f"{key} - {seconds:.1f}초\n\n")
+            if profiler is not None:
+                profiler.dump_stats(base + '.prof')
+                stats = pstats.Stats(profiler, stream=summary)
+                stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LIMIT)
+            if snapshot is not None:
+                snapshot.dump(base + '.tracemalloc')
+                summary.write("\n메모리 할당 위치 (크기순)\n")
+                for stat in snapshot.statistics('lineno')[:SUMMARY_LIMIT]:
+                    summary.write(f"{stat}\n")
+            with open(base + '.txt', 'w', encoding='utf-8') as f:
+                f.write(summary.getvalue())
+        except OSError as e:
+            self._write_log(f"프로파일 저장 실패 ({key}): {e}")
+            return
+        self._write_log(f"프로파일 저장: {base}.txt")
+
+    def _write_log(self, message: str):
+        if self.log:
+            self.log(message)
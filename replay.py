@@ -0,0 +1,374 @@
+"""
+작업 기록 재생 (오프라인 스케줄링 시뮬레이터)
+job_trace.py가 남긴 기록에서 작업별 도착 시각, 추출 시간, 받은 바이트, 후처리 시간을 읽고
+모의 시계 위에서 실제 스케줄러(JobSlots, JobConcurrencyTuner)에 넣어 전송을 흉내 내며
+동시 작업 수/우선순위 정책별 결과를 비교한다. 아무것도 다운로드하지 않는다.
+
+사용법:
+    python replay.py job_trace.jsonl
+    python replay.py job_trace.jsonl -c 1,2,4,auto -p fifo,shortest --bandwidth 20
+
+모델:
+- 추출은 기록된 시간만큼 걸리고 대역폭을 쓰지 않는다.
+- 전송은 작업마다 기록된 속도(받은 바이트 / 전송 시간, --job-rate로 바꿀 수 있음)를 넘지 않고
+  전체 대역폭(--bandwidth, 기본: 기록에서 가장 높았던 합계 속도)을 나눠 쓴다.
+- 병합/변환은 슬롯을 반납하고 후처리 작업자(--workers)에서 기록된 시간만큼 걸린다.
+- 재시도한 작업은 시도들의 시간과 바이트를 합친 한 작업으로 재생한다.
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from job_trace import EVENT_ENQUEUE, EVENT_FINISH, EVENT_PHASE, EVENT_PROGRESS, EVENT_START
+from job_tuner import (
+    INITIAL_CONCURRENT_JOBS, MAX_CONCURRENT_JOBS, MIN_CONCURRENT_JOBS, TUNE_INTERVAL,
+    JobConcurrencyTuner, JobSlots
+)
+from metrics import PHASE_EXTRACT, PHASE_MERGE, PHASE_TRANSCODE, PHASE_TRANSFER, STATUS_DONE
+
+# 모의 시계 간격 (초)
+DEFAULT_STEP = 0.25
+# 기록에서 전체 대역폭을 추정할 구간 (초)
+BANDWIDTH_WINDOW = 5.0
+# 자동 조절 정책 이름 (-c auto)
+AUTO = 'auto'
+
+# 우선순위 정책: 대기 작업 중 먼저 시작할 작업의 정렬 키
+POLICIES = {
+    'fifo': lambda job: (job.arrival, job.order),        # 먼저 들어온 작업
+    'lifo': lambda job: (-job.arrival, -job.order),      # 나중에 들어온 작업
+    'shortest': lambda job: (job.bytes, job.order),      # 받을 바이트가 적은 작업
+    'longest': lambda job: (-job.bytes, job.order),      # 받을 바이트가 많은 작업
+    'audio-first': lambda job: (job.download_type != 'audio', job.arrival, job.order),
+}
+
+
+class TraceJob:
+    """기록에서 읽은 작업 하나 (시도 합계)"""
+
+    def __init__(self, job_id: str, order: int):
+        self.id = job_id
+        self.order = order
+        self.arrival: Optional[float] = None
+        self.download_type = 'video'
+        self.attempts = 0
+        self.extract = 0.0
+        self.transfer = 0.0
+        self.postprocess = 0.0
+        self.bytes = 0
+        self.status: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._attempt_bytes = 0
+
+    @property
+    def rate(self) -> Optional[float]:
+        """기록된 전송 속도 (바이트/초, 전송 시간이 없으면 None - 제한 없음)"""
+        return self.bytes / self.transfer if self.transfer > 0 else None
+
+
+def read_trace(lines: Iterable[str]) -> List[TraceJob]:
+    """기록 줄에서 작업 목록 (한 번도 시작하지 않은 작업 - 건너뜀, 대기 중 취소 등 - 제외)"""
+    jobs: Dict[str, TraceJob] = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            job_id = record['job']
+            event = record['event']
+            t = float(record['t'])
+        except (ValueError, KeyError, TypeError):
+            continue
+        job = jobs.get(job_id)
+        if job is None:
+            job = jobs[job_id] = TraceJob(job_id, len(jobs))
+        if event in (EVENT_ENQUEUE, EVENT_START):
+            if job.arrival is None:
+                job.arrival = t
+            if record.get('type'):
+                job.download_type = record['type']
+        if event == EVENT_START:
+            job.attempts += 1
+            job._attempt_bytes = 0
+            if job.started is None:
+                job.started = t
+        elif event == EVENT_PHASE and record.get('state') == 'end':
+            seconds = float(record.get('seconds') or 0)
+            phase = record.get('phase')
+            if phase == PHASE_EXTRACT:
+                job.extract += seconds
+            elif phase == PHASE_TRANSFER:
+                job.transfer += seconds
+            elif phase in (PHASE_MERGE, PHASE_TRANSCODE):
+                job.postprocess += seconds
+        elif event == EVENT_PROGRESS:
+            job._attempt_bytes = max(job._attempt_bytes, int(record.get('bytes') or 0))
+        elif event == EVENT_FINISH and job.attempts:
+            job.bytes += max(job._attempt_bytes, int(record.get('bytes') or 0))
+            job._attempt_bytes = 0
+            job.status = record.get('status')
+            job.finished = t
+    return sorted((job for job in jobs.values() if job.attempts),
+                  key=lambda job: (job.arrival, job.order))
+
+
+def estimate_bandwidth(lines: Iterable[str], window: float = BANDWIDTH_WINDOW) -> Optional[float]:
+    """
+    진행률 표본으로 구간별 전체 수신 속도를 구해 가장 높은 값 (바이트/초, 표본이 없으면 None)
+
+    기록 전체가 window보다 짧으면 기록 길이를 구간으로 쓴다.
+    """
+    last: Dict[str, int] = {}
+    samples = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get('event') == EVENT_START:
+            last[record.get('job')] = 0
+        elif record.get('event') in (EVENT_PROGRESS, EVENT_FINISH):
+            # 마지막 표본 뒤에 받은 바이트는 finish의 bytes로 채움
+            received = int(record.get('bytes') or 0)
+            delta = received - last.get(record.get('job'), 0)
+            last[record.get('job')] = received
+            if delta > 0:
+                samples.append((float(record['t']), delta))
+    if not samples:
+        return None
+    times = [t for t, _ in samples]
+    window = max(min(window, max(times) - min(times)), 1e-3)
+    bins: Dict[int, int] = {}
+    for t, delta in samples:
+        key = int((t - times[0]) // window)
+        bins[key] = bins.get(key, 0) + delta
+    return max(bins.values()) / window
+
+
+def observed(jobs: List[TraceJob]) -> Dict[str, Any]:
+    """기록된 실제 실행 결과 (끝난 작업 기준)"""
+    finished = [job for job in jobs if job.finished is not None]
+    if not finished:
+        return {}
+    start = min(job.arrival for job in jobs)
+    end = max(job.finished for job in finished)
+    return _summary('observed', '-', [(job.arrival, job.started, job.finished, job.bytes)
+                                      for job in finished], end - start)
+
+
+class _Postprocess:
+    """모의 후처리 단계 (조절기가 보는 pending/workers만)"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.queue: deque = deque()
+        self.running: List[list] = []  # [남은 시간, 작업]
+
+    @property
+    def pending(self) -> int:
+        return len(self.queue) + len(self.running)
+
+
+def simulate(jobs: List[TraceJob], concurrency, policy: str = 'fifo',
+             bandwidth: Optional[float] = None, job_rate: Optional[float] = None,
+             workers: int = None, step: float = DEFAULT_STEP,
+             min_jobs: int = MIN_CONCURRENT_JOBS, max_jobs: int = MAX_CONCURRENT_JOBS
+             ) -> Dict[str, Any]:
+    """
+    작업 목록을 모의 실행
+
+    Args:
+        jobs: read_trace() 결과
+        concurrency: 고정 동시 작업 수 또는 AUTO (JobConcurrencyTuner가 조절)
+        policy: POLICIES 키
+        bandwidth: 전체 대역폭 (바이트/초, None이면 제한 없음)
+        job_rate: 작업별 전송 속도 상한 (바이트/초, None이면 기록된 속도)
+        workers: 후처리 작업자 수 (기본: CPU 코어 수)
+        step: 모의 시계 간격 (초)
+    """
+    if not jobs:
+        return {}
+    key = POLICIES[policy]
+    now = [jobs[0].arrival]
+    post = _Postprocess(workers or os.cpu_count() or 1)
+    tuner = None
+    if concurrency == AUTO:
+        tuner = JobConcurrencyTuner(min_jobs, max_jobs, postprocessor=post,
+                                    clock=lambda: now[0], load=lambda: None)
+        slots = JobSlots(tuner.clamp(INITIAL_CONCURRENT_JOBS))
+    else:
+        slots = JobSlots(int(concurrency))
+
+    arrivals = deque(jobs)
+    ready: list = []
+    extracting: List[list] = []   # [남은 시간, 작업]
+    transferring: List[list] = []  # [남은 바이트, 작업]
+    started: Dict[str, float] = {}
+    results = []
+    limits = []
+    next_tune = now[0] + TUNE_INTERVAL
+
+    def finish(job: TraceJob):
+        if tuner is not None:
+            tuner.record_result(job.status == STATUS_DONE)
+        results.append((job.arrival, started[job.id], now[0], job.bytes))
+
+    while len(results) < len(jobs):
+        while arrivals and arrivals[0].arrival <= now[0]:
+            job = arrivals.popleft()
+            heapq.heappush(ready, (key(job), job.order, job))
+        while ready and slots.try_acquire():
+            job = heapq.heappop(ready)[2]
+            started[job.id] = now[0]
+            extracting.append([job.extract, job])
+        if not ready and not extracting and not transferring and not post.pending and arrivals:
+            # 빈 구간 건너뛰기
+            now[0] = max(now[0], arrivals[0].arrival)
+            continue
+
+        now[0] += step
+        for entry in list(extracting):
+            entry[0] -= step
+            if entry[0] <= 0:
+                extracting.remove(entry)
+                transferring.append([entry[1].bytes, entry[1]])
+
+        # 작업별 상한을 지키며 전체 대역폭을 나눔 (상한이 낮은 작업부터 채움)
+        caps = sorted(((job_rate or entry[1].rate or float('inf')), index)
+                      for index, entry in enumerate(transferring))
+        rates = {}
+        budget = bandwidth
+        for position, (cap, index) in enumerate(caps):
+            if not budget:
+                rates[index] = cap
+                continue
+            rates[index] = min(cap, budget / (len(caps) - position))
+            budget -= rates[index]
+        done = []
+        for index, entry in enumerate(transferring):
+            amount = min(entry[0], rates[index] * step) if rates[index] != float('inf') else entry[0]
+            entry[0] -= amount
+            if tuner is not None:
+                tuner.record_bytes(int(amount))
+            if entry[0] <= 0:
+                done.append(entry)
+        for entry in done:
+            transferring.remove(entry)
+            slots.release()
+            job = entry[1]
+            if job.postprocess > 0:
+                post.queue.append(job)
+            else:
+                finish(job)
+
+        for entry in list(post.running):
+            entry[0] -= step
+            if entry[0] <= 0:
+                post.running.remove(entry)
+                finish(entry[1])
+        while post.queue and len(post.running) < post.workers:
+            job = post.queue.popleft()
+            post.running.append([job.postprocess, job])
+
+        if tuner is not None and now[0] >= next_tune:
+            next_tune = now[0] + TUNE_INTERVAL
+            tuner.evaluate(slots)
+        limits.append(slots.limit)
+
+    makespan = max(end for _, _, end, _ in results) - jobs[0].arrival
+    summary = _summary(policy, concurrency, results, makespan)
+    summary['mean_limit'] = round(sum(limits) / len(limits), 2) if limits else slots.limit
+    return summary
+
+
+def _summary(policy: str, concurrency, results: List[tuple], makespan: float) -> Dict[str, Any]:
+    turnaround = sorted(end - arrival for arrival, _, end, _ in results)
+    waits = [start - arrival for arrival, start, _, _ in results if start is not None]
+    total = sum(size for _, _, _, size in results)
+    return {
+        'policy': policy,
+        'concurrency': concurrency,
+        'jobs': len(results),
+        'makespan': round(makespan, 1),
+        'mean_turnaround': round(sum(turnaround) / len(turnaround), 1),
+        'p95_turnaround': round(turnaround[min(len(turnaround) - 1,
+                                               int(len(turnaround) * 0.95))], 1),
+        'mean_wait': round(sum(waits) / len(waits), 1) if waits else None,
+        'goodput_mbps': round(total / max(makespan, 1e-6) / 1024 / 1024, 2),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="작업 기록 재생 - 동시 작업 수/우선순위 정책 비교")
+    parser.add_argument('trace', help="job_trace 기록 파일 (JSON Lines)")
+    parser.add_argument('-c', '--concurrency', default=f'1,2,{MAX_CONCURRENT_JOBS},{AUTO}',
+                        help=f"비교할 동시 작업 수 (쉼표 구분, {AUTO}=자동 조절)")
+    parser.add_argument('-p', '--policy', default='fifo,shortest',
+                        help=f"비교할 우선순위 정책 (쉼표 구분: {', '.join(POLICIES)})")
+    parser.add_argument('--bandwidth', type=float,
+                        help="전체 대역폭 MB/s (기본: 기록에서 가장 높았던 합계 속도)")
+    parser.add_argument('--job-rate', type=float, help="작업별 전송 속도 상한 MB/s (기본: 기록된 속도)")
+    parser.add_argument('--workers', type=int, help="후처리 작업자 수 (기본: CPU 코어 수)")
+    parser.add_argument('--step', type=float, default=DEFAULT_STEP,
+                        help=f"모의 시계 간격 초 (기본 {DEFAULT_STEP})")
+    parser.add_argument('--json', action='store_true', help="결과를 JSON Lines로 출력")
+    args = parser.parse_args(argv)
+
+    policies = [name.strip() for name in args.policy.split(',') if name.strip()]
+    unknown = [name for name in policies if name not in POLICIES]
+    if unknown:
+        parser.error(f"알 수 없는 정책: {', '.join(unknown)}")
+    try:
+        levels = [level if level == AUTO else int(level)
+                  for level in (part.strip() for part in args.concurrency.split(',')) if level]
+    except ValueError:
+        parser.error("동시 작업 수는 숫자 또는 auto")
+    if any(level != AUTO and level < 1 for level in levels):
+        parser.error("동시 작업 수는 1 이상")
+
+    try:
+        with open(args.trace, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError as e:
+        print(f"replay.py: 기록을 읽을 수 없습니다: {e}", file=sys.stderr)
+        return 1
+    jobs = read_trace(lines)
+    if not jobs:
+        print("replay.py: 재생할 작업이 없습니다", file=sys.stderr)
+        return 1
+
+    mb = 1024 * 1024
+    bandwidth = args.bandwidth * mb if args.bandwidth else estimate_bandwidth(lines)
+    rows = [observed(jobs)]
+    for policy in policies:
+        for level in levels:
+            rows.append(simulate(jobs, level, policy, bandwidth,
+                                 args.job_rate * mb if args.job_rate else None,
+                                 args.workers, args.step))
+    rows = [row for row in rows if row]
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+        return 0
+
+    print(f"작업 {len(jobs)}개, 대역폭 "
+          f"{'제한 없음' if not bandwidth else f'{bandwidth / mb:.2f}MB/s'}")
+    header = f"{'정책':<12}{'동시':>6}{'전체(초)':>10}{'평균 완료':>10}{'p95 완료':>10}{'평균 대기':>10}{'MB/s':>8}"
+    print(header)
+    for row in rows:
+        wait = '-' if row['mean_wait'] is None else row['mean_wait']
+        print(f"{row['policy']:<12}{str(row['concurrency']):>6}{row['makespan']:>10}"
+              f"{row['mean_turnaround']:>10}{row['p95_turnaround']:>10}{wait:>10}"
+              f"{row['goodput_mbps']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+오류 분류와 재시도 모듈
+실패 메시지(yt-dlp, 후처리)를 종류별로 나눠 일시적인 오류만 지수 백오프(지터 포함)로 다시 시도하고,
+요청 제한(429, 봇 확인) 응답이 이어지면 대기열 전체를 잠시 멈춤 (회로 차단기)
+
+삭제/비공개/지역 제한처럼 다시 받아도 똑같이 실패할 오류는 재시도 없이 바로 실패로 끝낸다.
+"""
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# 오류 종류
+ERROR_RATE_LIMITED = 'rate_limited'   # 요청 제한 (429, 봇 확인)
+ERROR_GEO_BLOCKED = 'geo_blocked'     # 지역 제한
+ERROR_REMOVED = 'removed'             # 삭제/비공개/없는 영상
+ERROR_RESTRICTED = 'restricted'       # 로그인/연령 확인/멤버십 필요
+ERROR_NETWORK = 'network'             # 일시적인 네트워크 오류 (시간 초과, 연결 끊김, 5xx)
+ERROR_POSTPROCESS = 'postprocess'     # 병합/변환 실패
+ERROR_UNKNOWN = 'unknown'
+
+# 화면 표시용 이름
+ERROR_LABELS = {
+    ERROR_RATE_LIMITED: "요청 제한",
+    ERROR_GEO_BLOCKED: "지역 제한",
+    ERROR_REMOVED: "삭제되었거나 비공개",
+    ERROR_RESTRICTED: "로그인/연령 확인 필요",
+    ERROR_NETWORK: "네트워크 오류",
+    ERROR_POSTPROCESS: "변환 실패",
+    ERROR_UNKNOWN: "알 수 없는 오류",
+}
+
+# 메시지 패턴 (위에서부터 먼저 맞는 종류 - 요청 제한을 네트워크 오류보다 먼저 봄)
+_PATTERNS = (
+    (ERROR_RATE_LIMITED, r"HTTP Error 429|Too Many Requests|rate[- ]limit|confirm you.re not a bot"),
+    (ERROR_GEO_BLOCKED, r"available in your country|not available from your location"
+                        r"|geo[- ]?restrict|blocked it in your country"),
+    (ERROR_RESTRICTED, r"Sign in to confirm your age|age[- ]restricted|members[- ]only"
+                       r"|Join this channel|requires payment|login required|Private video.*granted access"),
+    (ERROR_REMOVED, r"Video unavailable|This video is (?:private|unavailable)|Private video"
+                    r"|has been removed|account .*has been terminated|no longer available"
+                    r"|HTTP Error 404|Incomplete YouTube ID|does not exist"),
+    (ERROR_POSTPROCESS, r"변환 실패|병합 실패|ffmpeg|ffprobe|Postprocessing|Conversion failed"),
+    (ERROR_NETWORK, r"timed? ?out|Connection (?:reset|refused|aborted)|Remote end closed"
+                    r"|Temporary failure in name resolution|Name or service not known"
+                    r"|getaddrinfo failed|Network is unreachable|No route to host"
+                    r"|IncompleteRead|EOF occurred|SSL|HTTP Error 5\d\d|Unable to download webpage"
+                    r"|Unable to download API page|Got error|giving up after"),
+)
+_COMPILED = tuple((kind, re.compile(pattern, re.IGNORECASE)) for kind, pattern in _PATTERNS)
+
+# 종류별 최대 재시도 횟수 (없으면 재시도하지 않음)
+MAX_RETRIES: Dict[str, int] = {
+    ERROR_NETWORK: 3,
+    ERROR_RATE_LIMITED: 2,
+}
+# 작업 재시도 백오프 (초) - 기본 * 2^재시도 횟수, 최대값까지
+BACKOFF_BASE = 5.0
+BACKOFF_CAP = 300.0
+
+# yt-dlp 안쪽 재시도(HTTP/조각/추출) 백오프 (초)
+INNER_BACKOFF_BASE = 0.5
+INNER_BACKOFF_CAP = 8.0
+
+# 회로 차단기: WINDOW초 안에 요청 제한 응답이 THRESHOLD번이면 대기열을 COOLDOWN초 멈춤
+BREAKER_THRESHOLD = 3
+BREAKER_WINDOW = 120.0
+BREAKER_COOLDOWN = 300.0
+BREAKER_MAX_COOLDOWN = 1800.0
+
+
+def classify_error(message: str) -> str:
+    """실패 메시지의 오류 종류"""
+    for kind, pattern in _COMPILED:
+        if pattern.search(message or ''):
+            return kind
+    return ERROR_UNKNOWN
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP,
+                  rng: Callable[[], float] = random.random) -> float:
+    """
+    attempt번째(0부터) 재시도 전 대기 시간
+
+    상한의 절반은 보장하고 나머지 절반을 무작위로 더한다 (여러 작업이 한꺼번에 다시 몰리지 않도록).
+    """
+    ceiling = min(cap, base * (2 ** attempt))
+    return ceiling / 2 + rng() * ceiling / 2
+
+
+def retry_sleep_functions(base: float = INNER_BACKOFF_BASE,
+                          cap: float = INNER_BACKOFF_CAP) -> Dict[str, Callable[[int], float]]:
+    """yt-dlp retry_sleep_functions 옵션 (안쪽 재시도에도 백오프)"""
+    def sleep(n: int) -> float:
+        return backoff_delay(n, base, cap)
+    return {'http': sleep, 'fragment': sleep, 'extractor': sleep}
+
+
+class RetryPolicy:
+    """오류 종류별 작업 재시도 정책"""
+
+    def __init__(self, max_retries: Dict[str, int] = None, base: float = BACKOFF_BASE,
+                 cap: float = BACKOFF_CAP, rng: Callable[[], float] = random.random):
+        self.max_retries = dict(MAX_RETRIES if max_retries is None else max_retries)
+        self.base = base
+        self.cap = cap
+        self.rng = rng
+
+    def delay(self, kind: str, retries: int) -> Optional[float]:
+        """
+        다시 시도하기 전 대기 시간 (초)
+
+        Args:
+            kind: 오류 종류
+            retries: 이 작업이 지금까지 재시도한 횟수
+
+        Returns:
+            대기 시간, 다시 시도하지 않을 오류이거나 횟수를 다 썼으면 None
+        """
+        if retries >= self.max_retries.get(kind, 0):
+            return None
+        return backoff_delay(retries, self.base, self.cap, self.rng)
+
+
+class CircuitBreaker:
+    """
+    요청 제한 회로 차단기
+
+    window초 안에 요청 제한 응답이 threshold번 오면 열려(open) cooldown초 동안 새 작업 시작을 막는다.
+    cooldown이 지나면 작업을 다시 내보내되(half-open), 다음 응답이 또 요청 제한이면
+    바로 다시 열고 대기 시간을 두 배로 늘린다 (max_cooldown까지). 성공하면 처음으로 돌아간다.
+    여러 스레드에서 호출된다.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, window: float = BREAKER_WINDOW,
+                 cooldown: float = BREAKER_COOLDOWN, max_cooldown: float = BREAKER_MAX_COOLDOWN,
+                 clock: Callable[[], float] = time.monotonic, log: Callable[[str], None] = None):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.log = log
+        self._failures = []
+        self._next_cooldown = cooldown
+        self._open_until = 0.0
+        self._half_open = False
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """멈춤이 풀리기까지 남은 시간 (초, 닫혀 있으면 0)"""
+        with self._lock:
+            return max(0.0, self._open_until - self.clock())
+
+    @property
+    def is_open(self) -> bool:
+        return self.remaining() > 0
+
+    def record_failure(self, kind: str) -> bool:
+        """
+        실패 기록 - 요청 제한이 아니면 무시
+
+        Returns:
+            이번 실패로 차단기가 열렸는지
+        """
+        if kind != ERROR_RATE_LIMITED:
+            return False
+        with self._lock:
+            now = self.clock()
+            if now < self._open_until:
+                # 이미 멈춘 동안 끝난 작업 (멈추기 전에 시작한 작업)
+                return False
+            self._failures = [t for t in self._failures if now - t < self.window]
+            self._failures.append(now)
+            if not self._half_open and len(self._failures) < self.threshold:
+                return False
+            cooldown = self._next_cooldown
+            self._open_until = now + cooldown
+            self._next_cooldown = min(cooldown * 2, self.max_cooldown)
+            self._half_open = True
+            self._failures = []
+        if self.log:
+            self.log(f"요청 제한 응답이 이어져 {cooldown:.0f}초 동안 새 작업을 멈춤")
+        return True
+
+    def record_success(self):
+        """성공 기록 - 멈춘 뒤 다시 내보낸 작업이 성공하면 대기 시간을 처음으로"""
+        with self._lock:
+            if self._half_open and self.clock() >= self._open_until:
+                self._half_open = False
+                self._next_cooldown = self.cooldown
+                self._failures = []
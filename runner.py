@@ -0,0 +1,434 @@
+"""
+일괄 실행 모듈
+GUI 없이 YouTubeDownloader로 여러 작업을 동시에 실행 (명령줄 cli.py, 로컬 API 서버 api_server.py에서 사용)
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from download_history import DownloadHistory, history_profile
+from downloader import INSUFFICIENT_SPACE_MESSAGE, YouTubeDownloader
+from integrity import INCOMPLETE_DOWNLOAD_MESSAGE
+from job_record import READY_STATUSES, JobRecord, JobStatus
+from job_trace import JobTrace, TraceWriter
+from job_tuner import (
+    INITIAL_CONCURRENT_JOBS, MAX_CONCURRENT_JOBS, MIN_CONCURRENT_JOBS, JobConcurrencyTuner, JobSlots
+)
+from media_id import canonical_url, is_valid_youtube_url
+from postprocess import PostProcessStage
+from profiling import ProfileSwitch
+from retry import ERROR_RATE_LIMITED, CircuitBreaker, RetryPolicy, classify_error
+
+# 불완전한 다운로드를 자동으로 다시 받는 최대 횟수 (GUI와 같음)
+MAX_INTEGRITY_RETRIES = 2
+# 저장 공간 부족으로 보류된 작업을 다시 시도하기까지 기다리는 시간 (초)
+SPACE_RETRY_DELAY = 30.0
+# 작업별 진행률 이벤트 최소 간격 (초)
+PROGRESS_INTERVAL = 1.0
+
+# 작업 대기 상태 (디스패처가 가져가기 전)
+QUEUED = JobStatus.QUEUED
+SPACE_WAIT = JobStatus.SPACE_WAIT
+RETRY_WAIT = JobStatus.RETRY_WAIT
+
+# 작업 최종 상태
+DONE = JobStatus.DONE
+FAILED = JobStatus.FAILED
+SKIPPED = JobStatus.SKIPPED
+CANCELLED = JobStatus.CANCELLED
+
+# 이벤트 콜백: {'event': 종류, 'job': 작업 번호, ...}
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
+class Job(JobRecord):
+    """일괄 실행 작업 하나"""
+
+    __slots__ = ('id', 'message', 'output_path', 'error', 'started_at', 'finished_at',
+                 'cancel_requested', 'downloader')
+
+    def __init__(self, job_id: int, url: str, download_type: str, quality: str):
+        super().__init__(url, download_type=download_type, quality=quality)
+        self.id = job_id
+        self.message = ''
+        self.output_path = None
+        self.error: Optional[str] = None  # 마지막 실패의 오류 종류 (retry.ERROR_*)
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.downloader: Optional[YouTubeDownloader] = None
+        self.trace: Optional[JobTrace] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status.finished
+
+    def result(self) -> Dict[str, Any]:
+        """결과 이벤트 내용"""
+        return {
+            'job': self.id,
+            'url': self.url,
+            'type': self.download_type,
+            'quality': self.quality,
+            'status': self.status.key,
+            'message': self.message,
+            'error': self.error,
+            'path': self.output_path,
+            'seconds': round(self.finished_at - self.started_at, 3)
+            if self.started_at and self.finished_at else None,
+            # 단계별 시간/받은 바이트/재시도/오류 (마지막 시도)
+            'metrics': self.downloader.metrics.summary()
+            if self.downloader is not None and self.downloader.metrics is not None else None,
+        }
+
+
+class JobRunner:
+    """
+    동시 작업 실행기
+
+    submit()으로 작업을 쌓고 run()을 부르면 JobSlots 한도만큼 동시에 실행하고,
+    모든 작업이 끝나면 작업 목록을 반환한다 (serve=True면 close()까지 계속 새 작업을 받음). 동시 작업 수는 GUI와 같은 조절기가 정한다.
+    변환/병합은 후처리 단계로 넘기고 바로 다음 작업을 시작하며,
+    불완전한 다운로드는 다시 받고 저장 공간이 부족하면 잠시 뒤 다시 시도한다.
+    그 밖의 실패는 오류 종류로 나눠 일시적인 오류만 백오프 후 다시 시도하고,
+    요청 제한이 이어지면 회로 차단기가 열린 동안 새 작업을 시작하지 않는다.
+    진행 상황은 on_event로 알린다 (여러 스레드에서 호출됨).
+    """
+
+    def __init__(self, output_path: str = None, history: DownloadHistory = None,
+                 min_jobs: int = MIN_CONCURRENT_JOBS, max_jobs: int = MAX_CONCURRENT_JOBS,
+                 on_event: EventCallback = None, stream_audio: bool = True,
+                 profiler: ProfileSwitch = None, trace: TraceWriter = None,
+                 retry_policy: RetryPolicy = None):
+        """
+        초기화
+
+        Args:
+            output_path: 저장 폴더
+            history: 완료 기록 (지정시 이미 받은 작업은 건너뜀)
+            min_jobs: 최소 동시 작업 수
+            max_jobs: 최대 동시 작업 수 (min_jobs와 같으면 고정)
+            on_event: 이벤트 콜백
+            stream_audio: MP3/WAV 받으면서 변환
+            profiler: 작업 프로파일링 스위치 (실행 중에 켜고 끌 수 있음)
+            trace: 작업 기록 파일 (지정시 작업 수명 주기 이벤트를 남김 - replay.py로 재생)
+            retry_policy: 오류 종류별 재시도 정책 (기본: retry.RetryPolicy())
+        """
+        self.on_event = on_event
+        self.postprocessor = PostProcessStage()
+        self.tuner = JobConcurrencyTuner(min_jobs, max_jobs, postprocessor=self.postprocessor,
+                                         log=lambda line: self._emit('tuner', decision=line))
+        self.slots = JobSlots(self.tuner.clamp(INITIAL_CONCURRENT_JOBS))
+        self.downloader = YouTubeDownloader(output_path, history, self.postprocessor,
+                                            tuner=self.tuner)
+        self.downloader.stream_audio = stream_audio
+        self.downloader.profiler = profiler
+        self.tuner.probe_dir = self.downloader.output_path
+        self.trace = trace
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = CircuitBreaker(log=lambda line: self._emit(
+            'paused', message=line, seconds=round(self.breaker.remaining(), 1)))
+        self.jobs: List[Job] = []
+        self._ready: 'queue.Queue[Job]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._emit_lock = threading.Lock()
+        self._unfinished = 0
+        self._all_done = threading.Event()
+        self._stop = threading.Event()
+        self._closed = threading.Event()
+
+    def _emit(self, event: str, job: Job = None, **fields):
+        if not self.on_event:
+            return
+        payload = {'event': event, 'time': round(time.time(), 3)}
+        if job is not None:
+            payload['job'] = job.id
+        payload.update(fields)
+        with self._emit_lock:
+            self.on_event(payload)
+
+    def submit(self, url: str, download_type: str = 'video', quality: str = None,
+               on_created: Callable[[Job], None] = None) -> Job:
+        """
+        작업 추가
+
+        Args:
+            url: YouTube URL
+            download_type: 'video' 또는 'audio'
+            quality: 화질 (QUALITY_OPTIONS 키) 또는 오디오 포맷 (AUDIO_FORMATS/AUDIO_BUNDLES 키)
+            on_created: 작업 번호가 정해진 직후, 이 작업의 이벤트가 나가기 전에 부를 함수
+                        (호출 측이 자기 작업과 작업 번호를 연결할 때)
+        """
+        url = canonical_url(url)
+        if quality is None:
+            quality = '최고 화질' if download_type == 'video' else 'MP3 (320kbps)'
+        with self._lock:
+            job = Job(len(self.jobs) + 1, url, download_type, quality)
+            self.jobs.append(job)
+        if on_created is not None:
+            on_created(job)
+
+        problem = self._invalid(job)
+        if problem:
+            self._finish(job, FAILED, problem, counted=False)
+            return job
+        if self.trace is not None:
+            job.trace = self.trace.job(url, download_type, quality)
+        with self._lock:
+            self._unfinished += 1
+            self._all_done.clear()
+        self._emit('queued', job, url=url, type=download_type, quality=quality)
+        self._ready.put(job)
+        return job
+
+    @staticmethod
+    def _invalid(job: Job) -> Optional[str]:
+        """작업 요청 검사 (문제가 없으면 None)"""
+        if not is_valid_youtube_url(job.url):
+            return "올바른 YouTube URL이 아닙니다"
+        if job.download_type == 'video':
+            if job.quality not in YouTubeDownloader.QUALITY_OPTIONS:
+                return f"알 수 없는 화질: {job.quality}"
+        elif job.download_type == 'audio':
+            if (job.quality not in YouTubeDownloader.AUDIO_FORMATS
+                    and job.quality not in YouTubeDownloader.AUDIO_BUNDLES):
+                return f"알 수 없는 오디오 포맷: {job.quality}"
+        else:
+            return f"알 수 없는 다운로드 타입: {job.download_type}"
+        return None
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """작업 번호로 찾기"""
+        if 1 <= job_id <= len(self.jobs):
+            return self.jobs[job_id - 1]
+        return None
+
+    def run(self, serve: bool = False) -> List[Job]:
+        """
+        작업 실행
+
+        Args:
+            serve: False면 모든 작업이 끝날 때, True면 close()를 부를 때까지 실행
+        """
+        tuner_stop = threading.Event()
+        if self.tuner.minimum < self.tuner.maximum:
+            self.tuner.run(self.slots, stop=tuner_stop)
+        try:
+            with self._lock:
+                if self._unfinished == 0:
+                    self._all_done.set()
+            while not self._closed.is_set() and (serve or not self._all_done.is_set()):
+                try:
+                    job = self._ready.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if job.finished:
+                    continue
+                if self._stop.is_set():
+                    if self._claim(job):
+                        self._finish(job, CANCELLED, "취소됨")
+                    continue
+                self._wait_breaker()
+                self.slots.acquire()
+                if not self._claim(job):
+                    # 기다리는 동안 취소됨
+                    self.slots.release()
+                    continue
+                threading.Thread(target=self._run_job, args=(job,),
+                                 name=f'job-{job.id}', daemon=True).start()
+        except KeyboardInterrupt:
+            self.cancel()
+            raise
+        finally:
+            tuner_stop.set()
+            self.postprocessor.shutdown(wait=True)
+        return self.jobs
+
+    def _wait_breaker(self):
+        """회로 차단기가 열려 있으면 풀릴 때까지 새 작업 시작을 미룸 (취소/종료하면 바로 반환)"""
+        paused = False
+        while not self._stop.is_set() and not self._closed.is_set():
+            remaining = self.breaker.remaining()
+            if remaining <= 0:
+                break
+            paused = True
+            self._closed.wait(min(remaining, 1.0))
+        if paused:
+            self._emit('resumed')
+
+    def cancel(self):
+        """대기 작업을 취소하고 실행 중인 다운로드 중지"""
+        self._stop.set()
+        for job in self.jobs:
+            if job.downloader is not None and not job.finished:
+                job.downloader.cancel_download()
+
+    def close(self):
+        """모든 작업을 취소하고 run() 종료"""
+        self.cancel()
+        self._closed.set()
+
+    def cancel_job(self, job_id: int) -> bool:
+        """
+        작업 하나 취소
+
+        대기 중이면 바로 취소로 끝내고, 실행 중이면 다운로드를 중지한다
+        (결과는 다운로드가 멈춘 뒤 'result' 이벤트로 알림).
+
+        Returns:
+            취소를 요청했는지 (없거나 이미 끝난 작업이면 False)
+        """
+        job = self.get(job_id)
+        if job is None:
+            return False
+        with self._lock:
+            if job.finished:
+                return False
+            job.cancel_requested = True
+            waiting = job.status in READY_STATUSES
+            if waiting:
+                job.status = CANCELLED
+        if waiting:
+            self._finish(job, CANCELLED, "취소됨")
+        elif job.downloader is not None:
+            job.downloader.cancel_download()
+        return True
+
+    def _claim(self, job: Job) -> bool:
+        """대기 작업을 실행 상태로 (취소와 경합하지 않도록 잠금 안에서)"""
+        with self._lock:
+            if job.status not in READY_STATUSES:
+                return False
+            job.status = JobStatus.DOWNLOADING
+            return True
+
+    def _finish(self, job: Job, status: JobStatus, message: str, counted: bool = True):
+        job.status = status
+        job.message = message
+        job.finished_at = time.time()
+        if job.trace is not None:
+            # 다운로드 시도가 이미 남겼으면 무시됨 (건너뜀, 대기 중 취소 등만 기록)
+            job.trace.finish(status.key, message)
+        fields = job.result()
+        del fields['job']
+        self._emit('result', job, **fields)
+        if counted:
+            with self._lock:
+                self._unfinished -= 1
+                if self._unfinished == 0:
+                    self._all_done.set()
+
+    def _run_job(self, job: Job):
+        """작업 스레드 - 슬롯을 차지한 상태로 시작해 다운로드가 끝나거나 후처리로 넘기면 반납"""
+        slot = [True]
+
+        def release_slot():
+            if slot[0]:
+                slot[0] = False
+                self.slots.release()
+
+        history = self.downloader.history
+        profile = history_profile(job.download_type, job.quality)
+        previous = history.lookup(job.url, profile) if history else None
+        if previous:
+            job.output_path = previous['output_path']
+            release_slot()
+            self._finish(job, SKIPPED, "이미 다운로드됨")
+            return
+
+        job.started_at = job.started_at or time.time()
+        job.downloader = self.downloader.for_job()
+        job.downloader.trace = job.trace
+        self._emit('start', job, url=job.url)
+        last_progress = [0.0]
+
+        def on_progress(progress: Dict[str, Any]):
+            status = progress['status']
+            if status == 'postprocessing':
+                release_slot()
+                self._emit('postprocessing', job)
+            elif status == 'downloading':
+                job.update_progress(progress)
+                now = time.monotonic()
+                if now - last_progress[0] >= PROGRESS_INTERVAL:
+                    last_progress[0] = now
+                    self._emit('progress', job, percent=round(job.progress, 1),
+                               speed=round(job.speed), eta=job.eta,
+                               downloaded=job.downloaded_bytes, total=job.total_bytes)
+
+        def on_complete(success: bool, message: str):
+            release_slot()
+            self._complete(job, success, message)
+
+        try:
+            # 포맷 색인이 있어야 용량 예약/합본 포맷 선택을 로컬에서 처리함 (GUI의 DownloadThread와 같음)
+            # 공간 부족으로 보류했던 작업은 만료되지 않았으면 전 추출 결과를 재사용
+            if job.format_index is None or job.format_index.is_expired():
+                job.format_index = job.downloader.get_format_index(job.url)
+            if job.download_type == 'video':
+                job.downloader.download_video(job.url, job.quality, on_progress, on_complete,
+                                              format_index=job.format_index)
+            else:
+                job.downloader.download_audio(job.url, job.quality, on_progress, on_complete,
+                                              format_index=job.format_index)
+        except Exception as e:
+            on_complete(False, str(e))
+
+    def _complete(self, job: Job, success: bool, message: str):
+        """작업 완료 처리 (다운로드 스레드 또는 후처리 작업자 스레드)"""
+        if not message.startswith(INSUFFICIENT_SPACE_MESSAGE):
+            job.format_index = None
+        if success:
+            history = self.downloader.history
+            previous = history.lookup(job.url, history_profile(job.download_type, job.quality)) \
+                if history else None
+            job.output_path = previous['output_path'] if previous else None
+            self.tuner.record_result(True)
+            self.breaker.record_success()
+            self._finish(job, DONE, message)
+        elif "취소" in message or self._stop.is_set() or job.cancel_requested:
+            self._finish(job, CANCELLED, message)
+        elif (message.startswith(INCOMPLETE_DOWNLOAD_MESSAGE)
+              and job.integrity_retries < MAX_INTEGRITY_RETRIES):
+            job.integrity_retries += 1
+            self.tuner.record_result(False)
+            job.status = QUEUED
+            self._emit('retry', job, message=message, attempt=job.integrity_retries)
+            self._requeue(job, 'integrity')
+        elif message.startswith(INSUFFICIENT_SPACE_MESSAGE):
+            # 실패가 아니라 보류 - 다른 작업이 끝나 예약이 반납되면 들어갈 수 있음
+            # (실행 중인 작업이 없으면 기다려도 공간이 생기지 않으므로 실패)
+            if self.slots.active == 0 and self.postprocessor.pending == 0:
+                self.tuner.record_result(False)
+                self._finish(job, FAILED, message)
+                return
+            job.status = SPACE_WAIT
+            self._emit('waiting', job, message=message, retry_in=SPACE_RETRY_DELAY)
+            timer = threading.Timer(SPACE_RETRY_DELAY, self._requeue, args=(job, 'space'))
+            timer.daemon = True
+            timer.start()
+        else:
+            self.tuner.record_result(False)
+            job.error = classify_error(message)
+            self.breaker.record_failure(job.error)
+            delay = self.retry_policy.delay(job.error, job.error_retries)
+            if delay is None:
+                # 다시 받아도 같은 결과인 오류 (삭제, 지역 제한 등) 또는 재시도 횟수 소진
+                self._finish(job, FAILED, message)
+                return
+            if job.error == ERROR_RATE_LIMITED:
+                delay = max(delay, self.breaker.remaining())
+            job.error_retries += 1
+            job.status = RETRY_WAIT
+            self._emit('retry', job, message=message, error=job.error,
+                       attempt=job.error_retries, retry_in=round(delay, 1))
+            timer = threading.Timer(delay, self._requeue, args=(job, job.error))
+            timer.daemon = True
+            timer.start()
+
+    def _requeue(self, job: Job, reason: str):
+        """다시 시도할 작업을 대기열에 넣음"""
+        if job.trace is not None:
+            job.trace.enqueue(retry=reason)
+        self._ready.put(job)
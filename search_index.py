@@ -0,0 +1,144 @@
+"""
+검색 인덱스 모듈
+1-gram/2-gram 역색인으로 대기열과 다운로드 라이브러리를 입력 즉시 부분 문자열 검색
+"""
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+from media_id import canonical_key
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(str(text or '').casefold().split())
+
+
+def _grams(text: str) -> Set[str]:
+    """문자열의 1-gram과 2-gram 집합 (공백 포함 2-gram 제외)"""
+    grams = set(text)
+    grams.discard(' ')
+    grams.update(text[i:i + 2] for i in range(len(text) - 1) if ' ' not in text[i:i + 2])
+    return grams
+
+
+class SearchIndex:
+    """
+    부분 문자열 검색용 증분 역색인
+
+    문서마다 필드를 이어 붙인 정규화 문자열을 보관하고,
+    1-gram/2-gram → 문서 집합 역색인으로 후보를 좁힌 뒤 실제 포함 여부를 확인한다.
+    검색어는 공백으로 나눈 각 단어를 모두 포함하는 문서를 찾는다 (접두어 검색 포함).
+    """
+
+    def __init__(self):
+        self._texts: Dict[Hashable, str] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._texts
+
+    def update(self, doc_id: Hashable, *fields: Any):
+        """문서 추가 또는 갱신 (바뀐 n-gram만 반영)"""
+        text = _normalize(' '.join(str(f) for f in fields if f))
+        old_text = self._texts.get(doc_id)
+        if old_text == text:
+            return
+
+        old_grams = _grams(old_text) if old_text is not None else set()
+        new_grams = _grams(text)
+        for gram in old_grams - new_grams:
+            self._discard(gram, doc_id)
+        for gram in new_grams - old_grams:
+            self._postings.setdefault(gram, set()).add(doc_id)
+        self._texts[doc_id] = text
+
+    def remove(self, doc_id: Hashable):
+        """문서 삭제"""
+        text = self._texts.pop(doc_id, None)
+        if text is None:
+            return
+        for gram in _grams(text):
+            self._discard(gram, doc_id)
+
+    def search(self, query: str) -> Optional[Set[Hashable]]:
+        """
+        검색
+
+        Returns:
+            일치하는 문서 ID 집합 (검색어가 비어 있으면 None - 전체)
+        """
+        terms = _normalize(query).split()
+        if not terms:
+            return None
+
+        result = None
+        for term in terms:
+            matches = self._search_term(term)
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result
+
+    def _search_term(self, term: str) -> Set[Hashable]:
+        if len(term) == 1:
+            return set(self._postings.get(term, ()))
+
+        postings = []
+        for i in range(len(term) - 1):
+            posting = self._postings.get(term[i:i + 2])
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return candidates
+        if len(term) == 2:
+            return candidates
+        return {doc_id for doc_id in candidates if term in self._texts[doc_id]}
+
+    def _discard(self, gram: str, doc_id: Hashable):
+        posting = self._postings.get(gram)
+        if posting is not None:
+            posting.discard(doc_id)
+            if not posting:
+                del self._postings[gram]
+
+
+class QueueSearchIndex(SearchIndex):
+    """
+    다운로드 대기열 검색 인덱스
+
+    DownloadQueue 리스너로 등록하면 항목 추가/상태 변경/삭제에 맞춰 갱신된다.
+    URL은 전체 문자열 대신 정규화 키(영상 ID)로 색인하고,
+    검색어가 URL이면 같은 키로 바꿔 검색한다.
+    """
+
+    FIELDS = ('title', 'channel', 'status')
+
+    def index_item(self, item: Any):
+        """항목 색인"""
+        self.update(item, *(getattr(item, f, '') for f in self.FIELDS), canonical_key(item.url))
+
+    def search(self, query: str) -> Optional[Set[Hashable]]:
+        query = query.strip()
+        if '://' in query or 'youtu' in query:
+            query = canonical_key(query)
+        return super().search(query)
+
+    # DownloadQueue 리스너 인터페이스
+
+    def item_added(self, item: Any):
+        self.index_item(item)
+
+    def item_changed(self, item: Any, *fields: str):
+        if set(fields) & set(self.FIELDS):
+            self.index_item(item)
+
+    def items_removed(self, items: Iterable[Any]):
+        for item in items:
+            self.remove(item)
@@ -0,0 +1,189 @@
+"""
+세션 대기열 저장 모듈
+SQLite에 다운로드 항목을 한 행씩 저장하여 상태가 바뀔 때마다 변경분만 기록
+"""
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Iterator
+
+from job_record import JobStatus, parse_duration, parse_percent
+
+# 진행률 저장 최소 간격 (초) - 진행률 콜백마다 디스크에 쓰지 않도록
+PROGRESS_SAVE_INTERVAL = 1.0
+
+# 항목 속성 → 컬럼
+ITEM_FIELDS = (
+    'url', 'title', 'duration', 'channel', 'download_type', 'quality',
+    'status', 'progress', 'downloaded_bytes', 'total_bytes', 'thumbnail',
+)
+
+# 스키마 버전 (PRAGMA user_version)
+# 0: 상태/진행률/길이를 표시 문자열로 저장, 1: 숫자 컬럼 (상태 코드, 백분율, 초)
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    title TEXT,
+    duration INTEGER DEFAULT 0,
+    channel TEXT,
+    download_type TEXT,
+    quality TEXT,
+    status INTEGER,
+    progress REAL DEFAULT 0,
+    downloaded_bytes INTEGER DEFAULT 0,
+    total_bytes INTEGER DEFAULT 0,
+    added_at REAL,
+    thumbnail TEXT
+)
+"""
+
+# 처음 스키마 이후 추가된 컬럼 (기존 세션 파일에 ALTER TABLE로 추가)
+_ADDED_COLUMNS = {
+    'thumbnail': 'TEXT',
+}
+
+
+class SessionStore:
+    """
+    다운로드 대기열 영속 저장소
+
+    DownloadQueue의 리스너로 등록하면 항목 추가/상태 변경/삭제가
+    해당 행에 대한 INSERT/UPDATE/DELETE로만 반영된다.
+    항목에는 job_id 속성(저장소 행 ID)이 부여된다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        self._conn.execute(_SCHEMA)
+        existing = {row[1] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+        for column, column_type in _ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        self._conn.commit()
+        if version < SCHEMA_VERSION:
+            self._migrate_numeric()
+        self._last_progress_save: Dict[int, float] = {}
+        self.closed = False
+
+    def _migrate_numeric(self):
+        """
+        이전 버전 세션 파일의 상태/진행률/길이 컬럼을 숫자 컬럼으로 바꿈
+
+        SQLite는 컬럼 타입을 바꿀 수 없으므로 새 스키마로 테이블을 다시 만들고,
+        표시 문자열("대기중", "45.3%", "03:21")이나 숫자 문자열을 숫자로 옮긴다.
+        """
+        types = {row[1]: row[2] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+        columns = ('id',) + ITEM_FIELDS + ('added_at',)
+        try:
+            self._conn.execute('BEGIN')
+            if types.get('status') != 'INTEGER':
+                rows = self._conn.execute(f"SELECT {', '.join(columns)} FROM jobs").fetchall()
+                self._conn.execute('ALTER TABLE jobs RENAME TO jobs_old')
+                self._conn.execute(_SCHEMA)
+                converted = []
+                for row in rows:
+                    values = dict(zip(columns, row))
+                    values['duration'] = parse_duration(values['duration'])
+                    values['status'] = int(JobStatus.parse(values['status']))
+                    values['progress'] = parse_percent(values['progress'])
+                    values['downloaded_bytes'] = int(values['downloaded_bytes'] or 0)
+                    values['total_bytes'] = int(values['total_bytes'] or 0)
+                    converted.append([values[column] for column in columns])
+                self._conn.executemany(
+                    f"INSERT INTO jobs ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    converted,
+                )
+                self._conn.execute('DROP TABLE jobs_old')
+            self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self._conn.commit()
+        except (sqlite3.Error, ValueError):
+            self._conn.rollback()
+
+    def close(self):
+        """저장소 닫기"""
+        self.closed = True
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+
+    def load(self) -> Iterator[Dict[str, Any]]:
+        """
+        저장된 항목을 추가 순서대로 하나씩 반환 (지연 복원용)
+
+        호출 시점까지 저장된 항목만 반환한다 (복원 도중 새로 추가된 항목 제외).
+        """
+        last_id = self._conn.execute("SELECT MAX(id) FROM jobs").fetchone()[0] or 0
+        return self._load_rows(last_id)
+
+    def _load_rows(self, last_id: int) -> Iterator[Dict[str, Any]]:
+        cursor = self._conn.execute(
+            f"SELECT id, {', '.join(ITEM_FIELDS)} FROM jobs WHERE id <= ? ORDER BY id",
+            (last_id,),
+        )
+        columns = ('id',) + ITEM_FIELDS
+        for row in cursor:
+            yield dict(zip(columns, row))
+
+    # DownloadQueue 리스너 인터페이스
+
+    def item_added(self, item: Any):
+        """새 항목 저장 (이미 저장된 복원 항목은 건너뜀)"""
+        if getattr(item, 'job_id', None) is not None:
+            return
+        values = [getattr(item, field, None) for field in ITEM_FIELDS]
+        try:
+            cursor = self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(ITEM_FIELDS)}, added_at) "
+                f"VALUES ({', '.join('?' * len(ITEM_FIELDS))}, ?)",
+                values + [time.time()],
+            )
+            self._conn.commit()
+            item.job_id = cursor.lastrowid
+        except sqlite3.Error:
+            pass
+
+    def item_changed(self, item: Any, *fields: str):
+        """
+        변경된 필드만 저장
+
+        progress/downloaded_bytes/total_bytes만 바뀐 경우 PROGRESS_SAVE_INTERVAL
+        간격으로 묶어서 저장한다.
+        """
+        job_id = getattr(item, 'job_id', None)
+        if job_id is None or not fields:
+            return
+
+        if set(fields) <= {'progress', 'downloaded_bytes', 'total_bytes'}:
+            now = time.monotonic()
+            if now - self._last_progress_save.get(job_id, 0) < PROGRESS_SAVE_INTERVAL:
+                return
+            self._last_progress_save[job_id] = now
+
+        assignments = ', '.join(f"{field} = ?" for field in fields)
+        values = [getattr(item, field, None) for field in fields]
+        try:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", values + [job_id])
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def items_removed(self, items: Iterable[Any]):
+        """삭제된 항목 제거"""
+        ids = [(item.job_id,) for item in items if getattr(item, 'job_id', None) is not None]
+        if not ids:
+            return
+        try:
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", ids)
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
+        for (job_id,) in ids:
+            self._last_progress_save.pop(job_id, None)
@@ -0,0 +1,103 @@
+"""
+GUI 시작 시간 벤치마크
+main.py --startup-benchmark를 새 프로세스로 여러 번 실행해 단계별 시각의 중앙값을 내고,
+-X importtime으로 가장 느린 모듈 로딩을 보여줌
+
+사용법:
+    python startup_benchmark.py -n 5
+    python startup_benchmark.py -n 5 -o startup_history.jsonl   # 결과를 한 줄씩 누적
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT = os.path.join(BASE_DIR, 'main.py')
+
+# 출력 순서 (main.py의 mark_startup 단계)
+STAGES = ('interpreter', 'imports', 'shown', 'first_paint', 'engine_imported',
+          'engine_import_seconds', 'ui_ready', 'session_restored')
+# 한 번 실행 제한 시간 (초)
+RUN_TIMEOUT = 60
+
+
+def run_once(env: dict) -> dict:
+    """main.py를 한 번 띄워 단계별 시각(초) 반환 (interpreter = 프로세스 시작~main.py 실행)"""
+    spawned = time.time()
+    result = subprocess.run([sys.executable, MAIN_SCRIPT, '--startup-benchmark'],
+                            cwd=BASE_DIR, env=env, capture_output=True, text=True,
+                            timeout=RUN_TIMEOUT)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith('{'):
+            report = json.loads(line)
+            marks = dict(report['marks'])
+            marks['interpreter'] = round(report['started_at'] - spawned, 4)
+            return marks
+    raise RuntimeError(f"시작 시간 출력 없음 (종료 코드 {result.returncode}): {result.stderr[-500:]}")
+
+
+def slowest_imports(module: str, limit: int, env: dict) -> list:
+    """-X importtime 결과 중 누적 시간이 긴 최상위 모듈 (모듈, 밀리초)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=BASE_DIR, env=env, capture_output=True, text=True,
+                            timeout=RUN_TIMEOUT)
+    rows, children = [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # 하위 모듈이 먼저 출력되므로 깊이 1 모듈을 모아 두었다가 module 줄에서 확정
+        # (site 등 인터프리터 시작 때 불러온 모듈 제외)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        row = (name.strip(), round(int(cumulative) / 1000, 1))
+        if depth == 1:
+            children.append(row)
+        elif depth == 0:
+            if row[0] == module:
+                rows = children + [row]
+            children = []
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUI 시작 시간 벤치마크")
+    parser.add_argument('-n', '--runs', type=int, default=5, help="실행 횟수 (기본 5)")
+    parser.add_argument('-o', '--output', help="결과를 JSON 한 줄로 덧붙일 파일")
+    parser.add_argument('--imports', type=int, default=10,
+                        help="보여줄 느린 모듈 수 (0이면 생략, 기본 10)")
+    parser.add_argument('--offscreen', action='store_true',
+                        help="화면 없이 실행 (QT_QPA_PLATFORM=offscreen)")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.offscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+
+    runs = [run_once(env) for _ in range(max(1, args.runs))]
+    median = {stage: round(statistics.median(run[stage] for run in runs), 4)
+              for stage in STAGES if all(stage in run for run in runs)}
+
+    print(f"시작 단계별 시각 (중앙값, {len(runs)}회)")
+    for stage, seconds in median.items():
+        print(f"  {stage:<22} {seconds * 1000:8.1f} ms")
+
+    imports = []
+    if args.imports > 0:
+        imports = slowest_imports('main', args.imports, env)
+        print("\n느린 모듈 로딩 (main 기준 누적)")
+        for name, ms in imports:
+            print(f"  {name:<40} {ms:8.1f} ms")
+
+    if args.output:
+        record = {'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'runs': len(runs),
+                  'median': median, 'imports': imports}
+        with open(args.output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
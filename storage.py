@@ -0,0 +1,118 @@
+"""
+저장 공간 모듈
+다운로드 시작 전 여유 공간 확인(진행 중인 작업 예약분 포함)과 출력 파일 사전 할당
+"""
+import ctypes
+import os
+import shutil
+import sys
+import threading
+from typing import Dict, Hashable, Tuple
+
+# 예약과 별도로 항상 남겨 둘 여유 공간
+FREE_SPACE_MARGIN = 512 * 1024 * 1024
+
+# Linux fallocate 플래그 - 파일 크기는 그대로 두고 블록만 확보 (yt-dlp 이어받기와 충돌 없음)
+_FALLOC_FL_KEEP_SIZE = 0x01
+
+
+def _existing(path: str) -> str:
+    """path가 아직 없으면 가장 가까운 존재하는 상위 폴더"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def free_bytes(path: str) -> int:
+    """path가 있는 디스크의 여유 공간"""
+    try:
+        return shutil.disk_usage(_existing(path)).free
+    except OSError:
+        return 0
+
+
+def _volume(path: str) -> Hashable:
+    """같은 디스크인지 구분하는 키"""
+    path = _existing(path)
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return path
+
+
+class SpaceReservations:
+    """
+    디스크별 공간 예약 장부
+
+    시작한 작업은 예상 최대 사용량을 예약하고 끝나면 반납한다.
+    새 작업은 (여유 공간 - 다른 작업 예약분 - FREE_SPACE_MARGIN)에 들어갈 때만 시작한다.
+    이미 쓴 만큼 여유 공간이 줄어들므로 예약은 작업이 끝날 때까지 보수적으로 유지한다.
+    """
+
+    def __init__(self, margin: int = FREE_SPACE_MARGIN):
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._reserved: Dict[Hashable, Tuple[Hashable, int]] = {}
+
+    def reserved(self, directory: str) -> int:
+        """directory와 같은 디스크에 예약된 합계"""
+        volume = _volume(directory)
+        with self._lock:
+            return sum(size for v, size in self._reserved.values() if v == volume)
+
+    def try_reserve(self, key: Hashable, directory: str, size: int) -> Tuple[bool, int]:
+        """
+        공간 예약
+
+        Args:
+            key: 작업 키 (반납할 때 사용)
+            directory: 저장 폴더
+            size: 예상 최대 사용량 (바이트)
+
+        Returns:
+            (예약 성공 여부, 사용 가능한 공간)
+        """
+        volume = _volume(directory)
+        free = free_bytes(directory)
+        with self._lock:
+            others = sum(s for k, (v, s) in self._reserved.items() if v == volume and k != key)
+            available = max(free - others - self.margin, 0)
+            if size > available:
+                return False, available
+            self._reserved[key] = (volume, size)
+            return True, available
+
+    def release(self, key: Hashable):
+        """예약 반납"""
+        with self._lock:
+            self._reserved.pop(key, None)
+
+
+def preallocate(path: str, size: int) -> bool:
+    """
+    파일 크기를 바꾸지 않고 디스크 블록을 미리 확보
+
+    이어쓰기가 파일 끝 위치를 기준으로 하므로 크기는 유지하고 할당만 늘린다.
+    Linux(fallocate KEEP_SIZE)만 지원한다. Windows는 파일 끝을 넘는 할당
+    (FileAllocationInfo)을 마지막 핸들이 닫힐 때 NTFS가 잘라내므로,
+    다운로드 내내 핸들을 열어 두지 않는 한 효과가 없어 하지 않는다.
+
+    Returns:
+        사전 할당 여부
+    """
+    if size <= 0:
+        return False
+    try:
+        if sys.platform.startswith('linux'):
+            libc = ctypes.CDLL(None, use_errno=True)
+            fallocate = libc.fallocate
+            fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong]
+            with open(path, 'ab') as f:
+                return fallocate(f.fileno(), _FALLOC_FL_KEEP_SIZE, 0, size) == 0
+    except (OSError, AttributeError):
+        pass
+    return False
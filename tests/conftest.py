@@ -0,0 +1,104 @@
+"""
+테스트 공용 설정과 로컬 조각 스트림(HLS) 서버
+"""
+import http.server
+import os
+import socketserver
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 조각 수와 크기, 조각 하나를 내주기 전 지연 (동시 요청 수에 따라 처리량이 달라지도록)
+SEGMENT_COUNT = 12
+SEGMENT_BYTES = 32 * 1024
+SEGMENT_DELAY = 0.1
+
+
+class HlsServer:
+    """
+    조각마다 지연을 두고 동시 요청 수를 기록하는 HLS 서버
+
+    throttle을 켜면 동시 요청이 throttle_above를 넘을 때 429로 응답한다.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.throttle = False
+        self.throttle_above = 1
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/index.m3u8"
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self._server.server_address[1]}"
+
+    def reset_peak(self):
+        with self._lock:
+            self.peak = 0
+
+    def start(self):
+        fixture = self
+
+        class Handler(http.server.SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=fixture.directory, **kwargs)
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if not self.path.endswith('.ts'):
+                    return super().do_GET()
+                with fixture._lock:
+                    fixture.active += 1
+                    fixture.peak = max(fixture.peak, fixture.active)
+                    concurrent = fixture.active
+                try:
+                    if fixture.throttle and concurrent > fixture.throttle_above:
+                        self.send_response(429)
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    time.sleep(SEGMENT_DELAY)
+                    return super().do_GET()
+                finally:
+                    with fixture._lock:
+                        fixture.active -= 1
+
+        class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+            daemon_threads = True
+
+        self._server = Server(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def hls_server(tmp_path):
+    """로컬 HLS 스트림 (SEGMENT_COUNT개 조각)"""
+    root = tmp_path / 'hls'
+    root.mkdir()
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:3', '#EXT-X-MEDIA-SEQUENCE:0']
+    for i in range(SEGMENT_COUNT):
+        (root / f'seg{i:03d}.ts').write_bytes(os.urandom(SEGMENT_BYTES))
+        lines += ['#EXTINF:3.000000,', f'seg{i:03d}.ts']
+    lines.append('#EXT-X-ENDLIST')
+    (root / 'index.m3u8').write_text('\n'.join(lines) + '\n')
+
+    server = HlsServer(str(root))
+    server.start()
+    yield server
+    server.stop()
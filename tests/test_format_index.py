@@ -0,0 +1,106 @@
+"""
+포맷 색인 테스트 (선택 문자열 해석, 병합 없는 포맷 선택, 만료)
+"""
+import time
+import types
+
+import format_index
+from format_index import FormatIndex
+
+
+def fmt(format_id, height=None, vcodec='none', acodec='none', size=1000, fps=None, ext='mp4',
+        url='https://r.example/videoplayback'):
+    return {'format_id': format_id, 'height': height, 'vcodec': vcodec, 'acodec': acodec,
+            'filesize': size, 'fps': fps, 'ext': ext, 'url': url}
+
+
+# yt-dlp 정렬 순서 - 뒤쪽일수록 좋은 포맷
+FORMATS = [
+    fmt('140', acodec='mp4a.40.2', ext='m4a', size=300),
+    fmt('251', acodec='opus', ext='webm', size=350),
+    fmt('18', 360, 'avc1.42001E', 'mp4a.40.2', size=800, fps=30),
+    fmt('136', 720, 'avc1.4d401f', size=2000, fps=30),
+    fmt('247', 720, 'vp9', ext='webm', size=1800, fps=30),
+    fmt('137', 1080, 'avc1.640028', size=5000, fps=30),
+    fmt('248', 1080, 'vp9', ext='webm', size=4500, fps=30),
+]
+
+
+def make_index(formats=FORMATS, **info):
+    return FormatIndex({'id': 'abcdefghijk', 'duration': 60, 'formats': formats, **info})
+
+
+def test_formats_are_split_by_kind():
+    index = make_index()
+    assert [e['format_id'] for e in index.muxed] == ['18']
+    assert [e['format_id'] for e in index.video] == ['136', '247', '137', '248']
+    assert [e['format_id'] for e in index.audio] == ['140', '251']
+    assert not make_index([])
+
+
+def test_resolve_picks_best_matching():
+    index = make_index()
+    assert index.resolve('bestvideo+bestaudio/best') == ('248+251', 4850)
+    assert index.resolve('bestvideo[height<=720]+bestaudio/best') == ('247+251', 2150)
+    assert index.resolve('bestvideo[height<=240]+bestaudio/best[height<=360]') == ('18', 800)
+    assert index.resolve('bestaudio[ext=m4a]') == ('140', 300)
+    # 지원하지 않는 선택 문자열
+    assert index.resolve('worst') is None
+
+
+def test_size_falls_back_to_bitrate_times_duration():
+    index = make_index([fmt('140', acodec='mp4a.40.2', size=None) | {'tbr': 128}])
+    assert index.audio[0]['size'] == 128 * 1000 // 8 * 60
+
+
+def test_merge_free_prefers_muxed_of_same_quality():
+    formats = FORMATS + [fmt('22', 1080, 'avc1.64001F', 'mp4a.40.2', size=5200, fps=30)]
+    assert make_index(formats).resolve_merge_free('bestvideo+bestaudio/best') == ('22', 5200)
+
+
+def test_merge_free_keeps_pair_that_fits_a_container():
+    index = make_index()
+    # vp9 + opus는 webm에 그대로 담김
+    assert index.resolve_merge_free('bestvideo+bestaudio/best') == ('248+251', 4850)
+
+
+def test_merge_free_swaps_to_container_compatible_pair():
+    formats = [f for f in FORMATS if f['format_id'] != '251']
+    index = make_index(formats)
+    assert index.resolve('bestvideo+bestaudio/best') == ('248+140', 4800)
+    # vp9 + aac는 어느 컨테이너에도 그대로 담기지 않음 - 같은 해상도의 avc1 + aac
+    assert index.resolve_merge_free('bestvideo+bestaudio/best') == ('137+140', 5300)
+    assert index.resolve_merge_free('bestvideo+bestaudio/best', 'webm') == ('248+140', 4800)
+
+
+def test_merge_free_does_not_lower_quality():
+    formats = [f for f in FORMATS if f['format_id'] not in ('251', '137')]
+    index = make_index(formats)
+    # 같은 해상도에 담기는 조합이 없으면 원래 결과
+    assert index.resolve_merge_free('bestvideo+bestaudio/best') == ('248+140', 4800)
+
+
+def test_merge_free_passes_through_single_format():
+    assert make_index().resolve_merge_free('bestaudio') == ('251', 350)
+    assert make_index().resolve_merge_free('worst') is None
+
+
+def test_expiry_from_stream_url():
+    soon = int(time.time()) + 30 * 60
+    index = make_index([fmt('140', acodec='mp4a.40.2',
+                            url=f'https://r.example/videoplayback?expire={soon}&id=1')])
+    assert index.expires_at == soon
+    assert not index.is_expired()
+    assert index.is_expired(margin=31 * 60)
+
+    path_style = make_index([fmt('140', acodec='mp4a.40.2',
+                                 url=f'https://r.example/videoplayback/expire/{soon}/id/1')])
+    assert path_style.expires_at == soon
+
+
+def test_expiry_defaults_to_ttl(monkeypatch):
+    index = make_index()
+    assert index.expires_at == index.extracted_at + format_index.STREAM_URL_TTL
+    now = index.expires_at - format_index.EXPIRE_MARGIN
+    monkeypatch.setattr(format_index, 'time', types.SimpleNamespace(time=lambda: now))
+    assert index.is_expired()
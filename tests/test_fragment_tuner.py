@@ -0,0 +1,92 @@
+"""
+조각 동시 다운로드 조절 테스트 (로컬 HLS 서버에 실제 yt-dlp 다운로드)
+"""
+import pytest
+
+import fragment_tuner
+from fragment_tuner import ConnectionBudget, FragmentSession, FragmentTuner
+
+yt_dlp = pytest.importorskip('yt_dlp')
+from downloader import TunedYoutubeDL  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def small_samples(monkeypatch):
+    # 테스트 스트림은 작으므로 모든 다운로드를 측정값으로 사용
+    monkeypatch.setattr(fragment_tuner, 'MIN_SAMPLE_BYTES', 1)
+
+
+def download(server, tmp_path, tuner, budget):
+    options = {
+        'outtmpl': str(tmp_path / 'out' / '%(id)s.%(ext)s'),
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+        'fixup': 'never',
+        'overwrites': True,
+        'fragment_retries': 10,
+        'retry_sleep_functions': {'fragment': lambda n: 0.05},
+    }
+    server.reset_peak()
+    with TunedYoutubeDL(options, fragment_tuner=tuner, connections=budget) as ydl:
+        assert ydl.download([server.url]) == 0
+
+
+def test_level_ramps_up_while_throughput_improves(hls_server, tmp_path):
+    tuner = FragmentTuner(initial=2, maximum=8)
+    budget = ConnectionBudget(16)
+    levels = []
+    for _ in range(3):
+        download(hls_server, tmp_path, tuner, budget)
+        levels.append(tuner.level(hls_server.host))
+    assert levels[0] > 2
+    assert levels == sorted(levels) and levels[-1] > levels[0]
+    assert budget.in_use == 0 and budget.holders == 0
+
+
+def test_level_halves_on_429(hls_server, tmp_path):
+    tuner = FragmentTuner(initial=6, maximum=8)
+    budget = ConnectionBudget(16)
+    hls_server.throttle = True
+    download(hls_server, tmp_path, tuner, budget)
+    assert tuner.level(hls_server.host) == 3
+
+
+def test_connections_stay_within_budget(hls_server, tmp_path):
+    tuner = FragmentTuner(initial=8, maximum=8)
+    budget = ConnectionBudget(3)
+    download(hls_server, tmp_path, tuner, budget)
+    assert 1 < hls_server.peak <= 3
+    assert budget.in_use == 0
+
+
+def test_one_job_takes_only_its_share():
+    budget = ConnectionBudget(16)
+    held = budget.acquire(2)
+    # 다른 작업이 쓰는 중이면 몫(limit // 작업 수)만 받아 나머지 작업이 기다리지 않음
+    assert budget.acquire(16) == 8
+    assert budget.acquire(16) == 5
+    assert budget.in_use == 2 + 8 + 5 and budget.holders == 3
+    assert held == 2
+
+
+def test_default_level_cap_is_below_budget():
+    assert fragment_tuner.MAX_FRAGMENT_CONCURRENCY < fragment_tuner.GLOBAL_CONNECTION_LIMIT
+
+
+def test_contended_grant_is_not_read_as_step_down():
+    tuner = FragmentTuner(initial=4, maximum=8)
+    tuner.report('h', 4, 10_000_000, 1.0)
+    assert tuner.level('h') == 5
+    # 예산 경합으로 2개만 받아 느렸던 다운로드 - 단계를 내리지 않음
+    tuner.report('h', 5, 10_000_000, 4.0, granted=2)
+    assert tuner.level('h') == 5
+
+
+def test_403_is_not_throttling():
+    session = FragmentSession({'protocol': 'm3u8_native', 'url': 'https://h/x.m3u8'},
+                              FragmentTuner(), ConnectionBudget())
+    session.observe('ERROR: unable to download video data: HTTP Error 403: Forbidden')
+    assert not session.throttled
+    session.observe('Got error: HTTP Error 429: Too Many Requests. Retrying fragment 3')
+    assert session.throttled
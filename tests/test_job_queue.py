@@ -0,0 +1,108 @@
+"""
+다운로드 대기열 테스트 (상태 버킷, 지연 삭제 힙, 리스너 통지)
+"""
+from job_queue import DownloadQueue
+from job_record import JobRecord, JobStatus
+
+
+class Recorder:
+    """리스너 통지 기록"""
+
+    def __init__(self):
+        self.events = []
+
+    def item_added(self, item):
+        self.events.append(('added', item.url))
+
+    def item_changed(self, item, *fields):
+        self.events.append(('changed', item.url) + fields)
+
+    def items_removed(self, items):
+        self.events.append(('removed',) + tuple(item.url for item in items))
+
+
+def make_queue(count, listeners=()):
+    queue = DownloadQueue(listeners)
+    items = [JobRecord(f'https://www.youtube.com/watch?v=abcdefghij{i}') for i in range(count)]
+    for item in items:
+        queue.add(item)
+    return queue, items
+
+
+def test_next_pending_follows_row_order():
+    queue, items = make_queue(3)
+    assert queue.next_pending() is items[0]
+    queue.set_status(items[0], JobStatus.DOWNLOADING)
+    assert queue.next_pending() is items[1]
+    # 다시 대기로 돌아오면 원래 순서대로 앞에 선다
+    queue.set_status(items[0], JobStatus.QUEUED)
+    assert queue.next_pending() is items[0]
+
+
+def test_stale_heap_entries_are_skipped():
+    queue, items = make_queue(3)
+    queue.set_status(items[0], JobStatus.DONE)
+    queue.remove_rows([1])
+    assert queue.next_pending() is items[2]
+    queue.set_status(items[2], JobStatus.FAILED)
+    assert queue.next_pending() is None
+    assert not queue.has_pending()
+
+
+def test_requeue_does_not_duplicate_heap_entries():
+    queue, items = make_queue(1)
+    for _ in range(3):
+        queue.set_status(items[0], JobStatus.DOWNLOADING)
+        queue.set_status(items[0], JobStatus.QUEUED)
+    assert len(queue._pending_heap) == 1
+
+
+def test_status_buckets_track_changes():
+    queue, items = make_queue(4)
+    queue.set_status(items[3], JobStatus.DONE)
+    queue.set_status(items[1], JobStatus.DONE)
+    queue.set_status(items[2], JobStatus.FAILED)
+    assert queue.count(JobStatus.DONE) == 2
+    assert queue.count(JobStatus.DONE, JobStatus.FAILED, JobStatus.QUEUED) == 4
+    assert queue.items_with(JobStatus.DONE, JobStatus.QUEUED) == [items[0], items[1], items[3]]
+
+
+def test_find_uses_canonical_key():
+    queue, items = make_queue(2)
+    assert queue.find('https://youtu.be/abcdefghij1?t=30') is items[1]
+    queue.remove_rows([1])
+    assert queue.find('https://youtu.be/abcdefghij1') is None
+
+
+def test_remove_rows_reindexes_and_returns_descending_rows():
+    queue, items = make_queue(5)
+    assert queue.remove_rows([3, 1, 1, 9]) == [3, 1]
+    assert list(queue) == [items[0], items[2], items[4]]
+    assert [queue.row_of(item) for item in queue] == [0, 1, 2]
+    assert queue.row_of(items[1]) is None
+    assert queue.remove_rows([]) == []
+
+
+def test_removed_item_status_change_is_not_indexed():
+    recorder = Recorder()
+    queue, items = make_queue(2, [recorder])
+    queue.remove_rows([0])
+    queue.set_status(items[0], JobStatus.DONE)
+    assert items[0].status == JobStatus.DONE
+    assert queue.count(JobStatus.DONE) == 0
+    assert ('changed', items[0].url, 'status') not in recorder.events
+
+
+def test_listeners_are_notified():
+    recorder = Recorder()
+    queue, items = make_queue(2, [recorder])
+    queue.set_status(items[0], JobStatus.DOWNLOADING)
+    queue.set_status(items[0], JobStatus.DOWNLOADING)
+    queue.item_changed(items[1], 'progress')
+    queue.remove_rows([0, 1])
+    assert recorder.events == [
+        ('added', items[0].url), ('added', items[1].url),
+        ('changed', items[0].url, 'status'),
+        ('changed', items[1].url, 'progress'),
+        ('removed', items[1].url, items[0].url),
+    ]
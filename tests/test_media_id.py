@@ -0,0 +1,78 @@
+"""
+미디어 ID 정규화 테스트
+"""
+import pytest
+
+from media_id import (
+    MEDIA_PLAYLIST, MEDIA_SHORT, MEDIA_VIDEO, MediaId, canonical_key, canonical_url,
+    is_valid_youtube_url, parse_many, parse_media,
+)
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+@pytest.mark.parametrize('url', [
+    f'https://www.youtube.com/watch?v={VIDEO_ID}',
+    f'http://youtube.com/watch?v={VIDEO_ID}',
+    f'youtube.com/watch?v={VIDEO_ID}',
+    f'https://m.youtube.com/watch?v={VIDEO_ID}&feature=share',
+    f'https://music.youtube.com/watch?v={VIDEO_ID}&si=abc',
+    f'https://www.youtube.com/watch?feature=shared&v={VIDEO_ID}&t=42s',
+    f'https://www.youtube.com/watch?v={VIDEO_ID}&list=PLabcdef123',
+    f'https://youtu.be/{VIDEO_ID}',
+    f'https://youtu.be/{VIDEO_ID}?t=10&si=xyz',
+    f'https://www.youtube.com/embed/{VIDEO_ID}',
+    f'https://www.youtube-nocookie.com/embed/{VIDEO_ID}?start=5',
+    f'https://www.youtube.com/v/{VIDEO_ID}',
+    f'https://www.youtube.com/live/{VIDEO_ID}?feature=share',
+    f'  https://WWW.YOUTUBE.COM/watch?v={VIDEO_ID}  ',
+])
+def test_video_forms(url):
+    assert parse_media(url) == MediaId(MEDIA_VIDEO, VIDEO_ID)
+    assert canonical_key(url) == f'video:{VIDEO_ID}'
+    assert canonical_url(url) == f'https://www.youtube.com/watch?v={VIDEO_ID}'
+
+
+def test_short_shares_video_key():
+    media = parse_media(f'https://www.youtube.com/shorts/{VIDEO_ID}?feature=share')
+    assert media == MediaId(MEDIA_SHORT, VIDEO_ID)
+    assert media.key == f'video:{VIDEO_ID}'
+    assert media.url == f'https://www.youtube.com/watch?v={VIDEO_ID}'
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/playlist?list=PLabc-def_123',
+    'https://www.youtube.com/watch?list=PLabc-def_123',
+    'https://www.youtube.com/playlist?feature=share&list=PLabc-def_123',
+])
+def test_playlist_forms(url):
+    media = parse_media(url)
+    assert media == MediaId(MEDIA_PLAYLIST, 'PLabc-def_123')
+    assert media.key == 'playlist:PLabc-def_123'
+    assert media.url == 'https://www.youtube.com/playlist?list=PLabc-def_123'
+
+
+@pytest.mark.parametrize('url', [
+    '',
+    'not a url',
+    'https://vimeo.com/123456',
+    'https://www.youtube.com/',
+    'https://www.youtube.com/watch?v=short',
+    'https://www.youtube.com/watch?vv=dQw4w9WgXcQ',
+    'https://youtu.be/',
+    'https://www.youtube.com/channel/UCabcdefghijklmnop',
+    'https://evil.example/?u=https://youtu.be/dQw4w9WgXcQ',
+])
+def test_unsupported_urls(url):
+    assert parse_media(url) is None
+    assert not is_valid_youtube_url(url)
+
+
+def test_unsupported_url_keys_are_stripped_input():
+    assert canonical_key('  https://vimeo.com/1 ') == 'https://vimeo.com/1'
+    assert canonical_url('  https://vimeo.com/1 ') == 'https://vimeo.com/1'
+
+
+def test_parse_many_matches_parse_media():
+    urls = [f'https://youtu.be/{VIDEO_ID}', 'nope', 'https://www.youtube.com/playlist?list=PL1']
+    assert parse_many(urls) == [parse_media(url) for url in urls]
@@ -0,0 +1,138 @@
+"""
+오류 분류, 재시도 정책, 요청 제한 회로 차단기 테스트
+"""
+import pytest
+
+from retry import (
+    ERROR_GEO_BLOCKED, ERROR_NETWORK, ERROR_POSTPROCESS, ERROR_RATE_LIMITED, ERROR_REMOVED,
+    ERROR_RESTRICTED, ERROR_UNKNOWN, CircuitBreaker, RetryPolicy, backoff_delay, classify_error,
+)
+
+
+@pytest.mark.parametrize('message, kind', [
+    ('ERROR: unable to download video data: HTTP Error 429: Too Many Requests', ERROR_RATE_LIMITED),
+    ("ERROR: [youtube] x: Sign in to confirm you're not a bot", ERROR_RATE_LIMITED),
+    # 요청 제한은 네트워크 오류 패턴(Got error)보다 먼저 본다
+    ('Got error: HTTP Error 429: Too Many Requests. Retrying fragment 3', ERROR_RATE_LIMITED),
+    ('ERROR: The uploader has not made this video available in your country', ERROR_GEO_BLOCKED),
+    ('ERROR: Sign in to confirm your age. This video may be inappropriate', ERROR_RESTRICTED),
+    ('ERROR: Join this channel to get access to members-only content', ERROR_RESTRICTED),
+    ('ERROR: Private video. Sign in if you have been granted access', ERROR_RESTRICTED),
+    ('ERROR: [youtube] x: Video unavailable', ERROR_REMOVED),
+    ('ERROR: Private video', ERROR_REMOVED),
+    ('ERROR: unable to download video data: HTTP Error 404: Not Found', ERROR_REMOVED),
+    ('변환 실패: Invalid data found when processing input', ERROR_POSTPROCESS),
+    ('ERROR: unable to download video data: HTTP Error 503: Service Unavailable', ERROR_NETWORK),
+    ('ERROR: Read timed out.', ERROR_NETWORK),
+    ('[Errno 104] Connection reset by peer', ERROR_NETWORK),
+    ('ERROR: something odd happened', ERROR_UNKNOWN),
+    ('', ERROR_UNKNOWN),
+    (None, ERROR_UNKNOWN),
+])
+def test_classify_error(message, kind):
+    assert classify_error(message) == kind
+
+
+def test_backoff_delay_bounds():
+    assert backoff_delay(0, base=5, cap=300, rng=lambda: 0.0) == 2.5
+    assert backoff_delay(0, base=5, cap=300, rng=lambda: 1.0) == 5.0
+    assert backoff_delay(3, base=5, cap=300, rng=lambda: 0.0) == 20.0
+    # 상한을 넘지 않고, 상한의 절반은 보장
+    assert backoff_delay(20, base=5, cap=300, rng=lambda: 1.0) == 300.0
+    assert backoff_delay(20, base=5, cap=300, rng=lambda: 0.0) == 150.0
+
+
+def test_retry_policy_limits_per_kind():
+    policy = RetryPolicy({ERROR_NETWORK: 2}, base=1, cap=10, rng=lambda: 1.0)
+    assert policy.delay(ERROR_NETWORK, 0) == 1.0
+    assert policy.delay(ERROR_NETWORK, 1) == 2.0
+    assert policy.delay(ERROR_NETWORK, 2) is None
+    # 다시 받아도 같은 결과인 오류는 재시도하지 않음
+    assert policy.delay(ERROR_REMOVED, 0) is None
+    assert policy.delay(ERROR_UNKNOWN, 0) is None
+
+
+def test_retry_policy_default_table_is_copied():
+    policy = RetryPolicy()
+    policy.max_retries[ERROR_NETWORK] = 0
+    assert RetryPolicy().delay(ERROR_NETWORK, 0) is not None
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(threshold=3, window=60, cooldown=10, max_cooldown=30, clock=clock)
+
+
+def test_breaker_opens_after_threshold_within_window(breaker, clock):
+    assert not breaker.record_failure(ERROR_RATE_LIMITED)
+    clock.now += 61
+    # 창을 벗어난 실패는 세지 않음
+    assert not breaker.record_failure(ERROR_RATE_LIMITED)
+    assert not breaker.record_failure(ERROR_RATE_LIMITED)
+    assert not breaker.record_failure(ERROR_NETWORK)
+    assert not breaker.is_open
+    assert breaker.record_failure(ERROR_RATE_LIMITED)
+    assert breaker.remaining() == 10
+    clock.now += 4
+    assert breaker.remaining() == 6
+
+
+def test_breaker_ignores_failures_while_open(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure(ERROR_RATE_LIMITED)
+    clock.now += 5
+    assert not breaker.record_failure(ERROR_RATE_LIMITED)
+    assert breaker.remaining() == 5
+
+
+def test_half_open_failure_reopens_with_doubled_cooldown(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure(ERROR_RATE_LIMITED)
+    clock.now += 10
+    assert not breaker.is_open
+    # 다시 내보낸 첫 작업이 또 요청 제한이면 한 번에 다시 열림
+    assert breaker.record_failure(ERROR_RATE_LIMITED)
+    assert breaker.remaining() == 20
+    clock.now += 20
+    assert breaker.record_failure(ERROR_RATE_LIMITED)
+    assert breaker.remaining() == 30  # max_cooldown
+    clock.now += 30
+    assert breaker.record_failure(ERROR_RATE_LIMITED)
+    assert breaker.remaining() == 30
+
+
+def test_half_open_success_resets(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure(ERROR_RATE_LIMITED)
+    # 멈추기 전에 시작한 작업이 멈춘 동안 성공해도 그대로
+    breaker.record_success()
+    clock.now += 10
+    assert breaker.record_failure(ERROR_RATE_LIMITED)
+    assert breaker.remaining() == 20
+    clock.now += 20
+    breaker.record_success()
+    # 처음 상태 - 다시 threshold번이 필요하고 대기 시간도 처음 값
+    assert not breaker.record_failure(ERROR_RATE_LIMITED)
+    assert not breaker.record_failure(ERROR_RATE_LIMITED)
+    assert breaker.record_failure(ERROR_RATE_LIMITED)
+    assert breaker.remaining() == 10
+
+
+def test_breaker_logs_when_opening(clock):
+    lines = []
+    breaker = CircuitBreaker(threshold=1, cooldown=7, clock=clock, log=lines.append)
+    breaker.record_failure(ERROR_RATE_LIMITED)
+    assert lines == ["요청 제한 응답이 이어져 7초 동안 새 작업을 멈춤"]
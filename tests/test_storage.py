@@ -0,0 +1,67 @@
+"""
+디스크 공간 예약 장부 테스트
+"""
+import pytest
+
+import storage
+from storage import SpaceReservations
+
+GB = 1024 ** 3
+
+
+@pytest.fixture
+def free(monkeypatch):
+    # 여유 공간은 고정값으로 (실제 디스크 상태와 무관하게)
+    space = {'bytes': 10 * GB}
+    monkeypatch.setattr(storage, 'free_bytes', lambda path: space['bytes'])
+    return space
+
+
+def test_reservations_share_free_space(tmp_path, free):
+    ledger = SpaceReservations(margin=1 * GB)
+    ok, available = ledger.try_reserve('a', str(tmp_path), 6 * GB)
+    assert (ok, available) == (True, 9 * GB)
+    # 다른 작업 예약분과 여유분을 뺀 공간에 들어가야 함
+    assert ledger.try_reserve('b', str(tmp_path), 4 * GB) == (False, 3 * GB)
+    assert ledger.try_reserve('b', str(tmp_path), 3 * GB) == (True, 3 * GB)
+    assert ledger.reserved(str(tmp_path)) == 9 * GB
+
+
+def test_release_returns_space(tmp_path, free):
+    ledger = SpaceReservations(margin=0)
+    ledger.try_reserve('a', str(tmp_path), 8 * GB)
+    assert not ledger.try_reserve('b', str(tmp_path), 4 * GB)[0]
+    ledger.release('a')
+    ledger.release('missing')
+    assert ledger.try_reserve('b', str(tmp_path), 4 * GB)[0]
+    assert ledger.reserved(str(tmp_path)) == 4 * GB
+
+
+def test_same_key_replaces_its_own_reservation(tmp_path, free):
+    ledger = SpaceReservations(margin=0)
+    ledger.try_reserve('a', str(tmp_path), 8 * GB)
+    # 같은 작업이 다시 예약하면 자기 예약분은 빼지 않고 바꿈
+    assert ledger.try_reserve('a', str(tmp_path), 9 * GB) == (True, 10 * GB)
+    assert ledger.reserved(str(tmp_path)) == 9 * GB
+
+
+def test_distinct_keys_for_same_target_do_not_collide(tmp_path, free):
+    ledger = SpaceReservations(margin=0)
+    first, second = object(), object()
+    ledger.try_reserve(first, str(tmp_path), 3 * GB)
+    ledger.try_reserve(second, str(tmp_path), 3 * GB)
+    ledger.release(first)
+    assert ledger.reserved(str(tmp_path)) == 3 * GB
+
+
+def test_missing_directory_uses_existing_parent(tmp_path, free):
+    ledger = SpaceReservations(margin=0)
+    ledger.try_reserve('a', str(tmp_path / 'not' / 'yet'), 2 * GB)
+    assert ledger.reserved(str(tmp_path)) == 2 * GB
+
+
+def test_shrinking_free_space_blocks_new_work(tmp_path, free):
+    ledger = SpaceReservations(margin=0)
+    ledger.try_reserve('a', str(tmp_path), 2 * GB)
+    free['bytes'] = 3 * GB
+    assert ledger.try_reserve('b', str(tmp_path), 2 * GB) == (False, 1 * GB)
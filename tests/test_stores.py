@@ -0,0 +1,167 @@
+"""
+세션 저장소와 다운로드 기록 저장/복원 테스트
+"""
+import sqlite3
+import time
+import types
+
+import pytest
+
+import session_store
+from download_history import DownloadHistory, history_profile
+from job_record import JobRecord, JobStatus
+from session_store import SCHEMA_VERSION, SessionStore
+
+
+@pytest.fixture
+def session(tmp_path):
+    store = SessionStore(str(tmp_path / 'session.db'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = DownloadHistory(str(tmp_path / 'history.db'))
+    yield history
+    history.close()
+
+
+def test_session_round_trip_keeps_numeric_fields(session):
+    item = JobRecord('https://youtu.be/abcdefghijk', '제목', 3723, '채널', 'audio', 'MP3 (320kbps)')
+    item.status = JobStatus.DOWNLOADING
+    item.progress = 42.5
+    item.downloaded_bytes = 1024
+    item.total_bytes = 4096
+    session.item_added(item)
+    assert item.job_id is not None
+    # 이미 저장된 항목은 다시 추가하지 않음
+    session.item_added(item)
+
+    rows = list(session.load())
+    assert rows == [{
+        'id': item.job_id, 'url': 'https://youtu.be/abcdefghijk', 'title': '제목',
+        'duration': 3723, 'channel': '채널', 'download_type': 'audio',
+        'quality': 'MP3 (320kbps)', 'status': JobStatus.DOWNLOADING, 'progress': 42.5,
+        'downloaded_bytes': 1024, 'total_bytes': 4096, 'thumbnail': '',
+    }]
+    column_types = session._conn.execute(
+        "SELECT typeof(status), typeof(progress), typeof(duration) FROM jobs").fetchone()
+    assert column_types == ('integer', 'real', 'integer')
+
+
+def test_session_changes_and_removal(session, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(session_store, 'time',
+                        types.SimpleNamespace(time=time.time, monotonic=lambda: clock[0]))
+    items = [JobRecord(f'https://youtu.be/abcdefghij{i}') for i in range(3)]
+    for item in items:
+        session.item_added(item)
+
+    items[0].status = JobStatus.DONE
+    session.item_changed(items[0], 'status')
+    items[1].progress = 10.0
+    session.item_changed(items[1], 'progress')
+    # 진행률만 바뀐 경우는 PROGRESS_SAVE_INTERVAL 안에서 한 번만 저장
+    items[1].progress = 20.0
+    session.item_changed(items[1], 'progress')
+    session.items_removed([items[2]])
+
+    rows = {row['url'][-1]: row for row in session.load()}
+    assert sorted(rows) == ['0', '1']
+    assert rows['0']['status'] == JobStatus.DONE
+    assert rows['1']['progress'] == 10.0
+
+    clock[0] += session_store.PROGRESS_SAVE_INTERVAL
+    session.item_changed(items[1], 'progress')
+    assert [row['progress'] for row in session.load() if row['url'].endswith('1')] == [20.0]
+
+
+def test_session_load_excludes_rows_added_while_restoring(session):
+    session.item_added(JobRecord('https://youtu.be/abcdefghij0'))
+    rows = session.load()
+    session.item_added(JobRecord('https://youtu.be/abcdefghij1'))
+    assert [row['url'] for row in rows] == ['https://youtu.be/abcdefghij0']
+
+
+def test_session_migrates_text_columns(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, title TEXT, "
+        "duration TEXT, channel TEXT, download_type TEXT, quality TEXT, status TEXT, "
+        "progress TEXT, downloaded_bytes INTEGER DEFAULT 0, total_bytes INTEGER DEFAULT 0, "
+        "added_at REAL)"
+    )
+    conn.executemany(
+        "INSERT INTO jobs (url, title, duration, status, progress) VALUES (?, ?, ?, ?, ?)",
+        [('u1', 't1', '03:21', '✓ 완료', '100%'),
+         ('u2', 't2', '1:02:03', '3', '42.5'),
+         ('u3', 't3', '--:--', None, None)],
+    )
+    conn.commit()
+    conn.close()
+
+    store = SessionStore(path)
+    try:
+        assert store._conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+        rows = [(row['url'], row['duration'], row['status'], row['progress'])
+                for row in store.load()]
+        assert rows == [('u1', 201, JobStatus.DONE, 100.0),
+                        ('u2', 3723, JobStatus.DOWNLOADING, 42.5),
+                        ('u3', 0, JobStatus.QUEUED, 0.0)]
+        # 옮긴 뒤에도 행 번호가 이어짐
+        item = JobRecord('u4')
+        store.item_added(item)
+        assert item.job_id == 4
+    finally:
+        store.close()
+
+
+def test_history_round_trip(history, tmp_path):
+    output = tmp_path / 'video.mp4'
+    output.write_bytes(b'x' * 100)
+    profile = history_profile('video', '1080p')
+    history.record('https://www.youtube.com/watch?v=abcdefghijk&t=5', profile, str(output),
+                   title='제목', channel='채널',
+                   integrity={'sha256': 'ab' * 32, 'expected_bytes': 100, 'received_bytes': 100},
+                   merge={'seconds': 1.5, 'bytes': 200})
+
+    # 다른 주소 형식도 같은 영상
+    found = history.lookup('https://youtu.be/abcdefghijk', profile)
+    assert found['output_path'] == str(output) and found['size'] == 100
+    assert history.lookup('https://youtu.be/abcdefghijk', history_profile('video', '720p')) is None
+
+    entry, = history.entries()
+    assert entry['video_id'] == 'video:abcdefghijk'
+    assert (entry['title'], entry['channel'], entry['sha256']) == ('제목', '채널', 'ab' * 32)
+    assert (entry['merge_seconds'], entry['merge_bytes']) == (1.5, 200)
+    assert list(history.entries(since=entry['completed_at'])) == []
+
+
+def test_history_ignores_missing_files_and_forget(history, tmp_path):
+    output = tmp_path / 'audio.mp3'
+    output.write_bytes(b'x')
+    profile = history_profile('audio', 'MP3 (320kbps)')
+    history.record('https://youtu.be/abcdefghijk', profile, str(output))
+    output.unlink()
+    assert history.lookup('https://youtu.be/abcdefghijk', profile) is None
+
+    output.write_bytes(b'x')
+    history.forget('video:abcdefghijk', profile)
+    assert history.lookup('https://youtu.be/abcdefghijk', profile) is None
+    assert list(history.entries()) == []
+
+
+def test_history_sees_records_from_other_connections(history, tmp_path):
+    output = tmp_path / 'video.mp4'
+    output.write_bytes(b'x')
+    profile = history_profile('video', '최고 화질')
+    assert history.lookup('https://youtu.be/abcdefghijk', profile) is None
+
+    other = DownloadHistory(history.path)
+    try:
+        other.record('https://youtu.be/abcdefghijk', profile, str(output))
+    finally:
+        other.close()
+    assert history.lookup('https://youtu.be/abcdefghijk', profile)['output_path'] == str(output)
@@ -0,0 +1,137 @@
+"""
+공유 작업 대기열 임대 상태 전이 테스트
+"""
+import types
+
+import pytest
+
+import work_queue
+from work_queue import (
+    CANCELLED, DONE, FAILED, LEASE_EXPIRED_MESSAGE, LEASED, QUEUED, WorkQueue,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # 임대 시각은 벽시계 - 모듈이 보는 time만 바꿈
+    fake = types.SimpleNamespace(now=1000.0)
+    fake.time = lambda: fake.now
+    monkeypatch.setattr(work_queue, 'time', fake)
+    return fake
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = WorkQueue(str(tmp_path / 'work.db'), lease_seconds=60, max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def job(queue, job_id):
+    return next(j for j in queue.list_jobs() if j['id'] == job_id)
+
+
+def test_claim_leases_oldest_first(queue, clock):
+    first = queue.add('https://youtu.be/aaaaaaaaaaa')
+    second = queue.add('https://youtu.be/bbbbbbbbbbb', 'audio', 'MP3 (320kbps)')
+    claimed = queue.claim('w1')
+    assert claimed == {'id': first, 'url': 'https://youtu.be/aaaaaaaaaaa',
+                       'download_type': 'video', 'quality': None, 'attempt': 1}
+    assert queue.claim('w2')['id'] == second
+    assert queue.claim('w3') is None
+    row = job(queue, first)
+    assert (row['status'], row['worker'], row['lease_until']) == (LEASED, 'w1', 1060.0)
+
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    work_id = queue.add('https://youtu.be/aaaaaaaaaaa')
+    queue.claim('dead')
+    clock.now += 30
+    assert queue.claim('w2') is None
+    clock.now += 31
+    claimed = queue.claim('w2')
+    assert (claimed['id'], claimed['attempt']) == (work_id, 2)
+    # 임대를 잃은 작업자는 결과를 남기지 못함
+    assert queue.heartbeat([work_id], 'dead') == ([work_id], [])
+    assert not queue.complete(work_id, 'dead', DONE)
+    assert queue.complete(work_id, 'w2', DONE, '다운로드 완료', '/tmp/a.mp4')
+    assert job(queue, work_id)['status'] == DONE
+
+
+def test_expired_lease_fails_after_max_attempts(queue, clock):
+    work_id = queue.add('https://youtu.be/aaaaaaaaaaa')
+    for _ in range(2):
+        assert queue.claim('dead')['id'] == work_id
+        clock.now += 61
+    assert queue.claim('w2') is None
+    row = job(queue, work_id)
+    assert (row['status'], row['message'], row['worker']) == (FAILED, LEASE_EXPIRED_MESSAGE, None)
+    assert queue.retry_failed() == 1
+    assert queue.claim('w2')['attempt'] == 1
+
+
+def test_heartbeat_extends_lease_and_reports_cancel(queue, clock):
+    work_id = queue.add('https://youtu.be/aaaaaaaaaaa')
+    queue.claim('w1')
+    clock.now += 50
+    assert queue.heartbeat([work_id], 'w1') == ([], [])
+    clock.now += 50
+    # 연장된 임대는 아직 유효
+    assert queue.claim('w2') is None
+    assert queue.cancel(work_id)
+    assert queue.heartbeat([work_id], 'w1') == ([], [work_id])
+    assert queue.heartbeat([], 'w1') == ([], [])
+
+
+def test_release_returns_work_and_attempt(queue, clock):
+    work_id = queue.add('https://youtu.be/aaaaaaaaaaa')
+    queue.claim('w1')
+    queue.release(work_id, 'other')
+    assert job(queue, work_id)['status'] == LEASED
+    queue.release(work_id, 'w1')
+    row = job(queue, work_id)
+    assert (row['status'], row['attempts'], row['worker']) == (QUEUED, 0, None)
+    assert queue.claim('w2')['attempt'] == 1
+
+
+def test_release_of_cancel_requested_work_cancels(queue, clock):
+    work_id = queue.add('https://youtu.be/aaaaaaaaaaa')
+    queue.claim('w1')
+    queue.cancel(work_id)
+    queue.release(work_id, 'w1')
+    row = job(queue, work_id)
+    assert (row['status'], row['finished_at']) == (CANCELLED, 1000.0)
+    assert queue.claim('w2') is None
+
+
+def test_cancel_transitions(queue, clock):
+    queued = queue.add('https://youtu.be/aaaaaaaaaaa')
+    leased = queue.add('https://youtu.be/bbbbbbbbbbb')
+    queue.cancel(queued)
+    assert job(queue, queued)['status'] == CANCELLED
+    assert queue.claim('w1')['id'] == leased
+    assert queue.cancel(leased)
+    assert job(queue, leased)['cancel_requested'] == 1
+    # 끝난 작업이나 없는 작업은 취소할 수 없음
+    assert not queue.cancel(queued)
+    assert not queue.cancel(999)
+
+
+def test_expired_cancel_requested_lease_is_cancelled(queue, clock):
+    work_id = queue.add('https://youtu.be/aaaaaaaaaaa')
+    queue.claim('dead')
+    queue.cancel(work_id)
+    clock.now += 61
+    assert queue.claim('w2') is None
+    assert job(queue, work_id)['status'] == CANCELLED
+
+
+def test_counts_and_pending(queue, clock):
+    assert not queue.has_pending()
+    done = queue.add('https://youtu.be/aaaaaaaaaaa')
+    queue.add('https://youtu.be/bbbbbbbbbbb')
+    queue.claim('w1')
+    assert queue.has_pending()
+    queue.complete(done, 'w1', DONE)
+    assert queue.counts() == {DONE: 1, QUEUED: 1}
+    assert [j['id'] for j in queue.list_jobs(DONE)] == [done]
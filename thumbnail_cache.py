@@ -0,0 +1,163 @@
+"""
+썸네일 캐시 모듈
+바이트 크기 기준 메모리 LRU와 디스크 캐시, 썸네일 원본 가져오기
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class ByteLRU:
+    """
+    바이트 크기 제한 LRU 캐시
+
+    값마다 크기를 함께 저장하고, 합계가 max_bytes를 넘으면
+    가장 오래 사용하지 않은 항목부터 제거한다.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """값 조회 (사용 순서 갱신)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, value: Any, size: int):
+        """값 저장 후 한도를 넘으면 오래된 항목 제거"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+
+class DiskCache:
+    """
+    URL → 원본 파일 디스크 캐시
+
+    파일 수정 시간을 사용 시간으로 삼아, 합계가 max_bytes를 넘으면
+    오래된 파일부터 삭제한다.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key: str) -> Optional[bytes]:
+        """캐시된 원본 읽기"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        """원본 저장 후 용량 정리"""
+        path = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan_size(self) -> int:
+        total = 0
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        total += entry.stat().st_size
+        except OSError:
+            pass
+        return total
+
+    def _evict(self):
+        """한도의 80%까지 오래된 파일 삭제 (잠금 안에서 호출)"""
+        try:
+            with os.scandir(self.directory) as entries:
+                files = [(e.stat().st_mtime, e.stat().st_size, e.path)
+                         for e in entries if e.is_file()]
+        except OSError:
+            return
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.8
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+
+def fetch_thumbnail(url: str, disk_cache: DiskCache = None, timeout: float = 5) -> Optional[bytes]:
+    """
+    썸네일 원본 가져오기 (디스크 캐시 우선)
+
+    Args:
+        url: 썸네일 URL
+        disk_cache: 디스크 캐시 (없으면 항상 네트워크)
+        timeout: 요청 타임아웃 (초)
+
+    Returns:
+        이미지 바이트 (실패시 None)
+    """
+    if disk_cache:
+        data = disk_cache.get(url)
+        if data:
+            return data
+
+    # urllib.request(ssl/http 포함)는 GUI 시작을 늦추므로 첫 요청 때 불러옴
+    import urllib.request
+
+    try:
+        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            data = response.read()
+    except Exception:
+        return None
+
+    if data and disk_cache:
+        disk_cache.put(url, data)
+    return data
@@ -0,0 +1,282 @@
+"""
+공유 작업 대기열 모듈
+여러 작업자 프로세스(한 컴퓨터 또는 저장소를 공유하는 여러 컴퓨터)가 함께 쓰는 SQLite 작업 대기열
+
+작업자는 claim()으로 작업을 임대(lease)하고 heartbeat()로 임대를 연장하며,
+끝나면 complete()로 결과를 남긴다. 임대가 만료된 작업(작업자가 죽은 경우)은
+다음 claim()에서 다시 대기 상태로 돌아가 다른 작업자가 가져간다.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# 기본 대기열 파일 (사용자 홈)
+WORK_QUEUE_FILE = os.path.join(os.path.expanduser('~'), 'son_downloader_work.db')
+
+# 임대 시간 (초) - 작업자는 이보다 짧은 간격으로 heartbeat()를 불러야 함
+LEASE_SECONDS = 60.0
+# 작업자가 죽어 임대가 만료된 작업을 다시 줄 최대 횟수 (넘으면 실패)
+MAX_ATTEMPTS = 3
+
+# 작업 상태
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+CANCELLED = 'cancelled'
+FINAL_STATUSES = (DONE, FAILED, SKIPPED, CANCELLED)
+
+# 임대 만료로 실패 처리할 때 메시지
+LEASE_EXPIRED_MESSAGE = "작업자가 응답하지 않음"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS work (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    download_type TEXT NOT NULL,
+    quality TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    cancel_requested INTEGER DEFAULT 0,
+    message TEXT,
+    output_path TEXT,
+    added_at REAL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS work_status ON work (status, id)"
+
+# list_jobs()가 반환하는 컬럼
+_JOB_COLUMNS = (
+    'id', 'url', 'download_type', 'quality', 'status', 'attempts', 'worker', 'lease_until',
+    'cancel_requested', 'message', 'output_path', 'added_at', 'started_at', 'finished_at',
+)
+
+
+class WorkQueue:
+    """
+    임대 방식 공유 작업 대기열
+
+    상태 변경은 모두 BEGIN IMMEDIATE 트랜잭션 안에서 하므로 여러 프로세스가
+    동시에 claim()해도 같은 작업을 두 작업자가 받지 않는다.
+    임대 시각은 벽시계(time.time())라 여러 컴퓨터에서 쓰면 시계가 맞아야 한다.
+
+    network=True면 WAL 대신 롤백 저널을 쓴다. WAL은 공유 메모리가 필요해
+    여러 컴퓨터가 네트워크 파일 시스템으로 같은 파일을 열면 쓸 수 없다.
+    """
+
+    def __init__(self, path: str = WORK_QUEUE_FILE, network: bool = False,
+                 lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        """
+        초기화
+
+        Args:
+            path: 대기열 파일
+            network: 여러 컴퓨터가 공유하는 파일 (롤백 저널 사용)
+            lease_seconds: 임대 시간 (초)
+            max_attempts: 임대 만료로 다시 줄 최대 횟수
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute(f"PRAGMA journal_mode={'DELETE' if network else 'WAL'}")
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if network else 'NORMAL'}")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_INDEX)
+
+    def close(self):
+        """대기열 파일 닫기"""
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _transaction(self):
+        """쓰기 잠금을 먼저 잡는 트랜잭션 (잠금 안에서 사용)"""
+        return _Immediate(self._conn)
+
+    def add(self, url: str, download_type: str = 'video', quality: str = None) -> int:
+        """작업 추가 - 작업 번호 반환"""
+        with self._lock, self._transaction():
+            cursor = self._conn.execute(
+                "INSERT INTO work (url, download_type, quality, status, added_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, download_type, quality, QUEUED, time.time()),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        대기 중인 가장 오래된 작업을 임대 (없으면 None)
+
+        먼저 임대가 만료된 작업을 대기 상태로 되돌린다
+        (max_attempts를 넘은 작업은 실패, 취소가 요청된 작업은 취소).
+        """
+        now = time.time()
+        with self._lock, self._transaction():
+            self._reclaim(now)
+            row = self._conn.execute(
+                "SELECT id, url, download_type, quality, attempts FROM work "
+                "WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE work SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "started_at = ? WHERE id = ?",
+                (LEASED, worker, now + self.lease_seconds, now, row[0]),
+            )
+        return {'id': row[0], 'url': row[1], 'download_type': row[2], 'quality': row[3],
+                'attempt': row[4] + 1}
+
+    def _reclaim(self, now: float):
+        """임대 만료 작업 정리 (트랜잭션 안에서 호출)"""
+        self._conn.execute(
+            "UPDATE work SET status = ?, worker = NULL, lease_until = NULL, message = ?, "
+            "finished_at = ? WHERE status = ? AND lease_until < ? AND cancel_requested",
+            (CANCELLED, "취소됨", now, LEASED, now),
+        )
+        self._conn.execute(
+            "UPDATE work SET status = ?, worker = NULL, lease_until = NULL, message = ?, "
+            "finished_at = ? WHERE status = ? AND lease_until < ? AND attempts >= ?",
+            (FAILED, LEASE_EXPIRED_MESSAGE, now, LEASED, now, self.max_attempts),
+        )
+        self._conn.execute(
+            "UPDATE work SET status = ?, worker = NULL, lease_until = NULL "
+            "WHERE status = ? AND lease_until < ?",
+            (QUEUED, LEASED, now),
+        )
+
+    def heartbeat(self, job_ids: List[int], worker: str) -> Tuple[List[int], List[int]]:
+        """
+        임대 연장
+
+        Returns:
+            (임대를 잃은 작업 번호, 취소 요청된 작업 번호)
+        """
+        if not job_ids:
+            return [], []
+        now = time.time()
+        lost, cancelled = [], []
+        with self._lock, self._transaction():
+            for job_id in job_ids:
+                row = self._conn.execute(
+                    "SELECT worker, status, cancel_requested FROM work WHERE id = ?", (job_id,),
+                ).fetchone()
+                if row is None or row[0] != worker or row[1] != LEASED:
+                    lost.append(job_id)
+                    continue
+                self._conn.execute("UPDATE work SET lease_until = ? WHERE id = ?",
+                                   (now + self.lease_seconds, job_id))
+                if row[2]:
+                    cancelled.append(job_id)
+        return lost, cancelled
+
+    def complete(self, job_id: int, worker: str, status: str, message: str = '',
+                 output_path: str = None) -> bool:
+        """결과 기록 (임대를 잃었으면 기록하지 않고 False)"""
+        with self._lock, self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE work SET status = ?, message = ?, output_path = ?, finished_at = ?, "
+                "lease_until = NULL WHERE id = ? AND worker = ? AND status = ?",
+                (status, message, output_path, time.time(), job_id, worker, LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, job_id: int, worker: str):
+        """
+        끝내지 못한 작업을 대기 상태로 돌려놓음 (작업자 종료시 - 시도 횟수는 되돌림)
+
+        그 사이 취소가 요청된 작업은 취소로 끝낸다.
+        """
+        with self._lock, self._transaction():
+            self._conn.execute(
+                "UPDATE work SET status = CASE WHEN cancel_requested THEN ? ELSE ? END, "
+                "worker = NULL, lease_until = NULL, attempts = MAX(attempts - 1, 0), "
+                "finished_at = CASE WHEN cancel_requested THEN ? END "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (CANCELLED, QUEUED, time.time(), job_id, worker, LEASED),
+            )
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        작업 취소
+
+        대기 중이면 바로 취소로 끝내고, 임대 중이면 취소를 요청한다
+        (작업자가 다음 heartbeat에서 보고 다운로드를 멈춤).
+
+        Returns:
+            취소를 요청했는지 (없거나 이미 끝난 작업이면 False)
+        """
+        with self._lock, self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE work SET status = ?, message = ?, finished_at = ? "
+                "WHERE id = ? AND status = ?",
+                (CANCELLED, "취소됨", time.time(), job_id, QUEUED),
+            )
+            if cursor.rowcount:
+                return True
+            cursor = self._conn.execute(
+                "UPDATE work SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                (job_id, LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def retry_failed(self) -> int:
+        """실패한 작업을 모두 다시 대기 상태로 - 되돌린 수 반환"""
+        with self._lock, self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE work SET status = ?, attempts = 0, worker = NULL, message = NULL, "
+                "finished_at = NULL WHERE status = ?",
+                (QUEUED, FAILED),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """상태별 작업 수"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM work GROUP BY status"))
+
+    def has_pending(self) -> bool:
+        """대기 또는 임대 중인 작업이 있는지"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM work WHERE status IN (?, ?) LIMIT 1", (QUEUED, LEASED),
+            ).fetchone() is not None
+
+    def list_jobs(self, status: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """최근 작업 목록 (status로 거름)"""
+        query = f"SELECT {', '.join(_JOB_COLUMNS)} FROM work"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + (limit,)).fetchall()
+        return [dict(zip(_JOB_COLUMNS, row)) for row in rows]
+
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT (예외면 ROLLBACK)"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
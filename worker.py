@@ -0,0 +1,395 @@
+"""
+다중 프로세스 작업자
+여러 작업자 프로세스가 공유 작업 대기열(work_queue.py) 하나에서 작업을 임대해 받음
+(한 컴퓨터에서 --processes로 여러 개, 또는 저장소를 공유하는 여러 컴퓨터에서 각각 실행)
+
+사용:
+    python worker.py add URL [URL ...] -t audio -q "MP3 (320kbps)"
+    python worker.py add -i urls.txt
+    python worker.py run --processes 4 -o ~/Videos
+    python worker.py run --once              # 대기열이 비면 종료
+    python worker.py status
+    python worker.py cancel 12
+
+각 작업자는 JobRunner(cli.py와 같은 실행기)로 받으며 진행 상황과 결과를 JSON Lines로 출력한다.
+작업자가 죽으면 임대가 만료되어 다른 작업자가 그 작업을 다시 받는다.
+여러 컴퓨터가 네트워크 저장소의 대기열 파일을 함께 쓸 때는 --shared-storage를 준다.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, List
+
+from cli import EXIT_FAILED, EXIT_INTERRUPTED, EXIT_OK, EXIT_USAGE, read_jobs
+from media_id import parse_many
+from work_queue import (
+    CANCELLED, FAILED, LEASE_SECONDS, WORK_QUEUE_FILE, WorkQueue
+)
+
+# 임대 연장 간격 (초) - 임대 시간보다 충분히 짧게
+HEARTBEAT_INTERVAL = LEASE_SECONDS / 4
+# 받을 작업이 없을 때 대기열을 다시 볼 간격 (초)
+POLL_INTERVAL = 2.0
+
+
+def worker_name() -> str:
+    """작업자 이름 (컴퓨터 이름-프로세스 번호)"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Worker:
+    """
+    대기열 작업자
+
+    JobRunner의 동시 작업 한도(조절기가 정함)만큼 대기열에서 작업을 임대해 넘기고,
+    결과가 나오면 대기열에 기록한다. 실행 중인 작업은 heartbeat로 임대를 연장하며,
+    임대를 잃었거나(다른 작업자가 가져감) 취소가 요청되면 다운로드를 멈춘다.
+    종료할 때 끝내지 못한 작업은 대기 상태로 돌려놓는다.
+    """
+
+    def __init__(self, work_queue: WorkQueue, runner, name: str = None, on_event=None):
+        """
+        초기화
+
+        Args:
+            work_queue: 공유 작업 대기열
+            runner: JobRunner (on_event는 handle_event로 연결되어 있어야 함)
+            name: 작업자 이름 (기본: 컴퓨터 이름-프로세스 번호)
+            on_event: 이벤트 콜백 (runner 이벤트에 'work', 'worker'를 붙여 전달)
+        """
+        self.queue = work_queue
+        self.runner = runner
+        self.name = name or worker_name()
+        self.on_event = on_event
+        self.done = 0
+        self.failed = 0
+        # runner 작업 번호 -> 대기열 작업 번호 (결과를 기록하면 뺌)
+        self._work: Dict[int, int] = {}
+        # 슬롯을 쓰지 않는 작업 (후처리 중이거나 다시 시도하기를 기다림)
+        self._idle = set()
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self):
+        """새 작업 임대를 멈추고 run() 종료 (실행 중인 작업은 대기열로 돌려놓음)"""
+        self._stop.set()
+
+    def _emit(self, event: str, **fields):
+        if self.on_event:
+            self.on_event({'event': event, 'worker': self.name, **fields})
+
+    def handle_event(self, event: Dict[str, Any]):
+        """JobRunner 이벤트 콜백"""
+        job_id = event.get('job')
+        with self._lock:
+            work_id = self._work.get(job_id)
+            if work_id is not None and event['event'] in ('postprocessing', 'retry', 'waiting'):
+                self._idle.add(job_id)
+            elif work_id is not None and event['event'] == 'start':
+                self._idle.discard(job_id)
+            elif work_id is not None and event['event'] == 'result':
+                del self._work[job_id]
+                self._idle.discard(job_id)
+        if work_id is not None:
+            event = dict(event, work=work_id)
+            if event['event'] == 'result':
+                self._record(job_id, work_id, event)
+        if self.on_event:
+            self.on_event(dict(event, worker=self.name))
+
+    def _record(self, job_id: int, work_id: int, result: Dict[str, Any]):
+        """결과를 대기열에 기록"""
+        status = result['status']
+        if status == CANCELLED and job_id not in self._cancelled:
+            # 취소 요청이 아니라 작업자 종료로 멈춘 작업 - 다른 작업자가 이어 받음
+            self.queue.release(work_id, self.name)
+            return
+        if not self.queue.complete(work_id, self.name, status, result.get('message') or '',
+                                   result.get('path')):
+            self._emit('lease_lost', work=work_id)
+            return
+        if status == FAILED:
+            self.failed += 1
+        else:
+            self.done += 1
+
+    def _has_room(self) -> bool:
+        """동시 작업 한도에 여유가 있는지 (요청 제한으로 멈춘 동안은 받지 않음)"""
+        if self.runner.breaker.is_open:
+            return False
+        with self._lock:
+            return len(self._work) - len(self._idle) < self.runner.slots.limit
+
+    def _claim(self) -> bool:
+        """작업 하나 임대해 runner에 넘김 (받을 작업이 없으면 False)"""
+        work = self.queue.claim(self.name)
+        if work is None:
+            return False
+
+        def link(job):
+            # submit() 안에서 바로 결과가 나와도 대기열 작업을 찾을 수 있도록 이벤트 전에 연결
+            with self._lock:
+                self._work[job.id] = work['id']
+
+        self._emit('claimed', work=work['id'], url=work['url'], attempt=work['attempt'])
+        self.runner.submit(work['url'], work['download_type'], work['quality'], on_created=link)
+        return True
+
+    def _heartbeat(self):
+        """임대 연장 스레드"""
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            with self._lock:
+                running = dict(self._work)
+            by_work = {work_id: job_id for job_id, work_id in running.items()}
+            try:
+                lost, cancelled = self.queue.heartbeat(list(by_work), self.name)
+            except Exception as e:
+                # 저장소가 잠시 안 보여도 임대가 남아 있는 동안은 계속 받음
+                self._emit('heartbeat_error', message=str(e))
+                continue
+            for work_id in lost:
+                self._emit('lease_lost', work=work_id)
+                self.runner.cancel_job(by_work[work_id])
+            for work_id in cancelled:
+                job_id = by_work[work_id]
+                if job_id not in self._cancelled:
+                    self._cancelled.add(job_id)
+                    self.runner.cancel_job(job_id)
+
+    def run(self, once: bool = False):
+        """
+        작업 임대/실행 (stop()을 부르거나 once이고 대기열이 빌 때까지)
+
+        Args:
+            once: 대기열에 대기/임대 중인 작업이 없으면 종료
+        """
+        runner_thread = threading.Thread(target=self.runner.run, kwargs={'serve': True},
+                                         name='runner', daemon=True)
+        runner_thread.start()
+        threading.Thread(target=self._heartbeat, name='heartbeat', daemon=True).start()
+        self._emit('worker_start', queue=self.queue.path)
+        try:
+            while not self._stop.is_set():
+                if self._has_room() and self._claim():
+                    continue
+                if once:
+                    with self._lock:
+                        idle = not self._work
+                    if idle and not self.queue.has_pending():
+                        break
+                self._stop.wait(POLL_INTERVAL)
+        finally:
+            self._stop.set()
+            self.runner.close()
+            runner_thread.join()
+            # 멈추는 중에 결과가 나오지 않은 작업
+            with self._lock:
+                leftover = list(self._work.values())
+                self._work.clear()
+            for work_id in leftover:
+                self.queue.release(work_id, self.name)
+            self._emit('worker_stop', done=self.done, failed=self.failed, released=len(leftover))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='worker.py', description="공유 작업 대기열 다중 프로세스 작업자")
+    parser.add_argument('--queue', default=WORK_QUEUE_FILE,
+                        help=f"작업 대기열 파일 (기본: {WORK_QUEUE_FILE})")
+    parser.add_argument('--shared-storage', action='store_true',
+                        help="여러 컴퓨터가 네트워크 저장소의 대기열 파일을 함께 씀 (WAL 대신 롤백 저널)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="작업 추가")
+    add.add_argument('urls', nargs='*', metavar='URL', help="받을 URL")
+    add.add_argument('-i', '--input', action='append', default=[], metavar='FILE',
+                     help="URL 목록 파일 ('-'는 표준 입력, cli.py와 같은 형식)")
+    add.add_argument('-t', '--type', choices=('video', 'audio'), default='video',
+                     help="기본 다운로드 타입 (기본: video)")
+    add.add_argument('-q', '--quality',
+                     help="기본 화질/오디오 포맷 (예: '1080p', 'MP3 (320kbps)')")
+
+    run = commands.add_parser('run', help="작업자 실행")
+    run.add_argument('--processes', type=int, default=1,
+                     help="이 컴퓨터에서 띄울 작업자 프로세스 수 (기본 1)")
+    run.add_argument('--spawned', action='store_true', help=argparse.SUPPRESS)
+    run.add_argument('--once', action='store_true', help="대기열이 비면 종료")
+    run.add_argument('-o', '--output', help="저장 폴더 (기본: ~/Videos)")
+    run.add_argument('-j', '--jobs', type=int,
+                     help="작업자마다 동시 작업 수 고정 (지정하지 않으면 자동 조절)")
+    run.add_argument('--min-jobs', type=int, help="자동 조절 최소 동시 작업 수")
+    run.add_argument('--max-jobs', type=int, help="자동 조절 최대 동시 작업 수")
+    run.add_argument('--no-history', action='store_true',
+                     help="완료 기록을 보지 않고 쓰지도 않음 (이미 받은 영상도 다시 받음)")
+    run.add_argument('--no-stream', action='store_true',
+                     help="MP3/WAV를 받으면서 변환하지 않고 받은 뒤 변환")
+    run.add_argument('--quiet', action='store_true',
+                     help="진행률 이벤트 없이 임대/결과만 출력")
+    run.add_argument('--trace', metavar='FILE',
+                     help="작업 수명 주기 이벤트를 FILE에 JSON Lines로 기록 (작업자마다 FILE.프로세스번호)")
+
+    status = commands.add_parser('status', help="상태별 작업 수와 최근 작업")
+    status.add_argument('--status', dest='filter', help="이 상태의 작업만 (queued, leased, failed ...)")
+    status.add_argument('-n', '--limit', type=int, default=20, help="보여줄 작업 수 (기본 20)")
+
+    cancel = commands.add_parser('cancel', help="작업 취소")
+    cancel.add_argument('ids', nargs='+', type=int, metavar='ID', help="작업 번호")
+
+    commands.add_parser('retry', help="실패한 작업을 모두 다시 대기열에")
+    return parser
+
+
+def _write(event: Dict[str, Any]):
+    sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def _add(work_queue: WorkQueue, args) -> int:
+    if not args.urls and not args.input:
+        print("worker.py add: URL 또는 -i 입력이 필요합니다", file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        lines = list(read_jobs(args.urls, args.input))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"worker.py add: 입력을 읽을 수 없습니다: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    rejected, seen = 0, set()
+    for (url, download_type, quality), media in zip(lines, parse_many(url for url, _, _ in lines)):
+        if media is None:
+            rejected += 1
+            _write({'event': 'rejected', 'url': url, 'message': "올바른 YouTube URL이 아닙니다"})
+            continue
+        download_type = download_type or args.type
+        quality = quality or (args.quality if download_type == args.type else None)
+        # 같은 영상이 다른 주소로 여러 번 들어온 경우 한 번만
+        if (media.key, download_type, quality) in seen:
+            continue
+        seen.add((media.key, download_type, quality))
+        _write({'event': 'added', 'work': work_queue.add(media.url, download_type, quality),
+                'url': media.url, 'type': download_type, 'quality': quality})
+    return EXIT_FAILED if rejected else EXIT_OK
+
+
+def _spawn(argv: List[str], count: int) -> List[subprocess.Popen]:
+    """같은 옵션으로 작업자 프로세스를 더 띄움 (--processes 대신 --spawned)"""
+    args = list(argv)
+    for i, arg in enumerate(args):
+        if arg == '--processes':
+            args[i:i + 2] = ['--spawned']
+            break
+        if arg.startswith('--processes='):
+            args[i] = '--spawned'
+            break
+    return [subprocess.Popen([sys.executable, os.path.abspath(__file__)] + args)
+            for _ in range(count)]
+
+
+def _run(work_queue: WorkQueue, args, argv: List[str]) -> int:
+    children = _spawn(argv, args.processes - 1) if args.processes > 1 else []
+
+    # 엔진은 작업자를 띄울 때만 불러옴 (add/status는 yt-dlp 없이 바로 끝남)
+    from job_tuner import MAX_CONCURRENT_JOBS, MIN_CONCURRENT_JOBS
+    from runner import JobRunner
+
+    if args.jobs:
+        min_jobs = max_jobs = args.jobs
+    else:
+        min_jobs = args.min_jobs or MIN_CONCURRENT_JOBS
+        max_jobs = args.max_jobs or max(MAX_CONCURRENT_JOBS, min_jobs)
+
+    history = None
+    if not args.no_history:
+        from download_history import DownloadHistory
+        history = DownloadHistory()
+
+    def write(event: Dict[str, Any]):
+        if args.quiet and event['event'] in ('progress', 'tuner', 'start', 'postprocessing'):
+            return
+        _write(event)
+
+    from job_trace import open_trace
+    several = args.trace and (children or args.spawned)
+    trace = open_trace(f"{args.trace}.{os.getpid()}" if several else args.trace,
+                       'worker', log=lambda line: write({'event': 'trace', 'message': line}))
+
+    runner = JobRunner(os.path.expanduser(args.output) if args.output else None, history,
+                       min_jobs, max_jobs, stream_audio=not args.no_stream, trace=trace)
+    worker = Worker(work_queue, runner, on_event=write)
+    runner.on_event = worker.handle_event
+    terminated = threading.Event()
+
+    def on_terminate(signum, frame):
+        # 서비스 관리자의 종료 신호도 Ctrl+C처럼 작업을 돌려놓고 끝냄
+        # (--spawned 작업자는 --once 없이 돌면 스스로 끝나지 않으므로 신호를 전달)
+        terminated.set()
+        worker.stop()
+        for child in children:
+            child.terminate()
+
+    signal.signal(signal.SIGTERM, on_terminate)
+
+    interrupted = False
+    try:
+        worker.run(once=args.once)
+    except KeyboardInterrupt:
+        interrupted = True
+    finally:
+        interrupted = interrupted or terminated.is_set()
+        for child in children:
+            if interrupted:
+                child.terminate()
+            child.wait()
+        if history is not None:
+            history.close()
+        if trace is not None:
+            trace.close()
+    if interrupted:
+        return EXIT_INTERRUPTED
+    failed = worker.failed or any(child.returncode for child in children)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _status(work_queue: WorkQueue, args) -> int:
+    _write({'event': 'counts', **work_queue.counts()})
+    for job in reversed(work_queue.list_jobs(args.filter, args.limit)):
+        _write({'event': 'job', **job})
+    return EXIT_OK
+
+
+def main(argv: List[str] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    if args.command == 'run' and args.processes < 1:
+        print("worker.py run: --processes는 1 이상이어야 합니다", file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        work_queue = WorkQueue(os.path.expanduser(args.queue), network=args.shared_storage)
+    except Exception as e:
+        print(f"worker.py: 대기열을 열 수 없습니다: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        if args.command == 'add':
+            return _add(work_queue, args)
+        if args.command == 'run':
+            return _run(work_queue, args, argv)
+        if args.command == 'status':
+            return _status(work_queue, args)
+        if args.command == 'cancel':
+            missing = [work_id for work_id in args.ids if not work_queue.cancel(work_id)]
+            for work_id in args.ids:
+                _write({'event': 'cancel', 'work': work_id, 'requested': work_id not in missing})
+            return EXIT_FAILED if missing else EXIT_OK
+        _write({'event': 'retry', 'requeued': work_queue.retry_failed()})
+        return EXIT_OK
+    finally:
+        work_queue.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())